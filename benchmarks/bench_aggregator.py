@@ -0,0 +1,158 @@
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+import multiprocessing as mp
+from typing import Dict, Any
+
+import numpy as np
+
+from collector.aggregator import Aggregator
+from collector.shipper import ShipperSink
+from storage import metric_store
+
+# =========================
+# CONFIGURATION
+# =========================
+N_AGENTS = 24            # Simulated metric_logger agents (one process each)
+FRAMES_PER_AGENT = 200   # Frames shipped by every agent
+ROWS_PER_FRAME = 500     # Samples per frame (e.g. 5 s at 100 Hz)
+START_MS = 1_767_225_600_000  # 2026-01-01T00:00:00Z
+COLUMNS = ["timestamp_ms", "datetime_utc", "cpu_ratio", "ram_ratio", "disk_ratio"]
+
+
+# =========================
+# FUNCTION DEFINITIONS
+# =========================
+def _agent(address: str, spool_dir: str, agent_id: int, n_frames: int, rows: int) -> None:
+    """
+    Simulated agent: ship `n_frames` frames of synthetic 100 Hz samples.
+    """
+    rng = np.random.default_rng(agent_id)
+    with ShipperSink(address, COLUMNS, spool_dir, host=f"agent-{agent_id:03d}",
+                     flush_rows=rows, timeout=30.0) as sink:
+        for i in range(n_frames):
+            records = np.zeros(rows, dtype=sink.dtype)
+            records["timestamp_ms"] = START_MS + (i * rows + np.arange(rows)) * 10
+            records["cpu_ratio"] = rng.random(rows)
+            records["ram_ratio"] = rng.random(rows)
+            records["disk_ratio"] = 0.6
+            sink.write_records(records)
+
+
+def _serve_in_thread(aggregator: Aggregator, address: str):
+    """
+    Run the aggregator's event loop on a background thread.
+    """
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def main():
+        started = asyncio.Event()
+        state["task"] = asyncio.create_task(aggregator.serve(address, started))
+        await started.wait()
+        ready.set()
+        try:
+            await state["task"]
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=lambda: loop.run_until_complete(main()), daemon=True)
+    thread.start()
+    ready.wait()
+    return loop, thread, state
+
+
+def _stop(loop, thread, state) -> None:
+    # Cancelling serve() makes it drain the queue and close the sinks
+    loop.call_soon_threadsafe(state["task"].cancel)
+    thread.join(timeout=30)
+
+
+def bench_aggregator(n_agents: int = N_AGENTS,
+                     frames_per_agent: int = FRAMES_PER_AGENT,
+                     rows_per_frame: int = ROWS_PER_FRAME) -> Dict[str, Any]:
+    """
+    Measure aggregator ingestion throughput with many concurrent agents,
+    then check that a downed aggregator loses nothing thanks to the spool.
+
+    Args:
+        n_agents (int): Concurrent agent processes.
+        frames_per_agent (int): Frames sent by each agent.
+        rows_per_frame (int): Samples per frame.
+
+    Returns:
+        Dict[str, Any]: Throughput (samples/s) and consistency flags.
+    """
+    workdir = tempfile.mkdtemp(prefix="dcml_aggregator_")
+    try:
+        address = f"unix:{os.path.join(workdir, 'aggregator.sock')}"
+        out_dir = os.path.join(workdir, "fleet")
+        aggregator = Aggregator(out_dir, fsync_policy="never", verbose=False)
+        loop, thread, state = _serve_in_thread(aggregator, address)
+
+        total = n_agents * frames_per_agent * rows_per_frame
+        ctx = mp.get_context("fork")
+        agents = [
+            ctx.Process(target=_agent, args=(address, os.path.join(workdir, f"spool_{i}"),
+                                             i, frames_per_agent, rows_per_frame))
+            for i in range(n_agents)
+        ]
+
+        start = time.perf_counter()
+        for p in agents:
+            p.start()
+        for p in agents:
+            p.join()
+        while aggregator.records_written < total:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        _stop(loop, thread, state)
+
+        hosts = sorted(os.listdir(out_dir))
+        per_host = [len(metric_store.load_records(os.path.join(out_dir, h))) for h in hosts]
+
+        # ---- aggregator down: frames spool locally, then replay on reconnect ----
+        spool_dir = os.path.join(workdir, "spool_outage")
+        outage_dir = os.path.join(workdir, "fleet_outage")
+        sink = ShipperSink(address, COLUMNS, spool_dir, host="outage", flush_rows=10, retry_sec=0.0)
+        for i in range(50):
+            sink.write_row((START_MS + i * 1000, "", 0.1, 0.2, 0.3))
+        spooled = len(sink.spool)
+
+        aggregator = Aggregator(outage_dir, fsync_policy="never", verbose=False)
+        loop, thread, state = _serve_in_thread(aggregator, address)
+        for i in range(50, 60):
+            sink.write_row((START_MS + i * 1000, "", 0.1, 0.2, 0.3))
+        sink.close()
+        while aggregator.records_written < 60:
+            time.sleep(0.01)
+        _stop(loop, thread, state)
+        outage = metric_store.load_records(os.path.join(outage_dir, "outage"))
+
+        return {
+            "agents": n_agents,
+            "samples": total,
+            "frames": n_agents * frames_per_agent,
+            "seconds": round(elapsed, 3),
+            "samples_per_sec": round(total / elapsed),
+            "frames_per_sec": round(n_agents * frames_per_agent / elapsed),
+            "all_hosts_complete": len(hosts) == n_agents and all(n == frames_per_agent * rows_per_frame for n in per_host),
+            "outage_spooled_frames": spooled,
+            "outage_replayed_in_order": bool(
+                len(outage) == 60 and np.all(np.diff(outage["timestamp_ms"]) > 0)
+            ),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# =========================
+# MAIN
+# =========================
+if __name__ == "__main__":
+    for key, value in bench_aggregator().items():
+        print(f"{key:<26}{value}")
@@ -0,0 +1,202 @@
+import os
+import math
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+import multiprocessing as mp
+from typing import Dict, Any, List
+
+import numpy as np
+from from_root import from_root
+
+from collector import protocol
+from monitoring.inference_server import InferenceServer
+from monitoring.scorer import load_scorer
+from storage.metric_store import record_dtype
+
+# =========================
+# CONFIGURATION
+# =========================
+PIPELINE_FILE = os.path.join(from_root(), "models", "supervised_pipeline_simple.joblib")
+
+RATES = [1_000, 10_000, 100_000]     # Offered samples/s
+N_CLIENTS = 4                        # Load-generator processes (simulated hosts)
+REQUESTS_PER_SEC = 500               # Per client; samples per request scale with the rate
+MAX_IN_FLIGHT = 64                   # Pipelined requests per client
+DURATION_SEC = 3.0
+MODES = {
+    "per_sample": dict(max_batch=1, max_delay_ms=0.0),
+    "batched": dict(max_batch=4_096, max_delay_ms=5.0),
+}
+FEATURES = ["cpu_ratio", "ram_ratio", "disk_ratio"]
+
+
+# =========================
+# LOAD GENERATOR
+# =========================
+async def _client(address: str, rate: float, rows: int, duration: float, seed: int) -> Dict[str, Any]:
+    """
+    Send paced, pipelined requests of `rows` samples and time each answer.
+    """
+    kind, target = protocol.parse_address(address)
+    if kind == "unix":
+        reader, writer = await asyncio.open_unix_connection(target)
+    else:
+        reader, writer = await asyncio.open_connection(*target)
+
+    rng = np.random.default_rng(seed)
+    records = np.zeros(rows, dtype=record_dtype(FEATURES))
+    for name in FEATURES:
+        records[name] = np.round(rng.random(rows), 4)
+    frame = protocol.encode_frame(f"load-{seed}", records)
+
+    interval = rows / rate
+    sent_at: List[float] = []
+    latencies: List[float] = []
+    window = asyncio.Semaphore(MAX_IN_FLIGHT)
+    received = 0
+
+    async def receive():
+        nonlocal received
+        while True:
+            header = await reader.readexactly(protocol.ACK.size)
+            (n,) = protocol.ACK.unpack(header)
+            await reader.readexactly(n)
+            latencies.append(time.perf_counter() - sent_at[received])
+            received += 1
+            window.release()
+
+    receiver = asyncio.create_task(receive())
+
+    start = time.perf_counter()
+    next_send = start
+    while time.perf_counter() - start < duration:
+        await window.acquire()
+        sent_at.append(time.perf_counter())
+        writer.write(frame)
+        await writer.drain()
+        next_send += interval
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    # Wait for every outstanding answer
+    for _ in range(MAX_IN_FLIGHT):
+        await window.acquire()
+    receiver.cancel()
+    elapsed = time.perf_counter() - start
+    writer.close()
+
+    return {
+        "samples": received * rows,
+        "elapsed": elapsed,
+        "latencies_ms": np.asarray(latencies) * 1000,
+    }
+
+
+def _client_process(address, rate, rows, duration, seed, results) -> None:
+    results.put(asyncio.run(_client(address, rate, rows, duration, seed)))
+
+
+def _serve_in_thread(server: InferenceServer, address: str):
+    """
+    Run the inference server's event loop on a background thread.
+    """
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def main():
+        started = asyncio.Event()
+        state["task"] = asyncio.create_task(server.serve(address, started))
+        await started.wait()
+        ready.set()
+        try:
+            await state["task"]
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=lambda: loop.run_until_complete(main()), daemon=True)
+    thread.start()
+    ready.wait()
+    return loop, thread, state
+
+
+# =========================
+# FUNCTION DEFINITIONS
+# =========================
+def bench_inference_server(rates: List[int] = RATES,
+                           n_clients: int = N_CLIENTS,
+                           duration: float = DURATION_SEC) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare per-sample and micro-batched scoring under offered load.
+
+    Every mode/rate pair starts a fresh server on a unix socket and
+    `n_clients` load-generator processes that split the offered rate.
+
+    Args:
+        rates (List[int]): Offered samples per second.
+        n_clients (int): Concurrent clients (simulated hosts).
+        duration (float): Seconds of load per run.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per "mode@rate": achieved samples/s,
+        client latency percentiles and server batching statistics.
+    """
+    scorer = load_scorer(PIPELINE_FILE)
+    workdir = tempfile.mkdtemp(prefix="dcml_inference_")
+    ctx = mp.get_context("fork")
+    results = {}
+    try:
+        for rate in rates:
+            rows = max(1, math.ceil(rate / (n_clients * REQUESTS_PER_SEC)))
+            for mode, options in MODES.items():
+                address = f"unix:{os.path.join(workdir, f'{mode}_{rate}.sock')}"
+                server = InferenceServer(scorer, verbose=False, **options)
+                loop, thread, state = _serve_in_thread(server, address)
+
+                queue = ctx.Queue()
+                clients = [
+                    ctx.Process(target=_client_process,
+                                args=(address, rate / n_clients, rows, duration, seed, queue))
+                    for seed in range(n_clients)
+                ]
+                for p in clients:
+                    p.start()
+                outputs = [queue.get() for _ in clients]
+                for p in clients:
+                    p.join()
+
+                loop.call_soon_threadsafe(state["task"].cancel)
+                thread.join(timeout=30)
+
+                latencies = np.concatenate([o["latencies_ms"] for o in outputs])
+                samples = sum(o["samples"] for o in outputs)
+                elapsed = max(o["elapsed"] for o in outputs)
+                b = server.batcher
+                results[f"{mode}@{rate}"] = {
+                    "offered": rate,
+                    "achieved": round(samples / elapsed),
+                    "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+                    "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+                    "predict_calls": b.predict_calls,
+                    "mean_batch": round(b.samples / max(b.predict_calls, 1), 1),
+                }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+# =========================
+# MAIN
+# =========================
+if __name__ == "__main__":
+    results = bench_inference_server()
+
+    print(f"\n{'run':<20}{'offered/s':>10}{'achieved/s':>12}{'p50 ms':>9}{'p99 ms':>9}{'calls':>9}{'batch':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<20}{r['offered']:>10}{r['achieved']:>12}{r['p50_ms']:>9.2f}"
+            f"{r['p99_ms']:>9.2f}{r['predict_calls']:>9}{r['mean_batch']:>8.1f}"
+        )
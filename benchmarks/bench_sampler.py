@@ -0,0 +1,84 @@
+import time
+import psutil
+from typing import Dict, Any
+
+from monitoring.sampler import MetricSampler, METRIC_GROUPS
+
+# =========================
+# CONFIGURATION
+# =========================
+N_TICKS = 5000
+
+
+# =========================
+# FUNCTION DEFINITIONS
+# =========================
+def legacy_sample():
+    """
+    The per-tick psutil sampling previously done in main.monitor_system.
+    """
+    cpu = psutil.cpu_percent(interval=None) / 100.0
+    ram = psutil.virtual_memory().used / psutil.virtual_memory().total
+    disk_ratio = psutil.disk_usage("/").used / psutil.disk_usage("/").total
+    return cpu, ram, disk_ratio
+
+
+def _per_tick_us(fn, n_ticks: int) -> Dict[str, float]:
+    """
+    Return wall and process-CPU microseconds per call of `fn`.
+    """
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(n_ticks):
+        fn()
+    return {
+        "wall_us": round((time.perf_counter() - wall) / n_ticks * 1e6, 2),
+        "cpu_us": round((time.process_time() - cpu) / n_ticks * 1e6, 2),
+    }
+
+
+def bench_sampler(n_ticks: int = N_TICKS) -> Dict[str, Any]:
+    """
+    Compare the legacy psutil path with `MetricSampler` (procfs and fallback),
+    plus the cost of collecting every optional metric group.
+
+    Args:
+        n_ticks (int): Number of samples taken per variant.
+
+    Returns:
+        Dict[str, Any]: Per-variant cost per tick and the largest absolute
+        difference between procfs and psutil RAM/disk ratios.
+    """
+    results = {"legacy_psutil": _per_tick_us(legacy_sample, n_ticks)}
+
+    fallback = MetricSampler(use_procfs=False)
+    results["sampler_psutil"] = _per_tick_us(fallback.sample, n_ticks)
+
+    sampler = MetricSampler()
+    if sampler.use_procfs:
+        results["sampler_procfs"] = _per_tick_us(sampler.sample, n_ticks)
+
+        procfs = list(sampler.sample())
+        reference = legacy_sample()
+        results["max_abs_diff_ram_disk"] = round(
+            max(abs(procfs[i] - reference[i]) for i in (1, 2)), 6
+        )
+    sampler.close()
+
+    extended = MetricSampler(groups=METRIC_GROUPS)
+    results["sampler_all_groups"] = _per_tick_us(extended.sample, n_ticks)
+    extended.close()
+
+    return results
+
+
+# =========================
+# MAIN
+# =========================
+if __name__ == "__main__":
+    results = bench_sampler()
+
+    for name, r in results.items():
+        if isinstance(r, dict):
+            print(f"{name:<16} wall={r['wall_us']:>8.2f} µs/tick  cpu={r['cpu_us']:>8.2f} µs/tick")
+        else:
+            print(f"{name:<16} {r}")
@@ -0,0 +1,94 @@
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Any
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+from training import data_ingestion, data_preprocessing
+from monitoring.scorer import compile_pipeline
+
+# =========================
+# CONFIGURATION
+# =========================
+N_SAMPLES = 200  # single-sample calls timed per model family
+
+MODEL_FAMILIES = {
+    "logistic_regression": LogisticRegression(max_iter=1000, solver="liblinear"),
+    "random_forest": RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1),
+    "gradient_boosting": GradientBoostingClassifier(n_estimators=100, random_state=42),
+}
+
+
+# =========================
+# FUNCTION DEFINITIONS
+# =========================
+def _per_sample_us(fn, rows: np.ndarray) -> float:
+    """
+    Time `fn(row)` over every row and return the mean latency in microseconds.
+    """
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def bench_scorer(n_samples: int = N_SAMPLES) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare per-sample latency of the sklearn pipeline against the
+    compiled scorer for each model family.
+
+    Args:
+        n_samples (int): Number of single-sample predictions to time.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per-family latencies (µs), speedup and
+        whether the predictions matched on the whole dataset.
+    """
+    df = data_ingestion.load_data()
+    pipeline, X_train, y_train, _, _ = data_preprocessing.preprocess_data(df)
+    features = data_preprocessing.FEATURES
+    X_all = df[features].to_numpy(dtype=np.float64)
+    rows = X_all[:n_samples]
+
+    results = {}
+    for name, clf in MODEL_FAMILIES.items():
+        pipe = pipeline.set_params(clf=clf).fit(X_train, y_train)
+        preprocessor = pipe.named_steps["preprocess"]
+        model = pipe.named_steps["clf"]
+        scorer = compile_pipeline(pipe)
+
+        # Same per-tick path main.monitor_system used before compilation
+        def pipeline_predict(row):
+            X_raw = pd.DataFrame([row], columns=features)
+            return int(model.predict(preprocessor.transform(X_raw))[0])
+
+        expected = pipe.predict(pd.DataFrame(X_all, columns=features))
+        identical = bool(np.array_equal(expected, scorer.predict(X_all)))
+
+        pipeline_us = _per_sample_us(pipeline_predict, rows)
+        compiled_us = _per_sample_us(scorer.predict_one, rows)
+
+        results[name] = {
+            "scorer": type(scorer).__name__,
+            "pipeline_us": round(pipeline_us, 2),
+            "compiled_us": round(compiled_us, 2),
+            "speedup": round(pipeline_us / compiled_us, 1),
+            "identical_predictions": identical,
+        }
+
+    return results
+
+
+# =========================
+# MAIN
+# =========================
+if __name__ == "__main__":
+    results = bench_scorer()
+
+    print(f"\n{'family':<22}{'scorer':<16}{'pipeline µs':>12}{'compiled µs':>13}{'speedup':>9}  identical")
+    for name, r in results.items():
+        print(
+            f"{name:<22}{r['scorer']:<16}{r['pipeline_us']:>12.1f}"
+            f"{r['compiled_us']:>13.1f}{r['speedup']:>8.1f}x  {r['identical_predictions']}"
+        )
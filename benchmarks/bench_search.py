@@ -0,0 +1,77 @@
+import os
+import time
+import pandas as pd
+from typing import Dict, Any
+from sklearn.model_selection import GridSearchCV
+from sklearn.metrics import f1_score
+
+from training import data_ingestion, data_preprocessing
+from training.model_training_and_evaluation import PARAM_GRID
+from training.search import SuccessiveHalvingSearch
+
+# =========================
+# CONFIGURATION
+# =========================
+N_JOBS = -1
+
+
+# =========================
+# FUNCTION DEFINITIONS
+# =========================
+def _describe(params: Dict[str, Any]) -> str:
+    clf = type(params["clf"]).__name__
+    rest = ", ".join(f"{k[5:]}={v}" for k, v in params.items() if k.startswith("clf__"))
+    return f"{clf}({rest})"
+
+
+def bench_search(df: pd.DataFrame = None, n_jobs: int = N_JOBS) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare exhaustive GridSearchCV with the cached successive-halving search.
+
+    Args:
+        df (pd.DataFrame, optional): Labelled data; defaults to `load_data()`.
+        n_jobs (int): Worker budget for both searches (-1 = all cores).
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per strategy: wall time, number of fits,
+        best CV F1, held-out test F1 and the chosen model.
+    """
+    if df is None:
+        df = data_ingestion.load_data()
+    pipeline, X_train, y_train, X_test, y_test = data_preprocessing.preprocess_data(df)
+
+    results = {}
+
+    start = time.perf_counter()
+    grid = GridSearchCV(pipeline, PARAM_GRID, scoring="f1", cv=5, n_jobs=n_jobs).fit(X_train, y_train)
+    results["grid"] = {
+        "seconds": round(time.perf_counter() - start, 2),
+        "fits": len(grid.cv_results_["params"]) * 5,
+        "best_cv_f1": round(float(grid.best_score_), 4),
+        "test_f1": round(float(f1_score(y_test, grid.best_estimator_.predict(X_test))), 4),
+        "best": _describe(grid.best_params_),
+    }
+
+    start = time.perf_counter()
+    workers = os.cpu_count() if n_jobs == -1 else n_jobs
+    halving = SuccessiveHalvingSearch(pipeline, PARAM_GRID, n_jobs=workers).fit(X_train, y_train)
+    results["halving"] = {
+        "seconds": round(time.perf_counter() - start, 2),
+        "fits": len(halving.cv_results_) * 5,
+        "best_cv_f1": round(halving.best_score_, 4),
+        "test_f1": round(float(f1_score(y_test, halving.best_estimator_.predict(X_test))), 4),
+        "best": _describe(halving.best_params_),
+    }
+
+    return results
+
+
+# =========================
+# MAIN
+# =========================
+if __name__ == "__main__":
+    results = bench_search()
+
+    print(f"\n{'strategy':<10}{'seconds':>9}{'fits':>7}{'cv F1':>9}{'test F1':>9}  best")
+    for name, r in results.items():
+        print(f"{name:<10}{r['seconds']:>9.2f}{r['fits']:>7}{r['best_cv_f1']:>9.4f}{r['test_f1']:>9.4f}  {r['best']}")
@@ -0,0 +1,97 @@
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Dict, Any
+
+from storage import metric_store
+from benchmarks.synthetic import COLUMNS, synthetic_metrics
+
+# =========================
+# CONFIGURATION
+# =========================
+N_ROWS = 30 * 86_400   # One month of 1 Hz samples
+
+
+# =========================
+# FUNCTION DEFINITIONS
+# =========================
+def bench_storage(n_rows: int = N_ROWS) -> Dict[str, Any]:
+    """
+    Compare CSV and binary store on disk size and ingestion time.
+
+    Args:
+        n_rows (int): Number of 1 Hz rows to generate.
+
+    Returns:
+        Dict[str, Any]: Sizes (bytes), load times (s) and consistency flags.
+    """
+    df = synthetic_metrics(n_rows)
+    workdir = tempfile.mkdtemp(prefix="dcml_storage_")
+    try:
+        csv_path = os.path.join(workdir, "metrics.csv")
+        bin_dir = os.path.join(workdir, "metrics_bin")
+
+        df.to_csv(csv_path, index=False)
+        with metric_store.BinaryLogSink(bin_dir, COLUMNS, fsync_policy="close") as sink:
+            records = np.zeros(len(df), dtype=sink.dtype)
+            for name in sink.dtype.names:
+                records[name] = df[name].to_numpy()
+            sink.write_records(records)
+
+        start = time.perf_counter()
+        from_csv = pd.read_csv(csv_path)
+        csv_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        from_bin = metric_store.read_frame(bin_dir)
+        bin_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        records = metric_store.load_records(bin_dir)
+        mmap_sec = time.perf_counter() - start
+
+        features = ["cpu_ratio", "ram_ratio", "disk_ratio"]
+        csv_bytes = os.path.getsize(csv_path)
+        bin_bytes = sum(os.path.getsize(p) for p in metric_store.list_chunks(bin_dir))
+
+        result = {
+            "rows": n_rows,
+            "chunks": len(metric_store.list_chunks(bin_dir)),
+            "csv_bytes": csv_bytes,
+            "bin_bytes": bin_bytes,
+            "size_ratio": round(bin_bytes / csv_bytes, 3),
+            "csv_read_sec": round(csv_sec, 3),
+            "bin_read_frame_sec": round(bin_sec, 3),
+            "bin_load_records_sec": round(mmap_sec, 4),
+            "identical": bool(
+                len(records) == n_rows
+                and np.array_equal(from_csv[features].to_numpy(), from_bin[features].to_numpy())
+            ),
+        }
+
+        # Crash mid-write: a torn record at the end must not misalign later appends
+        with open(metric_store.list_chunks(bin_dir)[-1], "ab") as f:
+            f.write(b"\x01\x02\x03")
+        tail = records[-3:].copy()
+        tail[metric_store.TIMESTAMP_COLUMN] += 1_000
+        with metric_store.BinaryLogSink(bin_dir, COLUMNS, fsync_policy="close") as sink:
+            sink.write_records(tail)
+        reopened = metric_store.load_records(bin_dir)
+        result["torn_tail_recovered"] = bool(
+            len(reopened) == n_rows + len(tail)
+            and np.array_equal(reopened[-len(tail):], tail)
+        )
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# =========================
+# MAIN
+# =========================
+if __name__ == "__main__":
+    for key, value in bench_storage().items():
+        print(f"{key:<22}{value}")
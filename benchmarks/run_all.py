@@ -0,0 +1,396 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from from_root import from_root
+
+from benchmarks.synthetic import COLUMNS, FEATURES, synthetic_features, synthetic_metrics, write_csv
+
+# =========================
+# CONFIGURATION
+# =========================
+RESULTS_DIR = os.path.join(from_root(), "output", "benchmarks")
+
+SECTIONS = ("sampler", "scoring", "logging", "load_data", "retrain")
+SEED = 42
+
+SAMPLER_TICKS = 2_000
+SCORING_CALLS = 2_000
+LOG_ROWS = 200_000
+LOAD_SIZES = [10_000, 100_000, 1_000_000]
+RETRAIN_SIZES = [5_000, 20_000, 50_000]
+RETRAIN_SEARCH = "halving"
+TRAIN_ROWS = 20_000            # Synthetic rows the scoring benchmark trains on
+
+QUICK = {                      # `--quick`: smaller sizes for a fast smoke run
+    "sampler_ticks": 500,
+    "scoring_calls": 500,
+    "log_rows": 20_000,
+    "load_sizes": [10_000, 100_000],
+    "retrain_sizes": [2_000, 5_000],
+}
+
+TOLERANCE = 0.25               # `--compare`: allowed relative slowdown before it counts as a regression
+UNCOMPARED_STATS = ("max_", "mean_")  # Latency stats that one scheduler hiccup moves; p50/p99 are compared instead
+
+
+# =========================
+# MEASUREMENT HELPERS
+# =========================
+def _latency_us(fn: Callable, args: List, warmup: int = 20) -> Dict[str, float]:
+    """
+    Call `fn(arg)` once per item in `args`, timing each call separately.
+
+    Returns:
+        Dict[str, float]: Mean, p50, p99 and max latency in microseconds.
+    """
+    for arg in args[:warmup]:
+        fn(arg)
+    samples = np.empty(len(args))
+    clock = time.perf_counter_ns
+    for i, arg in enumerate(args):
+        start = clock()
+        fn(arg)
+        samples[i] = clock() - start
+    samples /= 1e3
+    return {
+        "mean_us": round(float(samples.mean()), 2),
+        "p50_us": round(float(np.percentile(samples, 50)), 2),
+        "p99_us": round(float(np.percentile(samples, 99)), 2),
+        "max_us": round(float(samples.max()), 2),
+    }
+
+
+@contextlib.contextmanager
+def _quiet():
+    """
+    Swallow the statistics `load_data` and the training code print.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _timed(fn: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    with _quiet():
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+# =========================
+# BENCHMARKS
+# =========================
+def bench_sampler(n_ticks: int = SAMPLER_TICKS) -> Dict[str, Any]:
+    """
+    Per-tick collection cost of `MetricSampler` (core metrics and all
+    optional groups, procfs and psutil paths).
+    """
+    from monitoring.sampler import MetricSampler, METRIC_GROUPS
+
+    results = {}
+    variants = {
+        "procfs_core": dict(),
+        "psutil_core": dict(use_procfs=False),
+        "procfs_all_groups": dict(groups=METRIC_GROUPS),
+    }
+    for name, options in variants.items():
+        sampler = MetricSampler(**options)
+        if name.startswith("procfs") and not sampler.use_procfs:
+            sampler.close()
+            continue
+        results[name] = _latency_us(lambda _: sampler.sample(), [None] * n_ticks)
+        sampler.close()
+    return results
+
+
+def bench_scoring(n_calls: int = SCORING_CALLS, train_rows: int = TRAIN_ROWS) -> Dict[str, Any]:
+    """
+    Single-sample scoring latency per model family.
+
+    The supervised families are trained on labelled synthetic data and
+    compiled like `main.py` does; the unsupervised detectors score the
+    same rows. The compiled pipeline is what `main.py` calls per tick, so
+    its latency is what bounds the sampling rate.
+    """
+    from training import data_ingestion, data_preprocessing
+    from monitoring.scorer import compile_pipeline
+    from monitoring.streaming_detector import HalfSpaceTrees, RobustZScoreDetector
+    from sklearn.base import clone
+    from sklearn.pipeline import Pipeline
+    from sklearn.ensemble import IsolationForest
+    from benchmarks.bench_scorer import MODEL_FAMILIES
+
+    df = synthetic_metrics(train_rows, seed=SEED, bursts=True)
+    with _quiet():
+        df = data_ingestion.apply_labels(df, data_ingestion.compute_thresholds(df))
+        pipeline, X_train, y_train, _, _ = data_preprocessing.preprocess_data(df)
+
+    rows = list(synthetic_features(n_calls, seed=SEED + 1))
+    results = {}
+    for name, clf in MODEL_FAMILIES.items():
+        scorer = compile_pipeline(pipeline.set_params(clf=clf).fit(X_train, y_train))
+        results[name] = _latency_us(scorer.predict_one, rows)
+
+    iforest = Pipeline([("preprocess", clone(pipeline.named_steps["preprocess"])),
+                        ("clf", IsolationForest(n_estimators=100, random_state=SEED))])
+    results["iforest"] = _latency_us(compile_pipeline(iforest.fit(X_train)).predict_one, rows)
+
+    history = X_train.to_numpy(dtype=np.float64)
+    for detector in (HalfSpaceTrees(FEATURES), RobustZScoreDetector(FEATURES)):
+        detector.predict(history)  # past warm-up, so every timed call scores
+        results[detector.family] = _latency_us(detector.predict_one, rows)
+    return results
+
+
+def bench_logging(n_rows: int = LOG_ROWS) -> Dict[str, Any]:
+    """
+    Sustained write throughput of the CSV and binary log sinks.
+    """
+    from monitoring.log_sink import CsvLogSink
+    from storage.metric_store import BinaryLogSink
+
+    df = synthetic_metrics(n_rows, seed=SEED)
+    rows = list(df.itertuples(index=False, name=None))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        sinks = {
+            "csv": lambda: CsvLogSink(os.path.join(tmp, "metrics.csv"), COLUMNS, fsync_policy="never"),
+            "binary": lambda: BinaryLogSink(os.path.join(tmp, "store"), COLUMNS, fsync_policy="never"),
+        }
+        for name, make in sinks.items():
+            sink = make()
+            start = time.perf_counter()
+            for row in rows:
+                sink.write_row(row)
+            sink.close()
+            elapsed = time.perf_counter() - start
+            results[name] = {
+                "rows_per_sec": round(n_rows / elapsed),
+                "per_row_us": round(elapsed / n_rows * 1e6, 3),
+            }
+    return results
+
+
+def bench_load_data(sizes: List[int] = LOAD_SIZES) -> Dict[str, Any]:
+    """
+    `load_data` wall time (read, thresholds, labels) versus dataset size.
+    """
+    from training.data_ingestion import load_data
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            path = write_csv(os.path.join(tmp, f"metrics_{n_rows}.csv"), n_rows, seed=SEED)
+            _, elapsed = _timed(load_data, path)
+            results[f"rows_{n_rows}"] = {
+                "wall_sec": round(elapsed, 3),
+                "rows_per_sec": round(n_rows / elapsed),
+            }
+    return results
+
+
+def bench_retrain(sizes: List[int] = RETRAIN_SIZES, search: str = RETRAIN_SEARCH) -> Dict[str, Any]:
+    """
+    End-to-end retrain wall time versus rows, split into load, preprocess
+    and search + evaluation. Models are trained but never saved.
+    """
+    from training.data_ingestion import load_data
+    from training.data_preprocessing import preprocess_data
+    from training.model_training_and_evaluation import model_training_and_eval
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            path = write_csv(os.path.join(tmp, f"metrics_{n_rows}.csv"), n_rows, seed=SEED)
+            df, load_sec = _timed(load_data, path)
+            split, preprocess_sec = _timed(preprocess_data, df)
+            _, train_sec = _timed(model_training_and_eval, *split, search=search)
+            results[f"rows_{n_rows}"] = {
+                "load_sec": round(load_sec, 3),
+                "preprocess_sec": round(preprocess_sec, 3),
+                "train_sec": round(train_sec, 3),
+                "total_sec": round(load_sec + preprocess_sec + train_sec, 3),
+            }
+    return results
+
+
+# =========================
+# RESULTS
+# =========================
+def environment() -> Dict[str, Any]:
+    """
+    Where the numbers came from: commit, interpreter, libraries and machine.
+    """
+    import pandas
+    import sklearn
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=from_root(),
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp_utc": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """
+    Flatten nested results into "section.case.metric" -> number.
+    """
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def _higher_is_better(metric: str) -> Optional[bool]:
+    if metric.rsplit(".", 1)[-1].startswith(UNCOMPARED_STATS):
+        return None
+    if metric.endswith("_per_sec"):
+        return True
+    if metric.endswith(("_us", "_ms", "_sec")):
+        return False
+    return None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    Compare two result files metric by metric.
+
+    Only metrics present in both runs are compared. Throughputs
+    (`*_per_sec`) must not drop, and times (`*_us`, `*_ms`, `*_sec`) must
+    not grow, by more than `tolerance` (relative). Latency distributions
+    are judged on their p50 and p99 only: the max and the mean follow
+    single outliers and would flag noise as regressions.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per compared metric with the
+        baseline, current value, relative change and whether it regressed.
+    """
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        higher = _higher_is_better(key)
+        if higher is None or old[key] <= 0:
+            continue
+        change = (new[key] - old[key]) / old[key]
+        worse = -change if higher else change
+        rows.append({
+            "metric": key,
+            "baseline": old[key],
+            "current": new[key],
+            "change": round(change, 4),
+            "regression": worse > tolerance,
+        })
+    return rows
+
+
+def run(sections=SECTIONS, quick: bool = False) -> Dict[str, Any]:
+    """
+    Run the selected benchmark sections and return the JSON-ready report.
+    """
+    size = QUICK if quick else {
+        "sampler_ticks": SAMPLER_TICKS,
+        "scoring_calls": SCORING_CALLS,
+        "log_rows": LOG_ROWS,
+        "load_sizes": LOAD_SIZES,
+        "retrain_sizes": RETRAIN_SIZES,
+    }
+    benches = {
+        "sampler": lambda: bench_sampler(size["sampler_ticks"]),
+        "scoring": lambda: bench_scoring(size["scoring_calls"]),
+        "logging": lambda: bench_logging(size["log_rows"]),
+        "load_data": lambda: bench_load_data(size["load_sizes"]),
+        "retrain": lambda: bench_retrain(size["retrain_sizes"]),
+    }
+
+    results = {}
+    for name in sections:
+        print(f"[bench] {name} ...", flush=True)
+        start = time.perf_counter()
+        results[name] = benches[name]()
+        print(f"[bench] {name} done in {time.perf_counter() - start:.1f} s", flush=True)
+
+    return {
+        "environment": environment(),
+        "config": dict(size, seed=SEED, retrain_search=RETRAIN_SEARCH, quick=quick),
+        "results": results,
+    }
+
+
+# =========================
+# MAIN
+# =========================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and save the results as JSON.")
+    parser.add_argument("--only", default=",".join(SECTIONS),
+                        help=f"Comma-separated sections to run (default: all of {', '.join(SECTIONS)}).")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes for a fast smoke run.")
+    parser.add_argument("--out", default=None,
+                        help="Output JSON file (default: output/benchmarks/bench_<UTC time>.json).")
+    parser.add_argument("--compare", default=None, metavar="BASELINE_JSON",
+                        help="Compare against an earlier result file; exit 1 on regression.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Allowed relative slowdown for --compare (default: %(default)s).")
+    args = parser.parse_args(argv)
+
+    sections = [s.strip() for s in args.only.split(",") if s.strip()]
+    unknown = [s for s in sections if s not in SECTIONS]
+    if unknown:
+        parser.error(f"Unknown section(s) {unknown}. Choose from {list(SECTIONS)}.")
+
+    report = run(sections, quick=args.quick)
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"bench_{report['environment']['timestamp_utc'].replace(':', '').replace('-', '')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print()
+    for key, value in flatten(report["results"]).items():
+        print(f"{key:<55} {value:>14,.2f}")
+    print(f"\nResults saved to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, report, args.tolerance)
+        regressions = [r for r in rows if r["regression"]]
+
+        print(f"\nComparison with {args.compare} (commit {baseline['environment'].get('commit')}, "
+              f"tolerance {args.tolerance:.0%}):")
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else ""
+            print(f"{r['metric']:<55} {r['baseline']:>12,.2f} -> {r['current']:>12,.2f} "
+                  f"({r['change']:+.1%}) {flag}")
+        print(f"\n{len(regressions)} regression(s) in {len(rows)} compared metrics.")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
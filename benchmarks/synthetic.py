@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from typing import List
+
+# =========================
+# CONFIGURATION
+# =========================
+START_MS = 1_767_225_600_000  # 2026-01-01T00:00:00Z
+COLUMNS = ["timestamp_ms", "datetime_utc", "cpu_ratio", "ram_ratio", "disk_ratio"]
+FEATURES = ["cpu_ratio", "ram_ratio", "disk_ratio"]
+
+BURST_RATE = 0.002        # Probability that a stress burst starts at a given sample
+BURST_SAMPLES = (5, 60)   # Burst length range
+
+
+# =========================
+# GENERATORS
+# =========================
+def synthetic_metrics(n_rows: int, seed: int = 42, rate_hz: float = 1.0, bursts: bool = False) -> pd.DataFrame:
+    """
+    Generate reproducible metrics in the metric logger's CSV schema.
+
+    CPU follows a Beta(2, 8) load, RAM a slow daily-ish wave with noise and
+    disk a slow fill, all rounded to 4 decimals like the logger. With
+    `bursts`, short CPU/RAM stress episodes (like `tests/cpu_test.py` and
+    `ram_test.py`) are injected so quantile labelling finds real outliers.
+
+    Args:
+        n_rows (int): Number of samples.
+        seed (int): Random seed; the same seed always gives the same frame.
+        rate_hz (float): Sampling rate used for the timestamps.
+        bursts (bool): Inject stress episodes.
+
+    Returns:
+        pd.DataFrame: Columns `COLUMNS`.
+    """
+    rng = np.random.default_rng(seed)
+    ts = START_MS + np.round(np.arange(n_rows) * (1000 / rate_hz)).astype(np.int64)
+    t = np.arange(n_rows) / rate_hz
+
+    cpu = rng.beta(2, 8, n_rows)
+    ram = 0.5 + 0.1 * np.sin(t / 3600) + rng.normal(0, 0.01, n_rows)
+    disk = np.linspace(0.60, 0.62, n_rows)
+
+    if bursts:
+        starts = np.flatnonzero(rng.random(n_rows) < BURST_RATE)
+        for start in starts:
+            end = min(n_rows, start + int(rng.integers(*BURST_SAMPLES)))
+            cpu[start:end] = rng.uniform(0.85, 1.0, end - start)
+            ram[start:end] += rng.uniform(0.15, 0.35)
+
+    return pd.DataFrame({
+        "timestamp_ms": ts,
+        "datetime_utc": pd.to_datetime(ts, unit="ms").strftime("%Y-%m-%dT%H:%M:%S.%f"),
+        "cpu_ratio": np.round(np.clip(cpu, 0, 1), 4),
+        "ram_ratio": np.round(np.clip(ram, 0, 1), 4),
+        "disk_ratio": np.round(disk, 4),
+    })
+
+
+def synthetic_features(n_rows: int, seed: int = 42, features: List[str] = FEATURES) -> np.ndarray:
+    """
+    Random feature rows in [0, 1] for latency measurements, shape (n_rows, n_features).
+    """
+    return np.round(np.random.default_rng(seed).random((n_rows, len(features))), 4)
+
+
+def write_csv(path: str, n_rows: int, seed: int = 42, bursts: bool = True) -> str:
+    """
+    Write a synthetic training CSV (`load_data`-compatible) and return its path.
+    """
+    synthetic_metrics(n_rows, seed=seed, bursts=bursts).to_csv(path, index=False)
+    return path
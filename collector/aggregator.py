@@ -0,0 +1,247 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from from_root import from_root
+
+from collector import protocol
+from storage.metric_store import BinaryLogSink
+
+# =========================
+# CONFIGURATION
+# =========================
+OUT_DIR = os.path.join(from_root(), "notebooks", "Data", "fleet")
+
+QUEUE_FRAMES = 1_024         # Frames buffered between connections and the disk writer
+MAX_DRAIN_FRAMES = 256       # Frames written per disk batch
+REPORT_INTERVAL_SEC = 60     # Ingestion summary period
+FSYNC_POLICY = "flush"       # Per-host sink policy: "never", "flush" or "close"
+
+
+# =========================
+# AGGREGATOR
+# =========================
+class Aggregator:
+    """
+    Asyncio service that collects metric frames from many agents.
+
+    Each connection is read by its own coroutine. Decoded frames go into a
+    bounded queue that a single writer task drains in batches. The writer
+    groups the frames by host and appends them to per-host binary stores
+    (`out_dir/<host>/metrics_YYYYMMDD.bin`) on a worker thread.
+
+    Backpressure: when the disk writer falls behind, the queue fills and
+    `queue.put` suspends the connection coroutines. They stop reading their
+    sockets and delay the acknowledgement, so agents block and spool
+    locally instead of the aggregator buffering without limit. A frame is
+    acknowledged once it is queued.
+
+    Each host's partition is a normal binary store, so
+    `retrain.py --data out_dir/<host>` can read it directly.
+
+    Args:
+        out_dir (str): Root directory for per-host partitions.
+        queue_frames (int): Bound of the ingestion queue.
+        fsync_policy (str): fsync policy of the per-host sinks.
+        verbose (bool): Print connection events and periodic summaries.
+    """
+
+    def __init__(self,
+                 out_dir: str = OUT_DIR,
+                 queue_frames: int = QUEUE_FRAMES,
+                 fsync_policy: str = FSYNC_POLICY,
+                 verbose: bool = True):
+        self.out_dir = out_dir
+        self.queue_frames = queue_frames
+        self.fsync_policy = fsync_policy
+        self.verbose = verbose
+
+        self.frames = 0
+        self.records = 0
+        self.records_written = 0
+        self.rejected_frames = 0
+        self.connections = 0
+
+        self.hosts = set()
+        self._sinks: Dict[str, BinaryLogSink] = {}
+        self._dtypes: Dict[bytes, np.dtype] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._started = time.monotonic()
+
+    # ---- connections ----
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        peer = writer.get_extra_info("peername") or "local"
+        try:
+            while True:
+                try:
+                    host, records = await protocol.read_frame(reader, self._dtypes)
+                except asyncio.IncompleteReadError:
+                    break
+
+                # Suspends (and stops reading this socket) while the queue is full
+                await self._queue.put((protocol.sanitize_host(host), records))
+                self.frames += 1
+                self.records += len(records)
+
+                writer.write(protocol.ACK.pack(len(records)))
+                await writer.drain()
+        except (ValueError, ConnectionError) as e:
+            if self.verbose:
+                print(f"[aggregator] Dropping connection from {peer}: {e}")
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    # ---- disk writer ----
+    def _sink(self, host: str, records: np.ndarray) -> BinaryLogSink:
+        sink = self._sinks.get(host)
+        if sink is None:
+            sink = BinaryLogSink(
+                os.path.join(self.out_dir, host),
+                records.dtype.names,
+                fsync_policy=self.fsync_policy
+            )
+            self._sinks[host] = sink
+            self.hosts.add(host)
+        return sink
+
+    def _write(self, batch: List[Tuple[str, np.ndarray]]) -> int:
+        by_host: Dict[str, List[np.ndarray]] = {}
+        for host, records in batch:
+            by_host.setdefault(host, []).append(records)
+
+        written = 0
+        for host, parts in by_host.items():
+            # A host that reconnects with another schema (e.g. different --metrics)
+            # sends frames that cannot be appended to its store: drop just those
+            sink = self._sinks.get(host)
+            dtype = sink.dtype if sink is not None else parts[0].dtype
+            matching = [p for p in parts if p.dtype == dtype]
+            mismatched = [p for p in parts if p.dtype != dtype]
+            if mismatched:
+                self._reject(host, len(mismatched), sum(map(len, mismatched)),
+                             f"columns {mismatched[0].dtype.names} differ from {dtype.names}")
+            if not matching:
+                continue
+
+            records = np.concatenate(matching) if len(matching) > 1 else matching[0]
+            try:
+                self._sink(host, records).write_records(records)
+                written += len(records)
+            except Exception as e:  # Never stop the writer: every other host would block behind it
+                self._reject(host, len(matching), len(records), e)
+        return written
+
+    def _reject(self, host: str, frames: int, records: int, reason) -> None:
+        self.rejected_frames += frames
+        print(f"[aggregator] Rejected {records} records from {host}: {reason}")
+
+    async def _writer_loop(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < MAX_DRAIN_FRAMES and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            self.records_written += await asyncio.to_thread(self._write, batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _report_loop(self) -> None:
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL_SEC)
+            print(f"[aggregator] {self.summary()}")
+
+    # ---- lifecycle ----
+    async def serve(self, address: str, ready: Optional[asyncio.Event] = None) -> None:
+        """
+        Listen on `address` until cancelled, then flush everything queued.
+
+        Args:
+            address (str): "unix:/path/to.sock" or "host:port".
+            ready (asyncio.Event, optional): Set once the server is listening.
+        """
+        self._queue = asyncio.Queue(maxsize=self.queue_frames)
+        self._started = time.monotonic()
+
+        kind, target = protocol.parse_address(address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.remove(target)
+            server = await asyncio.start_unix_server(self._handle, path=target)
+        else:
+            server = await asyncio.start_server(self._handle, host=target[0], port=target[1])
+
+        tasks = [asyncio.create_task(self._writer_loop())]
+        if self.verbose:
+            tasks.append(asyncio.create_task(self._report_loop()))
+            print(f"[aggregator] Listening on {address}, writing to {self.out_dir}")
+        if ready is not None:
+            ready.set()
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            server.close()
+            await self._queue.join()
+            for task in tasks:
+                task.cancel()
+            self.close()
+
+    def close(self) -> None:
+        for sink in self._sinks.values():
+            sink.close()
+        self._sinks.clear()
+
+    def summary(self) -> str:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        backlog = self._queue.qsize() if self._queue is not None else 0
+        return (
+            f"hosts={len(self.hosts)} | connections={self.connections} | frames={self.frames} | "
+            f"samples={self.records} ({self.records / elapsed:.0f}/s) | written={self.records_written} | "
+            f"backlog={backlog} | rejected={self.rejected_frames}"
+        )
+
+
+# =========================
+# MAIN
+# =========================
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Parse command-line options for the aggregator.
+    """
+    parser = argparse.ArgumentParser(description="Collect metrics from many metric_logger agents.")
+    parser.add_argument(
+        "--listen",
+        default=f"127.0.0.1:{protocol.DEFAULT_PORT}",
+        help="Address to listen on: host:port or unix:/path (default: %(default)s). "
+             "Ingestion is unauthenticated: only listen on 0.0.0.0 inside a trusted network."
+    )
+    parser.add_argument(
+        "--out",
+        default=OUT_DIR,
+        help="Root directory of the per-host partitions (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--fsync",
+        choices=["never", "flush", "close"],
+        default=FSYNC_POLICY,
+        help="fsync policy of the per-host stores (default: %(default)s)."
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    aggregator = Aggregator(args.out, fsync_policy=args.fsync)
+    try:
+        asyncio.run(aggregator.serve(args.listen))
+    except KeyboardInterrupt:
+        print("\nAggregator stopped by user.")
+    finally:
+        print(f"[aggregator] {aggregator.summary()}")
@@ -0,0 +1,206 @@
+import struct
+import asyncio
+import socket
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from storage.metric_store import record_dtype
+
+# =========================
+# CONFIGURATION
+# =========================
+MAGIC = b"DCMF"
+VERSION = 1
+
+# magic, version, host length, schema length, record count
+FRAME_HEADER = struct.Struct("<4sBHHI")
+# records accepted by the aggregator / verdicts that follow (inference server)
+ACK = struct.Struct("<I")
+
+MAX_RECORDS = 1_000_000      # Upper bound per frame, guards the aggregator's memory
+DEFAULT_PORT = 9900
+
+Address = Union[str, Tuple[str, int]]
+
+
+# =========================
+# ADDRESSES
+# =========================
+def parse_address(address: str) -> Tuple[str, Address]:
+    """
+    Parse an aggregator address.
+
+    Args:
+        address (str): "unix:/path/to.sock", "host:port" or "host"
+            (default port).
+
+    Returns:
+        Tuple[str, Address]: ("unix", path) or ("tcp", (host, port)).
+    """
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    if not host:
+        return "tcp", (address, DEFAULT_PORT)
+    return "tcp", (host, int(port))
+
+
+def connect(address: str, timeout: float) -> socket.socket:
+    """
+    Open a blocking client socket to an aggregator.
+    """
+    kind, target = parse_address(address)
+    if kind == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(target)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    sock = socket.create_connection(target, timeout=timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+# =========================
+# FRAMES
+# =========================
+def encode_frame(host: str, records: np.ndarray) -> bytes:
+    """
+    Encode a batch of metric records for one host.
+
+    Layout (little-endian): 13-byte header, UTF-8 host name, comma-separated
+    field names, then the raw fixed-width records in the binary store's
+    layout (`storage.metric_store.record_dtype`), so the aggregator can
+    append them to disk without re-encoding.
+
+    Args:
+        host (str): Sending host name.
+        records (np.ndarray): Structured records built with `record_dtype`.
+
+    Returns:
+        bytes: One frame.
+    """
+    host_bytes = host.encode()
+    schema = ",".join(records.dtype.names).encode()
+    header = FRAME_HEADER.pack(MAGIC, VERSION, len(host_bytes), len(schema), len(records))
+    return header + host_bytes + schema + records.tobytes()
+
+
+def decode_header(data: bytes) -> Tuple[int, int, int]:
+    """
+    Validate a frame header.
+
+    Returns:
+        Tuple[int, int, int]: Host length, schema length and record count.
+    """
+    magic, version, host_len, schema_len, n_records = FRAME_HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("Bad frame magic.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported frame version {version}.")
+    if n_records > MAX_RECORDS:
+        raise ValueError(f"Frame too large: {n_records} records.")
+    return host_len, schema_len, n_records
+
+
+def decode_frame(frame: bytes, dtypes: Dict[bytes, np.dtype] = None) -> Tuple[str, np.ndarray]:
+    """
+    Decode a complete frame (used by tools and for spooled frames).
+
+    Args:
+        frame (bytes): Frame produced by `encode_frame`.
+        dtypes (Dict[bytes, np.dtype], optional): Cache of parsed schemas.
+
+    Returns:
+        Tuple[str, np.ndarray]: Host name and records.
+    """
+    host_len, schema_len, n_records = decode_header(frame[:FRAME_HEADER.size])
+    pos = FRAME_HEADER.size
+    host = frame[pos:pos + host_len].decode()
+    pos += host_len
+    dtype = schema_dtype(frame[pos:pos + schema_len], dtypes)
+    pos += schema_len
+    records = np.frombuffer(frame, dtype=dtype, count=n_records, offset=pos)
+    return host, records
+
+
+def schema_dtype(schema: bytes, dtypes: Dict[bytes, np.dtype] = None) -> np.dtype:
+    """
+    Record dtype for a frame's schema bytes, cached across frames.
+    """
+    if dtypes is not None and schema in dtypes:
+        return dtypes[schema]
+    dtype = record_dtype(schema.decode().split(","))
+    if dtypes is not None:
+        dtypes[schema] = dtype
+    return dtype
+
+
+async def read_frame(reader: asyncio.StreamReader,
+                     dtypes: Dict[bytes, np.dtype]) -> Tuple[str, np.ndarray]:
+    """
+    Read one frame from an asyncio stream.
+
+    Raises:
+        asyncio.IncompleteReadError: The peer closed the connection.
+        ValueError: The frame is malformed.
+    """
+    host_len, schema_len, n_records = decode_header(await reader.readexactly(FRAME_HEADER.size))
+    meta = await reader.readexactly(host_len + schema_len)
+    host = meta[:host_len].decode()
+    dtype = schema_dtype(meta[host_len:], dtypes)
+    payload = await reader.readexactly(n_records * dtype.itemsize)
+    return host, np.frombuffer(payload, dtype=dtype)
+
+
+def send_frame(sock: socket.socket, frame: bytes) -> int:
+    """
+    Send one frame and wait for the aggregator's acknowledgement.
+
+    Returns:
+        int: Number of records the aggregator accepted.
+    """
+    sock.sendall(frame)
+    return ACK.unpack(_recv_exactly(sock, ACK.size))[0]
+
+
+def _recv_exactly(sock: socket.socket, n: int) -> bytes:
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("Peer closed the connection mid-message.")
+        data += chunk
+    return bytes(data)
+
+
+def encode_verdicts(predictions: np.ndarray) -> bytes:
+    """
+    Encode one verdict byte per sample, prefixed with the sample count.
+    """
+    return ACK.pack(len(predictions)) + np.asarray(predictions, dtype=np.uint8).tobytes()
+
+
+def request_verdicts(sock: socket.socket, frame: bytes) -> np.ndarray:
+    """
+    Send a frame of samples to an inference server and wait for the verdicts.
+
+    Returns:
+        np.ndarray: One uint8 label per sample, in frame order.
+    """
+    sock.sendall(frame)
+    (n,) = ACK.unpack(_recv_exactly(sock, ACK.size))
+    return np.frombuffer(_recv_exactly(sock, n), dtype=np.uint8)
+
+
+def sanitize_host(host: str) -> str:
+    """
+    Make a host name safe to use as a partition directory name.
+    """
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in host).strip(".")
+    return safe or "unknown"
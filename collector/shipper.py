@@ -0,0 +1,250 @@
+import os
+import time
+import atexit
+import socket
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from collector import protocol
+from storage.metric_store import SKIPPED_COLUMNS, record_dtype
+
+# =========================
+# CONFIGURATION
+# =========================
+FLUSH_ROWS = 60              # Rows per frame
+FLUSH_INTERVAL_SEC = 10.0    # Maximum age of buffered rows
+CONNECT_TIMEOUT_SEC = 1.0    # Connect / acknowledgement timeout
+RETRY_SEC = 5.0              # Minimum time between reconnect attempts
+SPOOL_MAX_BYTES = 64 << 20   # Local spool bound; the oldest frames are dropped beyond it
+REPLAY_FRAMES = 8            # Spooled frames replayed per flush after a reconnect
+SPOOL_SUFFIX = ".frame"
+
+
+# =========================
+# SPOOL
+# =========================
+class FrameSpool:
+    """
+    Bounded on-disk FIFO of encoded frames, one file per frame.
+
+    Files are named by a zero-padded sequence number and written through a
+    temp file plus `os.replace`, so a crash never leaves a torn frame. When
+    the spool exceeds `max_bytes` the oldest frames are deleted (and
+    counted) to make room for new ones.
+
+    Args:
+        path (str): Spool directory.
+        max_bytes (int): Size bound of the spool.
+    """
+
+    def __init__(self, path: str, max_bytes: int = SPOOL_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dropped = 0
+
+        os.makedirs(path, exist_ok=True)
+        self._files = self._scan()
+        self._bytes = sum(os.path.getsize(p) for p in self._files)
+        self._seq = int(os.path.basename(self._files[-1])[:-len(SPOOL_SUFFIX)]) + 1 if self._files else 0
+
+    def _scan(self) -> List[str]:
+        names = sorted(n for n in os.listdir(self.path) if n.endswith(SPOOL_SUFFIX))
+        return [os.path.join(self.path, n) for n in names]
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def append(self, frame: bytes) -> None:
+        while self._files and self._bytes + len(frame) > self.max_bytes:
+            self._bytes -= os.path.getsize(self._files[0])
+            os.remove(self._files.pop(0))
+            self.dropped += 1
+
+        path = os.path.join(self.path, f"{self._seq:012d}{SPOOL_SUFFIX}")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(frame)
+        os.replace(tmp_path, path)
+
+        self._seq += 1
+        self._files.append(path)
+        self._bytes += len(frame)
+
+    def peek(self) -> bytes:
+        with open(self._files[0], "rb") as f:
+            return f.read()
+
+    def pop(self) -> None:
+        self._bytes -= os.path.getsize(self._files[0])
+        os.remove(self._files.pop(0))
+
+
+# =========================
+# SHIPPER SINK
+# =========================
+class ShipperSink:
+    """
+    Log sink that ships batched binary frames to an aggregator.
+
+    Has the same interface as `monitoring.log_sink.CsvLogSink` and
+    `storage.metric_store.BinaryLogSink`. Rows are buffered into a record
+    array. Every `flush_rows` rows (or `flush_interval_sec`) they are sent
+    as one frame, and the sink waits for the aggregator's acknowledgement.
+
+    If the aggregator is unreachable, or does not acknowledge within
+    `timeout` (backpressure), the frame goes to a bounded local spool and
+    reconnects are attempted at most every `retry_sec`, so the sampling
+    loop is never blocked for long. After reconnecting, spooled frames are
+    replayed oldest first before new ones, which keeps each host's data in
+    time order. At most `replay_frames` are replayed per flush (new frames
+    are spooled behind them meanwhile), so a large backlog is drained over
+    several flushes instead of stalling one tick. Delivery is at-least-once: a frame that timed out after
+    the aggregator queued it may arrive twice.
+
+    Args:
+        address (str): Aggregator address, "host:port" or "unix:/path".
+        columns (Sequence[str]): Logger columns, in the order rows are given.
+        spool_dir (str): Directory of the local spool.
+        host (str, optional): Name reported to the aggregator (default: hostname).
+        flush_rows (int): Rows per frame.
+        flush_interval_sec (float): Maximum age of buffered rows in seconds.
+        timeout (float): Connect / acknowledgement timeout in seconds.
+        retry_sec (float): Minimum delay between reconnect attempts.
+        spool_max_bytes (int): Size bound of the spool.
+        replay_frames (int): Spooled frames replayed per flush.
+    """
+
+    def __init__(self,
+                 address: str,
+                 columns: Sequence[str],
+                 spool_dir: str,
+                 host: Optional[str] = None,
+                 flush_rows: int = FLUSH_ROWS,
+                 flush_interval_sec: float = FLUSH_INTERVAL_SEC,
+                 timeout: float = CONNECT_TIMEOUT_SEC,
+                 retry_sec: float = RETRY_SEC,
+                 spool_max_bytes: int = SPOOL_MAX_BYTES,
+                 replay_frames: int = REPLAY_FRAMES):
+        self.address = address
+        self.columns = list(columns)
+        self.dtype = record_dtype(self.columns)
+        self.host = host or socket.gethostname()
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval_sec = flush_interval_sec
+        self.timeout = timeout
+        self.retry_sec = retry_sec
+        self.replay_frames = max(1, int(replay_frames))
+
+        self.spool = FrameSpool(spool_dir, spool_max_bytes)
+        self.shipped_frames = 0
+        self.spooled_frames = 0
+
+        self._keep = [i for i, c in enumerate(self.columns) if c not in SKIPPED_COLUMNS]
+        self._buffer = np.zeros(self.flush_rows, dtype=self.dtype)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        self._sock: Optional[socket.socket] = None
+        self._next_retry = 0.0
+        self.closed = False
+
+        atexit.register(self.close)
+
+    # ---- connection ----
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self._next_retry = time.monotonic() + self.retry_sec
+
+    def _ensure_connected(self) -> bool:
+        if self._sock is not None:
+            return True
+        if time.monotonic() < self._next_retry:
+            return False
+        try:
+            self._sock = protocol.connect(self.address, self.timeout)
+            return True
+        except OSError:
+            self._disconnect()
+            return False
+
+    def _send(self, frame: bytes) -> bool:
+        try:
+            protocol.send_frame(self._sock, frame)
+            self.shipped_frames += 1
+            return True
+        except OSError:
+            self._disconnect()
+            return False
+
+    def _ship(self, frame: bytes) -> None:
+        if self._ensure_connected():
+            for _ in range(min(len(self.spool), self.replay_frames)):
+                if not self._send(self.spool.peek()):
+                    break
+                self.spool.pop()
+            if not len(self.spool) and self._send(frame):
+                return
+        self.spool.append(frame)
+        self.spooled_frames += 1
+
+    # ---- sink API ----
+    def write_row(self, row: Sequence) -> None:
+        """
+        Buffer one row and ship a frame if the row or time limit is reached.
+
+        Args:
+            row (Sequence): Values in `columns` order.
+        """
+        self._buffer[self._pending] = tuple(row[i] for i in self._keep)
+        self._pending += 1
+        if (self._pending >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval_sec):
+            self.flush()
+
+    def write_records(self, records: np.ndarray) -> None:
+        """
+        Ship a whole structured array (with this sink's dtype) as one frame.
+        """
+        self.flush()
+        if len(records):
+            self._ship(protocol.encode_frame(self.host, np.ascontiguousarray(records, dtype=self.dtype)))
+
+    def flush(self) -> None:
+        """
+        Ship buffered rows as one frame (or spool it if the aggregator is down).
+        """
+        self._last_flush = time.monotonic()
+        if self._pending == 0 or self.closed:
+            return
+
+        self._ship(protocol.encode_frame(self.host, self._buffer[:self._pending]))
+        self._pending = 0
+
+    def close(self) -> None:
+        """
+        Ship or spool pending rows and close the connection. Safe to call more than once.
+        """
+        if self.closed:
+            return
+
+        self.flush()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self.closed = True
+        atexit.unregister(self.close)
+
+    def summary(self) -> str:
+        return (
+            f"shipped={self.shipped_frames} | spooled={self.spooled_frames} | "
+            f"spool_backlog={len(self.spool)} | spool_dropped={self.spool.dropped}"
+        )
+
+    def __enter__(self) -> "ShipperSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
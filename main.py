@@ -1,11 +1,23 @@
 import os
 import time
+import asyncio
+import argparse
 from datetime import datetime
-import pandas as pd
-import psutil
-import joblib
+from collections import deque
 
 from from_root import from_root
+from monitoring.scorer import load_lean, load_scorer
+from monitoring.log_sink import CsvLogSink
+from monitoring.sampler import FEATURES, MetricSampler, groups_for_features
+from monitoring.scheduler import DeadlineScheduler
+from monitoring.scoring_worker import ScoringWorker
+from monitoring.model_watcher import ModelWatcher
+from monitoring.inference_server import InferenceServer, RemoteScorer, MAX_BATCH, MAX_DELAY_MS
+from monitoring.temporal_features import FeatureAssembler
+from storage.metric_store import DECIMALS
+from monitoring.streaming_detector import DETECTORS, UNSUPERVISED_FILE, make_detector
+from monitoring.alerts import AlertDispatcher, make_sinks, DEFAULT_SINKS, K_ANOMALOUS, N_WINDOW
+from monitoring.instrumentation import Instrumentation, EXPORT_INTERVAL_SEC
 
 
 # =========================
@@ -16,8 +28,14 @@ LOG_DIR = os.path.join(OUTPUT_DIR, "test_results")
 
 INFERENCE_CSV = os.path.join(LOG_DIR, "system_inference_log.csv")
 
-LOG_INTERVAL_SEC = 1
-FEATURES = ["cpu_ratio", "ram_ratio", "disk_ratio"]
+LOG_INTERVAL_SEC = 1         # Default sampling period (see --rate)
+REPORT_INTERVAL_SEC = 60     # Scheduler/scoring summary period
+FLUSH_ROWS = 60             # Buffered inference rows per CSV write
+FLUSH_INTERVAL_SEC = 10.0   # Maximum age of buffered rows
+FSYNC_POLICY = "flush"      # "never", "flush" or "close"
+RELOAD_POLL_SEC = 5.0       # How often PIPELINE_FILE is checked for a new model
+CANARY_ROWS = 100           # Recent samples used to validate a reloaded model
+STAGES = ("sample", "features", "submit", "tick", "score", "log", "alert")
 
 PIPELINE_FILE = os.path.join(
     from_root(),
@@ -25,6 +43,13 @@ PIPELINE_FILE = os.path.join(
     "supervised_pipeline_simple.joblib"
 )
 
+# NumPy-only export of the same model (retrain.py, or `python -m monitoring.scorer MODEL`)
+LEAN_FILE = os.path.join(
+    from_root(),
+    "models",
+    "supervised_pipeline_simple.npz"
+)
+
 
 # =========================
 # CSV SCHEMA
@@ -44,110 +69,370 @@ CSV_COLUMNS = [
 # =========================
 os.makedirs(LOG_DIR, exist_ok=True)
 
-if not os.path.exists(INFERENCE_CSV):
-    pd.DataFrame(columns=CSV_COLUMNS).to_csv(
-        INFERENCE_CSV,
-        index=False
-    )
 
-if not os.path.exists(PIPELINE_FILE):
-    raise FileNotFoundError(f"Pipeline not found: {PIPELINE_FILE}")
+def load_pipeline_scorer():
+    """
+    Load the supervised pipeline and compile it.
 
-pipeline = joblib.load(PIPELINE_FILE)
-preprocessor = pipeline.named_steps["preprocess"]
-model = pipeline.named_steps["clf"]
+    Compiled once at load time so each tick scores plain floats
+    instead of going through a DataFrame and the ColumnTransformer.
+    Loaded on demand so the unsupervised detectors run on hosts that
+    have no trained model yet.
+    """
+    if not os.path.exists(PIPELINE_FILE):
+        raise FileNotFoundError(f"Pipeline not found: {PIPELINE_FILE}")
+    return load_scorer(PIPELINE_FILE)
 
 
-# =========================
-# ALERT
-# =========================
-def beep():
+def load_lean_scorer(path: str = LEAN_FILE):
     """
-    Emit an audible alert to signal an anomaly detection event.
+    Load the lean `.npz` export of the supervised model.
 
-    On Windows systems, this uses the `winsound.Beep` API.
-    On non-Windows systems, it falls back to emitting a
-    terminal bell character, which may or may not produce sound
-    depending on terminal configuration.
+    Only NumPy is needed: pandas, joblib and scikit-learn are never
+    imported, which keeps agent start-up and memory small.
     """
-    try:
-        import winsound
-        winsound.Beep(1000, 500)
-    except ImportError:
-        print("\a")
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Lean model not found: {path}. Export it with `python -m monitoring.scorer {PIPELINE_FILE}`."
+        )
+    return load_lean(path)
 
 
 # =========================
 # MONITORING LOOP
 # =========================
-def monitor_system():
+def monitor_system(rate_hz: float = 1 / LOG_INTERVAL_SEC,
+                   reload: bool = True,
+                   remote: str = None,
+                   detector: str = "supervised",
+                   alert_sinks: str = DEFAULT_SINKS,
+                   alert_k: int = K_ANOMALOUS,
+                   alert_n: int = N_WINDOW,
+                   metrics_file: str = None,
+                   metrics_port: int = None,
+                   lean: str = None,
+                   rotate_mb: float = None,
+                   rotate_hours: float = None):
     """
     Continuously monitor system resource usage and detect anomalies.
 
     This function:
-    - Samples CPU, RAM, and disk usage at a fixed interval
-    - Transforms metrics using a pre-trained preprocessing pipeline
-    - Predicts system stress using a trained supervised model
-    - Logs all observations and predictions to a CSV file
-    - Triggers an audible alert and console warning on anomaly detection
+    - Samples CPU, RAM, and disk usage on a drift-free monotonic deadline
+      via the shared `MetricSampler` (each source read once per tick),
+      plus any optional metric groups (disk I/O, network, ...) the model
+      was trained on
+    - Predicts system stress on a background `ScoringWorker` with a scorer
+      compiled from the trained supervised pipeline, so sampling keeps its
+      full rate even when scoring falls behind
+    - Logs all observations and predictions to a CSV file through a
+      buffered sink (flushed by row count/time and on Ctrl+C)
+    - Raises alerts through an `AlertDispatcher`: once per anomaly episode
+      (K of the last N ticks anomalous), delivered to the configured sinks
+      (console, beep, log file, syslog, webhook) on a background thread,
+      and dropped rather than stalling the loop under overload
+    - Reports overruns, missed ticks and scoring backlog periodically
+    - Hot-reloads `PIPELINE_FILE` on a background `ModelWatcher`: a new
+      model is loaded, validated on recent samples and swapped in between
+      scoring batches, so a rollout causes no monitoring gap
+    - Computes the rolling/EWMA/delta features a model trained with
+      `retrain.py --temporal-window` expects, incrementally per tick
+      (a reloaded model must use the same feature set)
+    - Times every stage (sample, features, submit, whole tick, score, log,
+      alert) into fixed-bucket histograms and tracks the monitor's own CPU
+      and RSS; reported with the periodic summary and, optionally, as a
+      Prometheus text file or local HTTP endpoint
+
+    Args:
+        rate_hz (float): Sampling rate in Hz (e.g. 1, 10 or 100).
+        reload (bool): Watch the model file (supervised or iforest) and
+            swap in retrained models.
+        remote (str): Score on a central inference server (`--serve`) at
+            this address instead of locally; the local model is used as a
+            fallback while the server is unreachable.
+        detector (str): "supervised" (the trained pipeline), or an
+            unsupervised detector that needs no labelled history:
+            "hst" (half-space trees) or "zscore" (robust z-score), which
+            learn online in constant time and memory per sample, or
+            "iforest" (the shipped Isolation Forest).
+        alert_sinks (str): Comma-separated alert sinks (see
+            `monitoring.alerts.make_sinks`).
+        alert_k (int): Anomalous ticks that open an alert episode ...
+        alert_n (int): ... among the last `alert_n` ticks.
+        metrics_file (str): Rewrite this Prometheus text file every
+            `EXPORT_INTERVAL_SEC` seconds.
+        metrics_port (int): Serve the metrics at http://127.0.0.1:PORT/metrics.
+        lean (str): Load (and hot-reload) the supervised model from this
+            lean `.npz` export instead of the joblib pipeline.
+        rotate_mb (float, optional): Rotate the inference log into gzipped
+            segments at this size (see `storage.retention`).
+        rotate_hours (float, optional): Also rotate it after this many hours.
 
     The loop runs indefinitely until interrupted by the user
     (Ctrl+C).
     """
-    print("System monitoring started. Press Ctrl+C to stop.")
+    if detector == "supervised" and lean:
+        scorer, model_file = load_lean_scorer(lean), lean
+    elif detector == "supervised":
+        scorer, model_file = load_pipeline_scorer(), PIPELINE_FILE
+    elif lean:
+        raise ValueError("--lean loads the supervised model; it cannot be combined with --detector.")
+    else:
+        if remote:
+            raise ValueError("--remote scores with the server's supervised model; it cannot be combined with --detector.")
+        scorer = make_detector(detector, FEATURES)
+        model_file = UNSUPERVISED_FILE if detector == "iforest" else None
+
+    print(f"System monitoring started at {rate_hz:g} Hz with the {scorer.family} detector. Press Ctrl+C to stop.")
+
+    sampler = MetricSampler(groups=groups_for_features(scorer.features))
+    sink = CsvLogSink(
+        INFERENCE_CSV,
+        CSV_COLUMNS,
+        flush_rows=FLUSH_ROWS,
+        flush_interval_sec=FLUSH_INTERVAL_SEC,
+        fsync_policy=FSYNC_POLICY,
+        rotate_bytes=int(rotate_mb * 2 ** 20) if rotate_mb else None,
+        rotate_sec=rotate_hours * 3600 if rotate_hours else None
+    )
+
+    alerts = AlertDispatcher(make_sinks(alert_sinks), k=alert_k, n=alert_n, source=scorer.family).start()
+    recent = deque(maxlen=CANARY_ROWS)
+    instruments = Instrumentation(STAGES)
+    clock = time.perf_counter_ns
+
+    def on_result(row, predicted_stress):
+        ts, dt, cpu, ram, disk_ratio = row[:5]
+        recent.append(row[5:])
+        predicted_label = 'anomaly' if predicted_stress == 1 else 'normal'
+
+        # Log to CSV (CSV_COLUMNS order)
+        t0 = clock()
+        sink.write_row((
+            ts,
+            dt,
+            round(cpu, 4),
+            round(ram, 4),
+            round(disk_ratio, 4),
+            predicted_label
+        ))
+        t1 = clock()
+
+        # Debounced, non-blocking alerting
+        alerts.observe(ts, dt, {"cpu": cpu, "ram": ram, "disk": disk_ratio}, predicted_stress == 1)
+        instruments.observe("log", t1 - t0)
+        instruments.observe("alert", clock() - t1)
+
+    # Rows are (ts, dt, cpu, ram, disk, *model inputs in scorer.features order)
+    assemble = FeatureAssembler(scorer.features, sampler.features)
+    active = RemoteScorer(remote, scorer.features, fallback=scorer) if remote else scorer
+    worker = ScoringWorker(active, on_result, feature_slice=slice(5, None), instrumentation=instruments).start()
+
+    def swap(new_scorer):
+        if remote:
+            active.fallback = new_scorer
+        else:
+            worker.set_scorer(new_scorer)
+
+    # Online detectors (hst, zscore) have no model file to watch
+    watcher = ModelWatcher(
+        model_file,
+        scorer.features,
+        on_swap=swap,
+        canary_fn=lambda: list(recent),
+        poll_sec=RELOAD_POLL_SEC
+    ) if model_file else None
+    if reload and watcher is not None:
+        watcher.start()
+    scheduler = DeadlineScheduler(rate_hz)
+
+    instruments.add_gauge("scoring_backlog", worker.backlog)
+    instruments.add_gauge("scoring_dropped_total", lambda: worker.dropped)
+    instruments.add_gauge("scoring_errors_total", lambda: worker.errors)
+    instruments.add_gauge("alerts_dropped_total", lambda: alerts.dropped)
+    instruments.add_gauge("scheduler_overruns_total", lambda: scheduler.overruns)
+    instruments.start_exporter(metrics_file, metrics_port)
+
+    def status() -> str:
+        parts = [scheduler.summary(), worker.summary(), alerts.summary()] + ([watcher.summary()] if watcher else [])
+        return " | ".join(parts + [instruments.summary()])
+
+    next_report = time.monotonic() + REPORT_INTERVAL_SEC
 
     try:
         while True:
             # Time metadata
+            t0 = clock()
             ts = int(time.time() * 1000)
             dt = datetime.utcnow().isoformat()
 
-            # System metrics
-            cpu = psutil.cpu_percent(interval=None) / 100.0
-            ram = psutil.virtual_memory().used / psutil.virtual_memory().total
-            disk_ratio = psutil.disk_usage("/").used / psutil.disk_usage("/").total
-
-            # Model input
-            X_raw = pd.DataFrame(
-                [[cpu, ram, disk_ratio]],
-                columns=FEATURES
-            )
-
-            X_processed = preprocessor.transform(X_raw)
-            predicted_stress = int(model.predict(X_processed)[0])
-            predicted_label = 'anomaly' if predicted_stress == 1 else 'normal'
-
-            # Log to CSV
-            row = {
-                "timestamp_ms": ts,
-                "datetime_utc": dt,
-                "cpu_ratio": round(cpu, 4),
-                "ram_ratio": round(ram, 4),
-                "disk_ratio": round(disk_ratio, 4),
-                "predicted_stress": predicted_label
-            }
-
-            pd.DataFrame([row]).to_csv(
-                INFERENCE_CSV,
-                mode="a",
-                index=False,
-                header=False
-            )
-
-            # Trigger beep on anomaly
-            if predicted_stress == 1:
-                print(
-                    f"[{dt}] ⚠ Anomaly Detected | "
-                    f"CPU={cpu:.4f}, RAM={ram:.4f}, Disk={disk_ratio:.4f}, "
-                    f"Prediction={predicted_label}"
-                )
-                beep()
-
-            time.sleep(LOG_INTERVAL_SEC)
+            # System metrics (one read per source), at the loggers' precision like
+            # the training data; the inference server rounds the same way
+            values = tuple(round(v, DECIMALS) for v in sampler.sample())
+            t1 = clock()
+            cpu, ram, disk_ratio = values[0], values[1], values[2]
+            row = (ts, dt, cpu, ram, disk_ratio) + assemble(ts, values)
+            t2 = clock()
+            worker.submit(row)
+            t3 = clock()
+
+            instruments.observe("sample", t1 - t0)
+            instruments.observe("features", t2 - t1)
+            instruments.observe("submit", t3 - t2)
+            instruments.observe("tick", t3 - t0)
+
+            if time.monotonic() >= next_report:
+                print(f"[monitor] {status()}")
+                next_report += REPORT_INTERVAL_SEC
+
+            scheduler.wait()
 
     except KeyboardInterrupt:
         print("\nMonitoring stopped by user.")
 
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        worker.stop()
+        alerts.close()
+        sink.close()
+        sampler.close()
+        print(f"[monitor] {status()}")
+        instruments.stop()
+
+
+# =========================
+# INFERENCE SERVER MODE
+# =========================
+def serve(address: str, max_batch: int, max_delay_ms: float, reload: bool = True):
+    """
+    Run the central batch scoring service instead of the local monitor.
+
+    The pipeline is loaded once, and samples from every connected host
+    (`main.py --remote ADDRESS`) are micro-batched into single vectorized
+    predict calls. Retrained models are hot-swapped like in the monitor.
+
+    Args:
+        address (str): Listen address, "host:port" or "unix:/path".
+        max_batch (int): Maximum samples per predict call.
+        max_delay_ms (float): Batching deadline in milliseconds.
+        reload (bool): Watch `PIPELINE_FILE` and swap in retrained models.
+    """
+    scorer = load_pipeline_scorer()
+    server = InferenceServer(scorer, max_batch=max_batch, max_delay_ms=max_delay_ms)
+    watcher = ModelWatcher(PIPELINE_FILE, scorer.features, on_swap=server.set_scorer, poll_sec=RELOAD_POLL_SEC)
+    if reload:
+        watcher.start()
+
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        print("\nInference server stopped by user.")
+    finally:
+        watcher.stop()
+        print(f"[inference-server] {server.summary()} | {watcher.summary()}")
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command-line options for the monitor.
+    """
+    parser = argparse.ArgumentParser(description="Real-time system anomaly monitor.")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=1 / LOG_INTERVAL_SEC,
+        help="Sampling rate in Hz (default: %(default)s). Values such as 10-100 enable high-frequency mode."
+    )
+    parser.add_argument(
+        "--no-reload",
+        action="store_true",
+        help="Do not watch the model file for retrained pipelines."
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="ADDRESS",
+        default=None,
+        help="Run as the central inference server on host:port or unix:/path instead of monitoring."
+    )
+    parser.add_argument(
+        "--remote",
+        metavar="ADDRESS",
+        default=None,
+        help="Score samples on the inference server at this address (local model as fallback)."
+    )
+    parser.add_argument(
+        "--detector",
+        choices=("supervised",) + DETECTORS,
+        default="supervised",
+        help="Trained supervised model, or an unsupervised detector that needs no labelled "
+             "history: hst, zscore (online) or iforest (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--alerts",
+        default=DEFAULT_SINKS,
+        help="Comma-separated alert sinks: console, beep, file:PATH, syslog[:ADDR], "
+             "webhook:URL or none (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--alert-k",
+        type=int,
+        default=K_ANOMALOUS,
+        help="Alert once per episode of K anomalous ticks ... (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--alert-n",
+        type=int,
+        default=N_WINDOW,
+        help="... among the last N ticks (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--lean",
+        nargs="?",
+        const=LEAN_FILE,
+        default=None,
+        metavar="NPZ",
+        help="Score with the lean NumPy-only export of the model (default file: models/"
+             "supervised_pipeline_simple.npz), without importing pandas or scikit-learn."
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help=f"Write stage timings and the monitor's own CPU/RSS to this Prometheus text file "
+             f"every {EXPORT_INTERVAL_SEC:g} s."
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve the same metrics at http://127.0.0.1:PORT/metrics."
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=MAX_BATCH,
+        help="Server mode: maximum samples per predict call (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--max-delay-ms",
+        type=float,
+        default=MAX_DELAY_MS,
+        help="Server mode: longest a sample waits for its batch (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--rotate-mb",
+        type=float,
+        default=None,
+        help="Seal the CSV log as a gzipped segment once it reaches this size; "
+             "`python -m storage.retention` then builds rollups and enforces retention."
+    )
+    parser.add_argument(
+        "--rotate-hours",
+        type=float,
+        default=None,
+        help="Also rotate the CSV log after this many hours."
+    )
+    return parser.parse_args()
+
 
 # =========================
 # MAIN
@@ -160,4 +445,21 @@ if __name__ == "__main__":
     continuous monitoring loop. Intended to be run as a
     standalone process for live anomaly detection.
     """
-    monitor_system()
+    args = parse_args()
+    if args.serve:
+        serve(args.serve, args.max_batch, args.max_delay_ms, reload=not args.no_reload)
+    else:
+        monitor_system(
+            rate_hz=args.rate,
+            reload=not args.no_reload,
+            remote=args.remote,
+            detector=args.detector,
+            alert_sinks=args.alerts,
+            alert_k=args.alert_k,
+            alert_n=args.alert_n,
+            metrics_file=args.metrics_file,
+            metrics_port=args.metrics_port,
+            lean=args.lean,
+            rotate_mb=args.rotate_mb,
+            rotate_hours=args.rotate_hours
+        )
@@ -1,9 +1,14 @@
 import os
 import time
+import argparse
 from datetime import datetime
 import pandas as pd
-import psutil
 from from_root import from_root
+from monitoring.log_sink import CsvLogSink
+from monitoring.sampler import MetricSampler, DEFAULT_GROUPS, METRIC_GROUPS, parse_groups
+from monitoring.scheduler import DeadlineScheduler
+from storage.metric_store import BinaryLogSink
+from collector.shipper import ShipperSink
 
 
 # =========================
@@ -16,7 +21,42 @@ CSV_FILE = os.path.join(
     "system_metrics_binary.csv"
 )
 
-LOG_INTERVAL_SEC = 1
+# Default destinations when optional metric groups are collected (different schema)
+EXTENDED_CSV_FILE = os.path.join(
+    from_root(),
+    "notebooks",
+    "Data",
+    "system_metrics_extended.csv"
+)
+
+# Binary store (one fixed-width record chunk per UTC day), see storage/metric_store.py
+BIN_DIR = os.path.join(
+    from_root(),
+    "notebooks",
+    "Data",
+    "metrics_bin"
+)
+
+EXTENDED_BIN_DIR = os.path.join(
+    from_root(),
+    "notebooks",
+    "Data",
+    "metrics_bin_extended"
+)
+
+# Local spool for frames the aggregator has not acknowledged yet (--format ship)
+SPOOL_DIR = os.path.join(
+    from_root(),
+    "notebooks",
+    "Data",
+    "spool"
+)
+
+LOG_INTERVAL_SEC = 1         # Default sampling period (see --rate)
+REPORT_INTERVAL_SEC = 60     # Scheduler summary period
+FLUSH_ROWS = 60             # Buffered metric rows per CSV write
+FLUSH_INTERVAL_SEC = 10.0   # Maximum age of buffered rows
+FSYNC_POLICY = "flush"      # "never", "flush" or "close"
 
 
 # =========================
@@ -31,14 +71,14 @@ CSV_COLUMNS = [
 ]
 
 
-def initialize_csv(file_path: str):
+def initialize_csv(file_path: str, columns=CSV_COLUMNS):
     """
     Ensure CSV exists with correct schema.
     """
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
     if not os.path.exists(file_path):
-        pd.DataFrame(columns=CSV_COLUMNS).to_csv(
+        pd.DataFrame(columns=columns).to_csv(
             file_path,
             index=False
         )
@@ -47,45 +87,161 @@ def initialize_csv(file_path: str):
 # =========================
 # METRIC LOGGER
 # =========================
-def log_metrics():
+def log_metrics(rate_hz: float = 1 / LOG_INTERVAL_SEC,
+                fmt: str = "csv",
+                aggregator: str = None,
+                groups=DEFAULT_GROUPS,
+                out: str = None,
+                rotate_mb: float = None,
+                rotate_hours: float = None):
     """
     Log system metrics to CSV at fixed intervals.
     Output is append-only and pipeline-compatible.
+
+    Rows are buffered and written in batches by `CsvLogSink`; pending rows
+    are flushed when the logger is stopped with Ctrl+C. Ticks follow a
+    drift-free monotonic deadline, and overruns/missed ticks are reported
+    periodically.
+
+    Args:
+        rate_hz (float): Sampling rate in Hz (e.g. 1, 10 or 100).
+        fmt (str): "csv" appends to `CSV_FILE`; "bin" writes fixed-width
+            binary records under `BIN_DIR`, which `retrain.py --data`
+            can memory-map (export back to CSV with `storage.metric_store`);
+            "ship" sends binary frames to a `collector.aggregator`, spooling
+            under `SPOOL_DIR` while it is unreachable.
+        aggregator (str): Aggregator address for "ship" ("host:port" or
+            "unix:/path").
+        groups (Iterable[str]): Metric groups to collect (see
+            `monitoring.sampler.METRIC_GROUPS`); extra groups append
+            columns after `CSV_COLUMNS`.
+        out (str, optional): CSV file or binary store directory. Defaults to
+            `CSV_FILE`/`BIN_DIR`, or the `EXTENDED_*` paths when optional
+            groups change the schema.
+        rotate_mb (float, optional): CSV only: seal the file as a gzipped
+            segment at this size (see `storage.retention`).
+        rotate_hours (float, optional): CSV only: also rotate after this many hours.
     """
-    initialize_csv(CSV_FILE)
+    sink_options = dict(
+        flush_rows=FLUSH_ROWS,
+        flush_interval_sec=FLUSH_INTERVAL_SEC,
+        fsync_policy=FSYNC_POLICY
+    )
+
+    sampler = MetricSampler(groups=groups)
+    columns = CSV_COLUMNS[:2] + sampler.features
+    extended = len(sampler.groups) > 1
+
+    if fmt == "bin":
+        sink = BinaryLogSink(out or (EXTENDED_BIN_DIR if extended else BIN_DIR), columns, **sink_options)
+    elif fmt == "ship":
+        if not aggregator:
+            raise ValueError("--format ship requires --aggregator HOST:PORT.")
+        sink_options.pop("fsync_policy")
+        sink = ShipperSink(aggregator, columns, SPOOL_DIR, **sink_options)
+    else:
+        path = out or (EXTENDED_CSV_FILE if extended else CSV_FILE)
+        initialize_csv(path, columns)
+        sink = CsvLogSink(
+            path,
+            columns,
+            rotate_bytes=int(rotate_mb * 2 ** 20) if rotate_mb else None,
+            rotate_sec=rotate_hours * 3600 if rotate_hours else None,
+            **sink_options
+        )
 
-    while True:
-        ts = int(time.time() * 1000)
-        dt = datetime.utcnow().isoformat()
+    if extended:
+        print(f"[metric_logger] Collecting {', '.join(sampler.groups)} ({len(sampler.features)} metrics)")
 
-        cpu = psutil.cpu_percent(interval=None) / 100.0
+    scheduler = DeadlineScheduler(rate_hz)
+    next_report = time.monotonic() + REPORT_INTERVAL_SEC
 
-        vm = psutil.virtual_memory()
-        ram = vm.used / vm.total
+    try:
+        while True:
+            ts = int(time.time() * 1000)
+            dt = datetime.utcnow().isoformat()
 
-        disk = psutil.disk_usage("/")
-        disk_ratio = disk.used / disk.total
+            values = sampler.sample()
 
-        row = {
-            "timestamp_ms": ts,
-            "datetime_utc": dt,
-            "cpu_ratio": round(cpu, 4),
-            "ram_ratio": round(ram, 4),
-            "disk_ratio": round(disk_ratio, 4),
-        }
+            sink.write_row((ts, dt) + tuple(round(v, 4) for v in values))
 
-        pd.DataFrame([row]).to_csv(
-            CSV_FILE,
-            mode="a",
-            index=False,
-            header=False
-        )
+            if time.monotonic() >= next_report:
+                print(f"[metric_logger] {scheduler.summary()}")
+                next_report += REPORT_INTERVAL_SEC
+
+            scheduler.wait()
+
+    except KeyboardInterrupt:
+        print("\nMetric logging stopped by user.")
+
+    finally:
+        sink.close()
+        sampler.close()
+        print(f"[metric_logger] {scheduler.summary()}")
+        if isinstance(sink, ShipperSink):
+            print(f"[metric_logger] {sink.summary()}")
 
-        time.sleep(LOG_INTERVAL_SEC)
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command-line options for the logger.
+    """
+    parser = argparse.ArgumentParser(description="Append system metrics to the training dataset.")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=1 / LOG_INTERVAL_SEC,
+        help="Sampling rate in Hz (default: %(default)s). Values such as 10-100 enable high-frequency mode."
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "bin", "ship"],
+        default="csv",
+        help="Storage format: CSV file, compact binary record chunks, or ship to an aggregator (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--aggregator",
+        default=None,
+        help="Aggregator address for --format ship: host:port or unix:/path."
+    )
+    parser.add_argument(
+        "--metrics",
+        type=parse_groups,
+        default=list(DEFAULT_GROUPS),
+        help=f"Comma-separated metric groups from {', '.join(METRIC_GROUPS)} or 'all' (default: core)."
+    )
+    parser.add_argument(
+        "--out",
+        default=None,
+        help="CSV file or binary store directory to write (default depends on --format and --metrics)."
+    )
+    parser.add_argument(
+        "--rotate-mb",
+        type=float,
+        default=None,
+        help="Seal the CSV log as a gzipped segment once it reaches this size; "
+             "`python -m storage.retention` then builds rollups and enforces retention."
+    )
+    parser.add_argument(
+        "--rotate-hours",
+        type=float,
+        default=None,
+        help="Also rotate the CSV log after this many hours."
+    )
+    return parser.parse_args()
 
 
 # =========================
 # MAIN
 # =========================
 if __name__ == "__main__":
-    log_metrics()
+    args = parse_args()
+    log_metrics(
+        rate_hz=args.rate,
+        fmt=args.format,
+        aggregator=args.aggregator,
+        groups=args.metrics,
+        out=args.out,
+        rotate_mb=args.rotate_mb,
+        rotate_hours=args.rotate_hours
+    )
@@ -0,0 +1,392 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+
+# =========================
+# CONFIGURATION
+# =========================
+K_ANOMALOUS = 3            # An episode opens after K anomalous ticks ...
+N_WINDOW = 5               # ... among the last N
+QUEUE_SIZE = 1_000         # Alerts buffered for the sinks; more are dropped
+RATE_LIMIT_PER_MIN = 30    # Alerts per minute across all episodes; more are dropped
+SINK_TIMEOUT_SEC = 2.0     # Network sinks (webhook) give up after this long
+POLL_SEC = 0.2             # How often an idle dispatcher checks for shutdown
+DEFAULT_SINKS = "console,beep"
+STUB_PORT = 8765           # `python -m monitoring.alerts --stub` listens here
+
+
+# =========================
+# ALERT SINKS
+# =========================
+class ConsoleSink:
+    """
+    Print one line per alert.
+    """
+
+    def send(self, alert: Dict[str, Any]) -> None:
+        metrics = ", ".join(f"{k}={v:.4f}" for k, v in alert["metrics"].items())
+        if alert["event"] == "anomaly":
+            print(f"[{alert['datetime_utc']}] ⚠ Anomaly Detected | {metrics} | "
+                  f"{alert['anomalous']}/{alert['window']} anomalous ticks | episode {alert['episode']}")
+        else:
+            print(f"[{alert['datetime_utc']}] ✓ Anomaly resolved | episode {alert['episode']} "
+                  f"lasted {alert['duration_sec']:.1f} s")
+
+    def close(self) -> None:
+        pass
+
+
+class BeepSink:
+    """
+    Audible alert: `winsound.Beep` on Windows, the terminal bell elsewhere.
+
+    Runs on the dispatcher thread, so the 500 ms beep no longer blocks sampling.
+    """
+
+    def __init__(self, frequency: int = 1000, duration_ms: int = 500):
+        self.frequency = frequency
+        self.duration_ms = duration_ms
+        try:
+            import winsound
+            self._winsound = winsound
+        except ImportError:
+            self._winsound = None
+
+    def send(self, alert: Dict[str, Any]) -> None:
+        if alert["event"] != "anomaly":
+            return
+        if self._winsound is not None:
+            self._winsound.Beep(self.frequency, self.duration_ms)
+        else:
+            print("\a", end="", flush=True)
+
+    def close(self) -> None:
+        pass
+
+
+class LogFileSink:
+    """
+    Append alerts to a file as JSON lines.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", buffering=1)
+
+    def send(self, alert: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(alert) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SyslogSink:
+    """
+    Send alerts to syslog (local socket, or "host:port" over UDP).
+    """
+
+    def __init__(self, address: Optional[str] = None):
+        import logging
+        import logging.handlers
+
+        if address is None:
+            address = "/dev/log" if os.path.exists("/dev/log") else "localhost:514"
+        if ":" in address and not address.startswith("/"):
+            host, port = address.rsplit(":", 1)
+            target = (host, int(port))
+        else:
+            target = address
+
+        self._handler = logging.handlers.SysLogHandler(address=target)
+        self._handler.ident = "dcml-monitor: "
+        self._logging = logging
+
+    def send(self, alert: Dict[str, Any]) -> None:
+        level = self._logging.WARNING if alert["event"] == "anomaly" else self._logging.INFO
+        record = self._logging.LogRecord("dcml", level, __file__, 0, json.dumps(alert), None, None)
+        self._handler.emit(record)
+
+    def close(self) -> None:
+        self._handler.close()
+
+
+class WebhookSink:
+    """
+    POST each alert as JSON to an HTTP endpoint (e.g. the local stub).
+    """
+
+    def __init__(self, url: str, timeout: float = SINK_TIMEOUT_SEC):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert: Dict[str, Any]) -> None:
+        import urllib.request
+
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(alert).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def close(self) -> None:
+        pass
+
+
+def make_sinks(spec: str) -> List[Any]:
+    """
+    Build sinks from a comma-separated spec.
+
+    Items: "console", "beep", "file:PATH", "syslog", "syslog:ADDRESS",
+    "webhook:URL". An empty spec or "none" disables alerting output.
+    """
+    sinks = []
+    for item in (s.strip() for s in spec.split(",")):
+        if not item or item == "none":
+            continue
+        kind, _, arg = item.partition(":")
+        if kind == "console":
+            sinks.append(ConsoleSink())
+        elif kind == "beep":
+            sinks.append(BeepSink())
+        elif kind == "file" and arg:
+            sinks.append(LogFileSink(arg))
+        elif kind == "syslog":
+            sinks.append(SyslogSink(arg or None))
+        elif kind == "webhook" and arg:
+            sinks.append(WebhookSink(arg))
+        else:
+            raise ValueError(f"Invalid alert sink '{item}'. Use console, beep, file:PATH, syslog[:ADDR] or webhook:URL.")
+    return sinks
+
+
+# =========================
+# DEBOUNCING
+# =========================
+class EpisodeDebouncer:
+    """
+    Turn per-tick verdicts into episode start/end events (K of N).
+
+    An episode opens when at least `k` of the last `n` ticks are
+    anomalous and closes after `n` normal ticks in a row. Only these two
+    transitions produce events, so a sustained anomaly alerts once.
+
+    Args:
+        k (int): Anomalous ticks needed to open an episode.
+        n (int): Sliding window length in ticks.
+    """
+
+    def __init__(self, k: int = K_ANOMALOUS, n: int = N_WINDOW):
+        if not 1 <= k <= n:
+            raise ValueError(f"Need 1 <= k <= n, got k={k}, n={n}.")
+        self.k = k
+        self.n = n
+        self.active = False
+        self.episodes = 0
+        self._window = deque(maxlen=n)
+        self._count = 0
+
+    def update(self, anomalous: bool) -> Optional[str]:
+        """
+        Add one verdict.
+
+        Returns:
+            Optional[str]: "anomaly" when an episode opens, "resolved" when
+            it closes, otherwise None.
+        """
+        if len(self._window) == self.n:
+            self._count -= self._window[0]
+        self._window.append(bool(anomalous))
+        self._count += bool(anomalous)
+
+        if not self.active and self._count >= self.k:
+            self.active = True
+            self.episodes += 1
+            return "anomaly"
+        if self.active and self._count == 0 and len(self._window) == self.n:
+            self.active = False
+            return "resolved"
+        return None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+
+# =========================
+# ALERT DISPATCHER
+# =========================
+class AlertDispatcher:
+    """
+    Debounce verdicts and deliver alerts to sinks on a background thread.
+
+    `observe` is called once per scored tick. It does O(1) work: it updates
+    an `EpisodeDebouncer` and, on an episode transition, queues an alert
+    without blocking. A worker thread delivers each queued alert to every
+    sink. A slow or failing sink (beep, webhook) therefore delays only
+    other alerts, never sampling or scoring. Under overload, alerts are
+    dropped and counted instead of stalling the caller: when the queue is
+    full or more than `rate_limit_per_min` alerts were raised in the last
+    minute.
+
+    Args:
+        sinks (Sequence): Objects with `send(alert)` and `close()`.
+        k (int): Anomalous ticks needed to open an episode.
+        n (int): Sliding window length in ticks.
+        queue_size (int): Maximum pending alerts.
+        rate_limit_per_min (int): Maximum alerts raised per minute.
+        host (str, optional): Host name reported in alerts.
+        source (str): Detector name reported in alerts.
+    """
+
+    def __init__(self,
+                 sinks: Sequence,
+                 k: int = K_ANOMALOUS,
+                 n: int = N_WINDOW,
+                 queue_size: int = QUEUE_SIZE,
+                 rate_limit_per_min: int = RATE_LIMIT_PER_MIN,
+                 host: Optional[str] = None,
+                 source: str = ""):
+        self.sinks = list(sinks)
+        self.debouncer = EpisodeDebouncer(k, n)
+        self.rate_limit_per_min = rate_limit_per_min
+        self.host = host or socket.gethostname()
+        self.source = source
+
+        self.raised = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.sink_errors = 0
+
+        self._recent = deque()  # monotonic times of raised alerts, for the rate limit
+        self._episode_start = 0.0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+
+    def start(self) -> "AlertDispatcher":
+        self._thread.start()
+        return self
+
+    def observe(self, ts_ms: int, datetime_utc: str, metrics: Dict[str, float], anomalous: bool) -> None:
+        """
+        Feed one tick's verdict; never blocks.
+        """
+        event = self.debouncer.update(anomalous)
+        if event is None:
+            return
+
+        now = time.monotonic()
+        if event == "anomaly":
+            self._episode_start = now
+        alert = {
+            "event": event,
+            "host": self.host,
+            "source": self.source,
+            "episode": self.debouncer.episodes,
+            "ts_ms": ts_ms,
+            "datetime_utc": datetime_utc,
+            "metrics": dict(metrics),
+            "anomalous": self.debouncer.count,
+            "window": self.debouncer.n,
+            "duration_sec": round(now - self._episode_start, 3),
+        }
+
+        while self._recent and now - self._recent[0] > 60:
+            self._recent.popleft()
+        if len(self._recent) >= self.rate_limit_per_min:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait(alert)
+            self._recent.append(now)
+            self.raised += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _deliver(self, alert: Dict[str, Any]) -> None:
+        for sink in self.sinks:
+            try:
+                sink.send(alert)
+            except Exception as e:
+                self.sink_errors += 1
+                print(f"[alerts] {type(sink).__name__} failed: {e!r}")
+        self.delivered += 1
+
+    def _run(self) -> None:
+        while True:
+            try:
+                alert = self._queue.get(timeout=POLL_SEC)
+            except queue.Empty:
+                continue
+            if alert is None:
+                return
+            self._deliver(alert)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Deliver what is queued (up to `timeout` seconds), then close the sinks.
+        """
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception:
+                pass
+
+    def summary(self) -> str:
+        return (
+            f"episodes={self.debouncer.episodes} | alerts={self.raised} | delivered={self.delivered} | "
+            f"alerts_dropped={self.dropped} | sink_errors={self.sink_errors}"
+        )
+
+
+# =========================
+# WEBHOOK STUB
+# =========================
+def serve_webhook_stub(port: int = STUB_PORT) -> None:
+    """
+    Minimal local HTTP endpoint that prints every alert POSTed to it,
+    for trying out `webhook:http://127.0.0.1:PORT/` without a real service.
+    """
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            print(f"[webhook-stub] {body.decode(errors='replace')}")
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", port), Handler)
+    print(f"[webhook-stub] Listening on http://127.0.0.1:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nWebhook stub stopped by user.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local webhook stub for monitor alerts.")
+    parser.add_argument("--stub", type=int, default=STUB_PORT, metavar="PORT",
+                        help="Port to listen on (default: %(default)s).")
+    serve_webhook_stub(parser.parse_args(sys.argv[1:]).stub)
@@ -0,0 +1,358 @@
+import os
+import time
+import asyncio
+import socket
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from collector import protocol
+from storage.metric_store import DECIMALS, record_dtype
+from monitoring.temporal_features import is_temporal
+
+# =========================
+# CONFIGURATION
+# =========================
+MAX_BATCH = 4_096            # Samples per vectorized predict call
+MAX_DELAY_MS = 5.0           # Longest a sample waits for its batch to fill
+MAX_PENDING_REQUESTS = 1_024 # Per connection; reading stops beyond this (backpressure)
+LATENCY_WINDOW = 10_000      # Recent request latencies kept for percentiles
+REPORT_INTERVAL_SEC = 60     # Summary period
+CONNECT_TIMEOUT_SEC = 1.0
+RETRY_SEC = 5.0
+
+
+# =========================
+# MICRO-BATCHER
+# =========================
+class MicroBatcher:
+    """
+    Coalesce scoring requests from many connections into large predict calls.
+
+    Requests queue up until `max_batch` samples are pending or the oldest
+    one has waited `max_delay_ms`, whichever comes first. Then they are
+    scored with one vectorized `predict` on a worker thread, and each
+    request's future receives its slice of the verdicts. With
+    `max_batch=1` every sample gets its own predict call, which is the
+    per-sample baseline.
+
+    Args:
+        scorer: Object with `predict(X) -> labels` (see `monitoring.scorer`).
+        max_batch (int): Maximum samples per predict call.
+        max_delay_ms (float): Batching deadline in milliseconds.
+    """
+
+    def __init__(self, scorer, max_batch: int = MAX_BATCH, max_delay_ms: float = MAX_DELAY_MS):
+        self.scorer = scorer
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay = max_delay_ms / 1000
+
+        self.samples = 0
+        self.requests = 0
+        self.predict_calls = 0
+        self.latencies_ms = deque(maxlen=LATENCY_WINDOW)
+
+        self._pending: deque = deque()  # (X, future, enqueued_at)
+        self._pending_rows = 0
+        self._has_work = asyncio.Event()
+        self._full = asyncio.Event()
+
+    def submit(self, X: np.ndarray) -> asyncio.Future:
+        """
+        Queue one request's samples.
+
+        Returns:
+            asyncio.Future: Resolves to the verdicts for `X`.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((X, future, time.perf_counter()))
+        self._pending_rows += len(X)
+        self._has_work.set()
+        if self._pending_rows >= self.max_batch:
+            self._full.set()
+        return future
+
+    def _take(self) -> List[Tuple[np.ndarray, asyncio.Future, float]]:
+        batch, rows = [], 0
+        while self._pending and (not batch or rows + len(self._pending[0][0]) <= self.max_batch):
+            item = self._pending.popleft()
+            batch.append(item)
+            rows += len(item[0])
+        self._pending_rows -= rows
+        if not self._pending:
+            self._has_work.clear()
+        if self._pending_rows < self.max_batch:
+            self._full.clear()
+        return batch
+
+    def _predict(self, X: np.ndarray) -> Tuple[np.ndarray, int]:
+        scorer = self.scorer
+        parts = [scorer.predict(X[i:i + self.max_batch]) for i in range(0, len(X), self.max_batch)]
+        return np.concatenate(parts), len(parts)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._has_work.wait()
+            deadline = self._pending[0][2] + self.max_delay
+            if self._pending_rows < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), max(0.0, deadline - time.perf_counter()))
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._take()
+            X = np.concatenate([item[0] for item in batch])
+            try:
+                predictions, calls = await loop.run_in_executor(None, self._predict, X)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            start = 0
+            for X_req, future, enqueued in batch:
+                if not future.cancelled():
+                    future.set_result(predictions[start:start + len(X_req)])
+                start += len(X_req)
+                self.latencies_ms.append((done - enqueued) * 1000)
+
+            self.samples += len(X)
+            self.requests += len(batch)
+            self.predict_calls += calls
+
+
+# =========================
+# INFERENCE SERVER
+# =========================
+class InferenceServer:
+    """
+    Central scoring service: one loaded model, many client hosts.
+
+    Clients send `collector.protocol` frames whose fields include the
+    scorer's features. Each frame is answered with one verdict byte per
+    sample, in order. Frames from all connections share one
+    `MicroBatcher`. Feature values travel as float32. Logged metrics are
+    rounded back to the loggers' 4 decimals before scoring, matching the
+    training data and `main.py`, which rounds its samples the same way
+    before scoring locally or through `RemoteScorer` (and its fallback);
+    temporal features are used as received.
+
+    Args:
+        scorer: Compiled scorer (see `monitoring.scorer.compile_pipeline`).
+        max_batch (int): Maximum samples per predict call.
+        max_delay_ms (float): Batching deadline in milliseconds.
+        verbose (bool): Print connection events and periodic summaries.
+    """
+
+    def __init__(self,
+                 scorer,
+                 max_batch: int = MAX_BATCH,
+                 max_delay_ms: float = MAX_DELAY_MS,
+                 verbose: bool = True):
+        self.scorer = scorer
+        self.max_batch = max_batch
+        self.max_delay_ms = max_delay_ms
+        self.verbose = verbose
+
+        self.connections = 0
+        self.batcher: Optional[MicroBatcher] = None
+        self._dtypes: Dict[bytes, np.dtype] = {}
+        self._started = time.monotonic()
+
+    def set_scorer(self, scorer) -> None:
+        """
+        Replace the scorer (e.g. from a `ModelWatcher`); applies from the next batch.
+        """
+        self.scorer = scorer
+        if self.batcher is not None:
+            self.batcher.scorer = scorer
+
+    def _features(self, records: np.ndarray) -> np.ndarray:
+        missing = [f for f in self.scorer.features if f not in records.dtype.names]
+        if missing:
+            raise ValueError(f"Frame is missing features {missing}.")
+        return np.column_stack([
+            records[f].astype(np.float64) if is_temporal(f) else np.round(records[f].astype(np.float64), DECIMALS)
+            for f in self.scorer.features
+        ])
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        peer = writer.get_extra_info("peername") or "local"
+        responses: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDING_REQUESTS)
+
+        async def respond():
+            # Answers go out in request order, even though batches resolve together
+            while True:
+                future = await responses.get()
+                if future is None:
+                    return
+                try:
+                    verdicts = await future
+                except Exception as e:
+                    # Scoring failed: close so the client falls back to local scoring
+                    print(f"[inference-server] Scoring failed for {peer}: {e!r}")
+                    writer.close()
+                    return
+                writer.write(protocol.encode_verdicts(verdicts))
+                await writer.drain()
+
+        responder = asyncio.create_task(respond())
+        try:
+            while True:
+                try:
+                    _, records = await protocol.read_frame(reader, self._dtypes)
+                except asyncio.IncompleteReadError:
+                    break
+                await responses.put(self.batcher.submit(self._features(records)))
+        except (ValueError, ConnectionError) as e:
+            if self.verbose:
+                print(f"[inference-server] Dropping connection from {peer}: {e}")
+        finally:
+            await responses.put(None)
+            try:
+                await responder
+            except ConnectionError:
+                pass
+            self.connections -= 1
+            writer.close()
+
+    async def _report_loop(self) -> None:
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL_SEC)
+            print(f"[inference-server] {self.summary()}")
+
+    async def serve(self, address: str, ready: Optional[asyncio.Event] = None) -> None:
+        """
+        Listen on `address` until cancelled.
+
+        Args:
+            address (str): "unix:/path/to.sock" or "host:port".
+            ready (asyncio.Event, optional): Set once the server is listening.
+        """
+        self.batcher = MicroBatcher(self.scorer, self.max_batch, self.max_delay_ms)
+        self._started = time.monotonic()
+
+        kind, target = protocol.parse_address(address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.remove(target)
+            server = await asyncio.start_unix_server(self._handle, path=target)
+        else:
+            server = await asyncio.start_server(self._handle, host=target[0], port=target[1])
+
+        tasks = [asyncio.create_task(self.batcher.run())]
+        if self.verbose:
+            tasks.append(asyncio.create_task(self._report_loop()))
+            print(f"[inference-server] Serving {self.scorer.family} scorer on {address} "
+                  f"(max_batch={self.max_batch}, max_delay={self.max_delay_ms} ms)")
+        if ready is not None:
+            ready.set()
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            server.close()
+            for task in tasks:
+                task.cancel()
+
+    def summary(self) -> str:
+        b = self.batcher
+        if b is None or not b.requests:
+            return f"connections={self.connections} | samples=0"
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        p50, p99 = np.percentile(b.latencies_ms, [50, 99])
+        return (
+            f"connections={self.connections} | samples={b.samples} ({b.samples / elapsed:.0f}/s) | "
+            f"requests={b.requests} | predict_calls={b.predict_calls} | "
+            f"mean_batch={b.samples / b.predict_calls:.1f} | p50={p50:.2f} ms | p99={p99:.2f} ms"
+        )
+
+
+# =========================
+# CLIENT
+# =========================
+class RemoteScorer:
+    """
+    Scorer that sends batches to an `InferenceServer`.
+
+    Drop-in for a local compiled scorer (`features`, `predict`). If the
+    server cannot be reached, `fallback` scores locally and a reconnect is
+    attempted at most every `retry_sec`, so monitoring never stops.
+
+    Args:
+        address (str): Server address, "host:port" or "unix:/path".
+        features (Sequence[str]): Feature names, in column order of `X`.
+        fallback: Local scorer used while the server is unavailable.
+        host (str, optional): Name reported to the server (default: hostname).
+        timeout (float): Connect / response timeout in seconds.
+        retry_sec (float): Minimum delay between reconnect attempts.
+    """
+
+    family = "remote"
+
+    def __init__(self,
+                 address: str,
+                 features: Sequence[str],
+                 fallback=None,
+                 host: Optional[str] = None,
+                 timeout: float = CONNECT_TIMEOUT_SEC,
+                 retry_sec: float = RETRY_SEC):
+        self.address = address
+        self.features = list(features)
+        self.fallback = fallback
+        self.host = host or socket.gethostname()
+        self.timeout = timeout
+        self.retry_sec = retry_sec
+
+        self.remote_calls = 0
+        self.fallback_calls = 0
+
+        self._dtype = record_dtype(self.features)
+        self._sock: Optional[socket.socket] = None
+        self._next_retry = 0.0
+
+    def _connected(self) -> bool:
+        if self._sock is not None:
+            return True
+        if time.monotonic() < self._next_retry:
+            return False
+        try:
+            self._sock = protocol.connect(self.address, self.timeout)
+            return True
+        except OSError:
+            self._next_retry = time.monotonic() + self.retry_sec
+            return False
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if self._connected():
+            records = np.zeros(len(X), dtype=self._dtype)
+            for i, name in enumerate(self.features):
+                records[name] = X[:, i]
+            try:
+                verdicts = protocol.request_verdicts(self._sock, protocol.encode_frame(self.host, records))
+                self.remote_calls += 1
+                return verdicts.astype(np.int64)
+            except OSError:
+                self._sock.close()
+                self._sock = None
+                self._next_retry = time.monotonic() + self.retry_sec
+
+        if self.fallback is None:
+            raise ConnectionError(f"Inference server unavailable at {self.address}.")
+        self.fallback_calls += 1
+        return self.fallback.predict(X)
+
+    def predict_one(self, values: Sequence[float]) -> int:
+        return int(self.predict(np.asarray(values, dtype=np.float64).reshape(1, -1))[0])
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
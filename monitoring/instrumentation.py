@@ -0,0 +1,273 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence
+
+# =========================
+# CONFIGURATION
+# =========================
+# Upper bucket bounds in microseconds (Prometheus `le`); one +Inf bucket follows
+BUCKETS_US = (
+    5, 10, 25, 50, 100, 250, 500,
+    1_000, 2_500, 5_000, 10_000, 25_000, 50_000,
+    100_000, 250_000, 500_000, 1_000_000,
+)
+EXPORT_INTERVAL_SEC = 10.0   # How often the Prometheus text file is rewritten
+METRIC_PREFIX = "dcml_monitor"
+
+
+# =========================
+# HISTOGRAM
+# =========================
+class Histogram:
+    """
+    Fixed-bucket latency histogram.
+
+    `observe` is a bisect over `BUCKETS_US` plus a few integer updates, so
+    it can run on every tick. Memory does not grow with the number of
+    samples. Percentiles are estimated from the buckets by interpolating
+    inside the bucket, the same way Prometheus' `histogram_quantile` does.
+
+    Args:
+        buckets_us (Sequence[int]): Ascending upper bounds in microseconds.
+    """
+
+    def __init__(self, buckets_us: Sequence[int] = BUCKETS_US):
+        self.bounds_ns = [int(b * 1000) for b in buckets_us]
+        self.counts = [0] * (len(self.bounds_ns) + 1)
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def observe(self, ns: int) -> None:
+        self.counts[bisect_left(self.bounds_ns, ns)] += 1
+        self.count += 1
+        self.sum_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimated q-quantile in microseconds (0 if nothing was observed).
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.bounds_ns[i - 1] if i > 0 else 0
+                high = self.bounds_ns[i] if i < len(self.bounds_ns) else self.max_ns
+                return (low + (high - low) * (rank - seen) / n) / 1000
+            seen += n
+        return self.max_ns / 1000
+
+    def mean_us(self) -> float:
+        return self.sum_ns / self.count / 1000 if self.count else 0.0
+
+
+# =========================
+# INSTRUMENTATION
+# =========================
+class Instrumentation:
+    """
+    Per-stage timings and the agent's own resource usage.
+
+    Stages are timed by the caller with `time.perf_counter_ns` (monotonic)
+    and reported with `observe(stage, ns)`. Each stage should be observed
+    from one thread only, which holds for the monitor: sampling and feature
+    stages run on the main loop, scoring, logging and alerting on the
+    scoring worker.
+
+    The agent's CPU is `time.process_time` (all threads) over wall time,
+    i.e. the share of one core the monitor uses. RSS is read when a report
+    is made. Both are reported as a cumulative value and as the value for
+    the last report interval.
+
+    Args:
+        stages (Sequence[str]): Stage names, in report order. Unknown
+            stages are added on first use.
+        buckets_us (Sequence[int]): Histogram bucket bounds.
+    """
+
+    def __init__(self, stages: Sequence[str] = (), buckets_us: Sequence[int] = BUCKETS_US):
+        self.buckets_us = tuple(buckets_us)
+        self.stages: Dict[str, Histogram] = {name: Histogram(self.buckets_us) for name in stages}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+        self._start_wall = time.monotonic()
+        self._start_cpu = time.process_time()
+        self._last_wall = self._start_wall
+        self._last_cpu = self._start_cpu
+        self._lock = threading.Lock()
+        self._exporter: Optional[threading.Thread] = None
+        self._server = None
+        self._stop = threading.Event()
+
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+
+    def observe(self, stage: str, ns: int) -> None:
+        """
+        Record one duration (nanoseconds) for `stage`.
+        """
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram(self.buckets_us)
+        histogram.observe(ns)
+
+    def add_gauge(self, name: str, fn: Callable[[], float]) -> None:
+        """
+        Export `fn()` as a gauge (e.g. scoring backlog, dropped samples).
+        """
+        self.gauges[name] = fn
+
+    # =========================
+    # RESOURCE USAGE
+    # =========================
+    def rss_bytes(self) -> int:
+        if self._process is not None:
+            return int(self._process.memory_info().rss)
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            return 0
+
+    def cpu_seconds(self) -> float:
+        return time.process_time() - self._start_cpu
+
+    def cpu_core_ratio(self) -> float:
+        """
+        Average share of one core used since start (0.01 = 1% of a core).
+        """
+        wall = time.monotonic() - self._start_wall
+        return self.cpu_seconds() / wall if wall > 0 else 0.0
+
+    def _interval_cpu_ratio(self) -> float:
+        with self._lock:
+            wall, cpu = time.monotonic(), time.process_time()
+            ratio = (cpu - self._last_cpu) / (wall - self._last_wall) if wall > self._last_wall else 0.0
+            self._last_wall, self._last_cpu = wall, cpu
+        return ratio
+
+    # =========================
+    # REPORTING
+    # =========================
+    def summary(self) -> str:
+        """
+        One-line report: agent CPU (last interval and overall), RSS and
+        p50/p99 per stage in microseconds.
+        """
+        parts = [
+            f"agent_cpu={self._interval_cpu_ratio():.2%} of a core (avg {self.cpu_core_ratio():.2%})",
+            f"rss={self.rss_bytes() / 2 ** 20:.1f} MB",
+        ]
+        for name, h in list(self.stages.items()):
+            if h.count:
+                parts.append(f"{name} p50={h.quantile(0.5):.0f}/p99={h.quantile(0.99):.0f} us")
+        return " | ".join(parts)
+
+    def render_prometheus(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        p = METRIC_PREFIX
+        lines: List[str] = [
+            f"# HELP {p}_stage_duration_seconds Time spent per monitor stage.",
+            f"# TYPE {p}_stage_duration_seconds histogram",
+        ]
+        for name, h in list(self.stages.items()):
+            cumulative = 0
+            for bound, n in zip(h.bounds_ns + [None], list(h.counts)):
+                cumulative += n
+                le = "+Inf" if bound is None else f"{bound / 1e9:g}"
+                lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{p}_stage_duration_seconds_sum{{stage="{name}"}} {h.sum_ns / 1e9:.9f}')
+            lines.append(f'{p}_stage_duration_seconds_count{{stage="{name}"}} {cumulative}')
+
+        lines += [
+            f"# HELP {p}_cpu_seconds_total CPU time used by the monitor process (all threads).",
+            f"# TYPE {p}_cpu_seconds_total counter",
+            f"{p}_cpu_seconds_total {self.cpu_seconds():.6f}",
+            f"# HELP {p}_cpu_core_ratio Average share of one core used since start.",
+            f"# TYPE {p}_cpu_core_ratio gauge",
+            f"{p}_cpu_core_ratio {self.cpu_core_ratio():.6f}",
+            f"# HELP {p}_resident_memory_bytes Resident set size of the monitor process.",
+            f"# TYPE {p}_resident_memory_bytes gauge",
+            f"{p}_resident_memory_bytes {self.rss_bytes()}",
+        ]
+        for name, fn in list(self.gauges.items()):
+            lines += [f"# TYPE {p}_{name} gauge", f"{p}_{name} {float(fn()):g}"]
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """
+        Atomically (re)write the metrics file, e.g. for node_exporter's
+        textfile collector.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+    def start_exporter(self,
+                       path: Optional[str] = None,
+                       port: Optional[int] = None,
+                       interval_sec: float = EXPORT_INTERVAL_SEC) -> "Instrumentation":
+        """
+        Export metrics in the background: rewrite `path` every
+        `interval_sec` and/or serve them at http://127.0.0.1:PORT/metrics.
+        """
+        if path:
+            def export_loop():
+                while not self._stop.wait(interval_sec):
+                    self._export(path)
+                self._export(path)
+
+            self._exporter = threading.Thread(target=export_loop, name="metrics-exporter", daemon=True)
+            self._exporter.start()
+
+        if port:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            instrumentation = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = instrumentation.render_prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"[instrumentation] Metrics at http://127.0.0.1:{port}/metrics")
+        return self
+
+    def _export(self, path: str) -> None:
+        try:
+            self.write_textfile(path)
+        except OSError as e:
+            print(f"[instrumentation] Could not write {path}: {e!r}")
+
+    def stop(self) -> None:
+        """
+        Write the metrics file a last time and stop the exporters.
+        """
+        self._stop.set()
+        if self._exporter is not None:
+            self._exporter.join()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,200 @@
+import os
+import csv
+import time
+import atexit
+from typing import List, Optional, Sequence
+
+# =========================
+# CONFIGURATION
+# =========================
+FLUSH_ROWS = 60             # Flush after this many buffered rows
+FLUSH_INTERVAL_SEC = 10.0   # ... or after this many seconds, whichever comes first
+FSYNC_POLICY = "flush"      # "never", "flush" (every flush) or "close" (on close only)
+FILE_BUFFER_BYTES = 1 << 20 # One write() per flush for any realistic batch
+
+FSYNC_POLICIES = ("never", "flush", "close")
+
+# Header names used by older logs for today's columns. Such files are kept
+# in their own column order; columns the logger does not produce (e.g. a
+# hand-filled "label") are left empty.
+LEGACY_COLUMN_NAMES = {"timestamp": "timestamp_ms", "user_time": "datetime_utc"}
+
+
+# =========================
+# LOG SINK
+# =========================
+class CsvLogSink:
+    """
+    Append-only CSV writer that keeps its file open and writes rows in batches.
+
+    Rows are buffered in memory and written with a single `write` call when
+    either `flush_rows` rows are pending or `flush_interval_sec` has elapsed
+    since the last flush. Pending rows are always flushed on `close`, on
+    leaving a `with` block (including Ctrl+C) and at interpreter exit.
+    Existing files with a legacy header (see `LEGACY_COLUMN_NAMES`) are
+    appended to in their own layout.
+
+    Args:
+        path (str): CSV file to append to. Created with a header if missing.
+        columns (Sequence[str]): Column names, in the order rows are given.
+        flush_rows (int): Row count that triggers a flush.
+        flush_interval_sec (float): Maximum age of buffered rows in seconds.
+        fsync_policy (str): When to fsync: "never", "flush" or "close".
+        rotate_bytes (int, optional): After a flush that leaves the file at
+            least this large, seal it as a compressed segment and start a
+            new one (see `storage.retention`).
+        rotate_sec (float, optional): Also rotate once the file has been
+            written for this long.
+    """
+
+    def __init__(self,
+                 path: str,
+                 columns: Sequence[str],
+                 flush_rows: int = FLUSH_ROWS,
+                 flush_interval_sec: float = FLUSH_INTERVAL_SEC,
+                 fsync_policy: str = FSYNC_POLICY,
+                 rotate_bytes: Optional[int] = None,
+                 rotate_sec: Optional[float] = None):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync_policy '{fsync_policy}'. Choose from {list(FSYNC_POLICIES)}.")
+
+        self.path = path
+        self.columns = list(columns)
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval_sec = flush_interval_sec
+        self.fsync_policy = fsync_policy
+        self.rotate_bytes = rotate_bytes
+        self.rotate_sec = rotate_sec
+        self.rotations = 0
+        self._sealing = None
+
+        self._buffer: List[Sequence] = []
+        self._last_flush = time.monotonic()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._open()
+        atexit.register(self.close)
+
+    def _open(self) -> None:
+        needs_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._layout = None if needs_header else self._check_header()
+
+        self._file = open(self.path, "a", newline="", buffering=FILE_BUFFER_BYTES)
+        self._writer = csv.writer(self._file, lineterminator="\n")  # The logs are LF-terminated
+        if not needs_header and not self._ends_with_newline():
+            self._file.write("\n")  # Don't glue the first row onto an unterminated last line
+        if needs_header:
+            self._writer.writerow(self.columns)
+            self._file.flush()
+        self._opened = time.monotonic()
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) in (b"\n", b"\r")
+
+    def _check_header(self) -> Optional[List[Optional[int]]]:
+        """
+        Refuse to append rows of a different schema to an existing file.
+
+        Files that start with a data row (no header) are accepted as is.
+
+        Returns:
+            Optional[List[Optional[int]]]: None if rows are written as given;
+            for a legacy header, the index in `columns` of each file column
+            (None for columns left empty).
+        """
+        with open(self.path, newline="") as f:
+            header = next(csv.reader(f), [])
+        try:
+            float(header[0])
+            return None
+        except (IndexError, ValueError):
+            pass
+        if header == self.columns:
+            return None
+
+        names = [LEGACY_COLUMN_NAMES.get(name, name) for name in header]
+        if names != header and all(c in names for c in self.columns):
+            return [self.columns.index(n) if n in self.columns else None for n in names]
+        raise ValueError(
+            f"{self.path} has columns {header}, expected {self.columns}. "
+            f"Use another file for a different metric schema."
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def write_row(self, row: Sequence) -> None:
+        """
+        Buffer one row and flush if the row or time limit is reached.
+
+        Args:
+            row (Sequence): Values in `columns` order.
+        """
+        self._buffer.append(row)
+        if (len(self._buffer) >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval_sec):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write all buffered rows to the file, fsyncing if the policy says so.
+        """
+        self._last_flush = time.monotonic()
+        if not self._buffer or self._file.closed:
+            return
+
+        rows = self._buffer
+        if self._layout is not None:
+            rows = [["" if i is None else row[i] for i in self._layout] for row in rows]
+        self._writer.writerows(rows)
+        self._buffer.clear()
+        self._file.flush()
+
+        if self.fsync_policy == "flush":
+            os.fsync(self._file.fileno())
+
+        if ((self.rotate_bytes and self._file.tell() >= self.rotate_bytes)
+                or (self.rotate_sec and time.monotonic() - self._opened >= self.rotate_sec)):
+            self.rotate()
+
+    def rotate(self) -> None:
+        """
+        Seal the current file as a segment and continue in a fresh file.
+
+        The file is closed and renamed synchronously; compression runs on a
+        background thread so the caller is not stalled.
+        """
+        from storage.retention import seal_in_background
+
+        if self.fsync_policy == "close":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        if self._sealing is not None:
+            self._sealing.join()
+        self._sealing = seal_in_background(self.path, self.columns)
+        self.rotations += 1
+        self._open()
+
+    def close(self) -> None:
+        """
+        Flush pending rows and close the file. Safe to call more than once.
+        """
+        if self._file.closed:
+            return
+
+        self.flush()
+        if self.fsync_policy == "close":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        if self._sealing is not None:
+            self._sealing.join()  # Finish compressing the last rotated segment
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "CsvLogSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,179 @@
+import os
+import threading
+import numpy as np
+from typing import Callable, Optional, Sequence, Tuple
+
+from monitoring.scorer import CompiledScorer, load_lean, load_scorer
+
+# =========================
+# CONFIGURATION
+# =========================
+POLL_SEC = 5.0          # How often the model file is checked for changes
+CANARY_GRID = 5         # Synthetic canary points per feature axis (ratios in [0, 1])
+MAX_CANARY_ROWS = 4_096 # Larger grids (many features) are replaced by seeded random points
+
+
+# =========================
+# HELPERS
+# =========================
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Return (inode, size, mtime_ns) for `path`, or None if it does not exist.
+
+    An atomic `os.replace` always changes the inode, so a swapped-in model
+    is detected even if size and mtime happen to match.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def synthetic_canary(n_features: int, points: int = CANARY_GRID) -> np.ndarray:
+    """
+    Evenly spaced ratio values covering [0, 1] on every feature axis.
+
+    With many features (e.g. temporal ones) the grid would explode, so
+    `MAX_CANARY_ROWS` seeded uniform points are used instead.
+    """
+    if points ** n_features > MAX_CANARY_ROWS:
+        return np.random.default_rng(0).random((MAX_CANARY_ROWS, n_features))
+    axis = np.linspace(0.0, 1.0, points)
+    grid = np.meshgrid(*([axis] * n_features), indexing="ij")
+    return np.stack([g.ravel() for g in grid], axis=1)
+
+
+def validate_scorer(
+    scorer: CompiledScorer,
+    features: Sequence[str],
+    canary: np.ndarray
+) -> Optional[str]:
+    """
+    Check a freshly loaded scorer before it goes live.
+
+    Args:
+        scorer (CompiledScorer): Candidate scorer.
+        features (Sequence[str]): Feature order the monitor produces.
+        canary (np.ndarray): Sample rows in `features` order.
+
+    Returns:
+        Optional[str]: Reason for rejection, or None if the scorer is usable.
+    """
+    if list(scorer.features) != list(features):
+        return f"feature mismatch: expected {list(features)}, got {scorer.features}"
+
+    try:
+        predictions = np.asarray(scorer.predict(canary))
+    except Exception as e:
+        return f"canary predict failed: {e!r}"
+
+    if predictions.shape != (len(canary),):
+        return f"canary returned shape {predictions.shape}, expected ({len(canary)},)"
+    if not np.isin(predictions, (0, 1)).all():
+        return f"canary returned labels outside {{0, 1}}: {np.unique(predictions)}"
+    return None
+
+
+# =========================
+# MODEL WATCHER
+# =========================
+class ModelWatcher:
+    """
+    Hot-reload a joblib pipeline (or a lean `.npz` scorer) on a background thread.
+
+    Every `poll_sec` the watcher stats `path`. When the file changes it
+    loads and compiles the new pipeline off the sampling thread, validates
+    it on a canary sample and, only if it passes, hands the new scorer to
+    `on_swap`. A rejected or half-written file leaves the current scorer
+    in place and is not retried until the file changes again.
+
+    Swapping is a single reference assignment in `on_swap` (for example
+    `ScoringWorker.set_scorer`), so the monitor keeps sampling and scoring
+    throughout a rollout.
+
+    Args:
+        path (str): Pipeline file to watch; `.npz` files are loaded with
+            `monitoring.scorer.load_lean`.
+        features (Sequence[str]): Feature order the monitor produces.
+        on_swap (Callable[[CompiledScorer], None]): Installs a validated scorer.
+        canary_fn (Callable[[], np.ndarray], optional): Returns recent real
+            rows to add to the synthetic canary.
+        poll_sec (float): Polling period in seconds.
+    """
+
+    def __init__(self,
+                 path: str,
+                 features: Sequence[str],
+                 on_swap: Callable[[CompiledScorer], None],
+                 canary_fn: Optional[Callable[[], np.ndarray]] = None,
+                 poll_sec: float = POLL_SEC):
+        self.path = path
+        self.features = list(features)
+        self.on_swap = on_swap
+        self.canary_fn = canary_fn
+        self.poll_sec = poll_sec
+
+        self.reloads = 0
+        self.rejected = 0
+
+        self._signature = file_signature(path)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+
+    def start(self) -> "ModelWatcher":
+        self._thread.start()
+        return self
+
+    def _canary(self) -> np.ndarray:
+        canary = synthetic_canary(len(self.features))
+        if self.canary_fn is not None:
+            recent = np.asarray(self.canary_fn(), dtype=np.float64)
+            if recent.size:
+                canary = np.vstack([canary, recent.reshape(-1, len(self.features))])
+        return canary
+
+    def check(self) -> bool:
+        """
+        Reload the model once if the file changed since the last check.
+
+        Returns:
+            bool: True if a new scorer was swapped in.
+        """
+        signature = file_signature(self.path)
+        if signature is None:
+            if self._signature is not None:
+                print(f"[model-watcher] {self.path} was removed. Keeping current model.")
+            self._signature = None
+            return False
+        if signature == self._signature:
+            return False
+        self._signature = signature
+
+        try:
+            scorer = load_lean(self.path) if self.path.endswith(".npz") else load_scorer(self.path)
+            reason = validate_scorer(scorer, self.features, self._canary())
+        except Exception as e:
+            reason = f"load failed: {e!r}"
+
+        if reason is not None:
+            self.rejected += 1
+            print(f"[model-watcher] Rejected {self.path}: {reason}. Keeping current model.")
+            return False
+
+        self.on_swap(scorer)
+        self.reloads += 1
+        print(f"[model-watcher] Swapped in new {scorer.family} scorer from {self.path}.")
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_sec):
+            self.check()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def summary(self) -> str:
+        return f"reloads={self.reloads} | rejected={self.rejected}"
@@ -0,0 +1,479 @@
+import os
+import re
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# =========================
+# CONFIGURATION
+# =========================
+FEATURES = ["cpu_ratio", "ram_ratio", "disk_ratio"]
+
+# Optional metric groups, in column order. "core" (FEATURES) always comes first.
+METRIC_GROUPS = ("core", "percore", "diskio", "net", "swap", "load", "procs")
+DEFAULT_GROUPS = ("core",)
+
+PROC_STAT = "/proc/stat"
+PROC_MEMINFO = "/proc/meminfo"
+PROC_DISKSTATS = "/proc/diskstats"
+PROC_NET_DEV = "/proc/net/dev"
+PROC_LOADAVG = "/proc/loadavg"
+SYS_BLOCK = "/sys/block"
+DISK_PATH = "/"
+
+READ_BYTES = 4096         # One pread per /proc file per tick
+STAT_READ_BYTES = 65536   # /proc/stat with one line per core ("percore")
+SECTOR_BYTES = 512        # /proc/diskstats always counts 512-byte sectors
+VIRTUAL_DISKS = ("loop", "ram", "zram", "dm-", "md", "sr", "fd")  # Not counted as disk I/O
+VIRTUAL_NICS = ("lo",)
+
+TOP_N = 3                 # Heaviest processes reported by "procs"
+PROC_REFRESH_SEC = 5.0    # Process table scans are O(processes); refresh at most this often
+
+_MEMINFO_KEYS = (b"MemTotal:", b"MemFree:", b"MemAvailable:", b"Buffers:", b"Cached:",
+                 b"SwapTotal:", b"SwapFree:")
+_GROUP_PATTERNS = {
+    "core": r"cpu_ratio|ram_ratio|disk_ratio",
+    "percore": r"cpu\d+_ratio",
+    "diskio": r"disk_(read|write)_(bps|iops)",
+    "net": r"net_(rx|tx)_bps",
+    "swap": r"swap_ratio",
+    "load": r"load(1|5|15)_per_cpu",
+    "procs": r"top\d+_(cpu|rss)_ratio",
+}
+_GROUP_RE = {g: re.compile(f"^(?:{p})$") for g, p in _GROUP_PATTERNS.items()}
+
+
+# =========================
+# SCHEMA
+# =========================
+def normalize_groups(groups: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Validate metric groups and return them in `METRIC_GROUPS` order, "core" first.
+
+    Args:
+        groups (Iterable[str], optional): Group names, or "all".
+
+    Raises:
+        ValueError: Unknown group.
+    """
+    groups = set(groups or DEFAULT_GROUPS)
+    if "all" in groups:
+        groups = set(METRIC_GROUPS)
+    unknown = groups - set(METRIC_GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown metric groups {sorted(unknown)}. Choose from {list(METRIC_GROUPS)}.")
+    return [g for g in METRIC_GROUPS if g == "core" or g in groups]
+
+
+def parse_groups(spec: str) -> List[str]:
+    """
+    Parse a comma-separated `--metrics` option (e.g. "diskio,net" or "all").
+    """
+    return normalize_groups(g.strip() for g in spec.split(",") if g.strip())
+
+
+def group_features(group: str, n_cpus: Optional[int] = None, top_n: int = TOP_N) -> List[str]:
+    """
+    Column names produced by one metric group.
+    """
+    if group == "core":
+        return list(FEATURES)
+    if group == "percore":
+        return [f"cpu{i}_ratio" for i in range(n_cpus or os.cpu_count() or 1)]
+    if group == "diskio":
+        return ["disk_read_bps", "disk_write_bps", "disk_read_iops", "disk_write_iops"]
+    if group == "net":
+        return ["net_rx_bps", "net_tx_bps"]
+    if group == "swap":
+        return ["swap_ratio"]
+    if group == "load":
+        return ["load1_per_cpu", "load5_per_cpu", "load15_per_cpu"]
+    if group == "procs":
+        return [f"top{i + 1}_{kind}_ratio" for i in range(top_n) for kind in ("cpu", "rss")]
+    raise ValueError(f"Unknown metric group '{group}'.")
+
+
+def metric_group(name: str) -> Optional[str]:
+    """
+    Return the metric group a column belongs to, or None if it is not a sampled metric.
+    """
+    for group, pattern in _GROUP_RE.items():
+        if pattern.match(name):
+            return group
+    return None
+
+
+def groups_for_features(features: Sequence[str]) -> List[str]:
+    """
+    Metric groups a sampler must collect to produce `features` (extra names are ignored).
+    """
+    return normalize_groups(g for g in map(metric_group, features) if g is not None)
+
+
+# =========================
+# METRIC SAMPLER
+# =========================
+class MetricSampler:
+    """
+    Sample system metrics with one read per source per tick.
+
+    The "core" group (CPU, RAM and disk usage ratios, `FEATURES`) is
+    always collected. Optional groups add per-core CPU, disk I/O bytes/s
+    and IOPS, network bytes/s, swap usage, load average per CPU and the
+    CPU/RSS shares of the `top_n` heaviest processes (see `group_features`).
+
+    On Linux the sampler keeps each /proc file it needs open and re-reads
+    it with a single `pread` per tick, plus one `statvfs` call for the
+    disk. Counters (CPU jiffies, sectors, bytes) are turned into ratios and
+    rates from the delta since the previous tick. The process table is
+    the one exception: scanning it is O(processes), so "procs" refreshes
+    at most every `PROC_REFRESH_SEC` and repeats its last values in
+    between. Elsewhere the sampler falls back to psutil, calling each
+    psutil function exactly once per tick.
+
+    Values are written into a preallocated `array('d')` in `features`
+    order and returned from `sample()`. The same array is reused on every
+    call, so copy it if you need to keep a sample.
+
+    The core formulas match psutil's: CPU busy time excludes idle, iowait
+    and guest time, RAM used is `MemTotal - MemAvailable`, and disk used
+    counts blocks reserved for root.
+
+    Args:
+        disk_path (str): Mount point whose fullness is reported as `disk_ratio`.
+        use_procfs (bool, optional): Force (True) or disable (False) the
+            /proc reader. Defaults to auto-detection.
+        groups (Iterable[str], optional): Metric groups to collect
+            (default: "core" only).
+        top_n (int): Processes reported by the "procs" group.
+    """
+
+    def __init__(self,
+                 disk_path: str = DISK_PATH,
+                 use_procfs: Optional[bool] = None,
+                 groups: Optional[Iterable[str]] = None,
+                 top_n: int = TOP_N):
+        self.disk_path = disk_path
+        self.groups = normalize_groups(groups)
+        self.top_n = top_n
+        self.n_cpus = os.cpu_count() or 1
+        self.features = [f for g in self.groups for f in group_features(g, self.n_cpus, top_n)]
+        self.values = array("d", [0.0] * len(self.features))
+        self.top_processes: List[Tuple[int, str, float, float]] = []  # (pid, name, cpu, rss)
+
+        if use_procfs is None:
+            use_procfs = os.path.exists(PROC_STAT) and os.path.exists(PROC_MEMINFO)
+        self.use_procfs = use_procfs
+        self._extended = len(self.groups) > 1
+        self._next_proc_scan = 0.0
+
+        if self.use_procfs:
+            self._fds: Dict[str, int] = {}
+            self._stat_fd = self._open(PROC_STAT)
+            self._meminfo_fd = self._open(PROC_MEMINFO)
+            self._stat_bytes = STAT_READ_BYTES if "percore" in self.groups else READ_BYTES
+            if "diskio" in self.groups:
+                self._diskstats_fd = self._open(PROC_DISKSTATS)
+                self._disks = self._physical_disks()
+            if "net" in self.groups:
+                self._net_fd = self._open(PROC_NET_DEV)
+            if "load" in self.groups:
+                self._loadavg_fd = self._open(PROC_LOADAVG)
+            self._page_size = os.sysconf("SC_PAGE_SIZE")
+            self._proc_jiffies: Dict[int, int] = {}
+            self._last_cpu_times = self._read_cpu_times()
+            self._last_busy, self._last_total = self._last_cpu_times[0]
+        else:
+            import psutil
+            self._psutil = psutil
+            psutil.cpu_percent(interval=None)  # prime the CPU delta
+            if "percore" in self.groups:
+                psutil.cpu_percent(interval=None, percpu=True)
+            self._proc_cpu: Dict[int, float] = {}
+
+        self._last_time = time.monotonic()
+        self._last_counters = self._read_counters()
+        self._last_proc_scan = (self._last_time, self._last_total if self.use_procfs else 0)
+
+    def _open(self, path: str) -> int:
+        fd = os.open(path, os.O_RDONLY)
+        self._fds[path] = fd
+        return fd
+
+    # ---- procfs readers ----
+    def _read_cpu_times(self) -> List[Tuple[int, int]]:
+        """
+        Return cumulative (busy, total) jiffies: aggregate first, then one per
+        core if "percore" is collected.
+        """
+        data = os.pread(self._stat_fd, self._stat_bytes, 0)
+        n_lines = self.n_cpus + 1 if "percore" in self.groups else 1
+        result = []
+        for line in data.split(b"\n", n_lines)[:n_lines]:
+            if not line.startswith(b"cpu"):
+                break
+            times = [int(x) for x in line.split()[1:]]
+
+            # user nice system idle iowait irq softirq steal guest guest_nice
+            total = sum(times) - sum(times[8:10])
+            busy = total - times[3] - (times[4] if len(times) > 4 else 0)
+            result.append((busy, total))
+        return result
+
+    def _read_meminfo(self) -> Dict[bytes, int]:
+        """
+        Return the memory and swap fields of /proc/meminfo in kB.
+        """
+        data = os.pread(self._meminfo_fd, READ_BYTES, 0)
+        wanted = len(_MEMINFO_KEYS) if self._extended else 5
+        mems = {}
+        for line in data.split(b"\n"):
+            parts = line.split()
+            if len(parts) >= 2 and parts[0] in _MEMINFO_KEYS:
+                mems[parts[0]] = int(parts[1])
+                if len(mems) >= wanted:
+                    break
+        return mems
+
+    @staticmethod
+    def _physical_disks() -> Optional[set]:
+        """
+        Whole block devices whose I/O is counted (partitions and virtual disks excluded).
+        """
+        if not os.path.isdir(SYS_BLOCK):
+            return None
+        return {name for name in os.listdir(SYS_BLOCK) if not name.startswith(VIRTUAL_DISKS)}
+
+    def _read_counters(self) -> Dict[str, Tuple[int, ...]]:
+        """
+        Return the cumulative counters behind the rate metrics.
+        """
+        counters = {}
+        if "diskio" in self.groups:
+            if self.use_procfs:
+                reads = writes = read_sectors = write_sectors = 0
+                for line in os.pread(self._diskstats_fd, STAT_READ_BYTES, 0).split(b"\n"):
+                    fields = line.split()
+                    if len(fields) < 10:
+                        continue
+                    name = fields[2].decode()
+                    if (name.startswith(VIRTUAL_DISKS) if self._disks is None else name not in self._disks):
+                        continue
+                    reads += int(fields[3])
+                    read_sectors += int(fields[5])
+                    writes += int(fields[7])
+                    write_sectors += int(fields[9])
+                counters["diskio"] = (read_sectors * SECTOR_BYTES, write_sectors * SECTOR_BYTES, reads, writes)
+            else:
+                io = self._psutil.disk_io_counters()
+                counters["diskio"] = (io.read_bytes, io.write_bytes, io.read_count, io.write_count) if io else (0, 0, 0, 0)
+
+        if "net" in self.groups:
+            rx = tx = 0
+            if self.use_procfs:
+                for line in os.pread(self._net_fd, STAT_READ_BYTES, 0).split(b"\n")[2:]:
+                    name, _, rest = line.partition(b":")
+                    fields = rest.split()
+                    if len(fields) < 9 or name.strip().decode() in VIRTUAL_NICS:
+                        continue
+                    rx += int(fields[0])
+                    tx += int(fields[8])
+            else:
+                for name, io in self._psutil.net_io_counters(pernic=True).items():
+                    if name not in VIRTUAL_NICS and not name.lower().startswith("loopback"):
+                        rx += io.bytes_recv
+                        tx += io.bytes_sent
+            counters["net"] = (rx, tx)
+        return counters
+
+    def _scan_processes(self, mem_total_kb: int, total_jiffies: int, now: float) -> None:
+        """
+        Rank processes by CPU share since the previous scan (/proc/<pid>/stat).
+        """
+        last_time, last_total = self._last_proc_scan
+        total_delta = total_jiffies - last_total
+        current, usage = {}, []
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry.name}/stat", "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue  # exited during the scan
+            pid = int(entry.name)
+            name = data[data.index(b"(") + 1:data.rindex(b")")].decode(errors="replace")
+            fields = data[data.rindex(b")") + 2:].split()
+            jiffies = int(fields[11]) + int(fields[12])   # utime + stime
+            rss_kb = int(fields[21]) * self._page_size // 1024
+            current[pid] = jiffies
+            cpu = (jiffies - self._proc_jiffies.get(pid, jiffies)) / total_delta if total_delta > 0 else 0.0
+            usage.append((pid, name, cpu, rss_kb / mem_total_kb))
+
+        self._proc_jiffies = current
+        self._last_proc_scan = (now, total_jiffies)
+        usage.sort(key=lambda p: (p[2], p[3]), reverse=True)
+        self.top_processes = usage[:self.top_n]
+
+    def _scan_processes_psutil(self, now: float) -> None:
+        psutil = self._psutil
+        elapsed = now - self._last_proc_scan[0]
+        current, usage = {}, []
+        for p in psutil.process_iter(["name", "cpu_times", "memory_percent"]):
+            times = p.info["cpu_times"]
+            if times is None:
+                continue
+            seconds = times.user + times.system
+            current[p.pid] = seconds
+            cpu = (seconds - self._proc_cpu.get(p.pid, seconds)) / (elapsed * self.n_cpus) if elapsed > 0 else 0.0
+            usage.append((p.pid, p.info["name"] or "", cpu, (p.info["memory_percent"] or 0.0) / 100.0))
+
+        self._proc_cpu = current
+        self._last_proc_scan = (now, 0)
+        usage.sort(key=lambda p: (p[2], p[3]), reverse=True)
+        self.top_processes = usage[:self.top_n]
+
+    # ---- sampling ----
+    def _sample_procfs(self) -> None:
+        cpu_times = self._read_cpu_times()
+        busy, total = cpu_times[0]
+        busy_delta = busy - self._last_busy
+        total_delta = total - self._last_total
+        self._last_busy, self._last_total = busy, total
+
+        if total_delta > 0:
+            cpu_percent = min(max(round(busy_delta / total_delta * 100, 1), 0.0), 100.0)
+        else:
+            cpu_percent = 0.0
+
+        mems = self._read_meminfo()
+        mem_total = mems[b"MemTotal:"]
+        avail = mems.get(b"MemAvailable:")
+        if avail is None:
+            avail = mems[b"MemFree:"] + mems.get(b"Buffers:", 0) + mems.get(b"Cached:", 0)
+
+        st = os.statvfs(self.disk_path)
+
+        values = self.values
+        values[0] = cpu_percent / 100.0
+        values[1] = (mem_total - avail) / mem_total
+        values[2] = (st.f_blocks - st.f_bfree) / st.f_blocks
+
+        if self._extended:
+            self._sample_extended(cpu_times, mems, mem_total)
+
+    def _sample_extended(self, cpu_times: List[Tuple[int, int]], mems: Dict[bytes, int], mem_total: int) -> None:
+        """
+        Fill the optional groups after the core metrics (procfs path).
+        """
+        values = self.values
+        now = time.monotonic()
+        elapsed = now - self._last_time
+        counters = self._read_counters()
+        i = len(FEATURES)
+
+        for group in self.groups[1:]:
+            if group == "percore":
+                pairs = list(zip(cpu_times[1:], self._last_cpu_times[1:]))
+                for core in range(self.n_cpus):
+                    (busy, total), (last_busy, last_total) = pairs[core] if core < len(pairs) else ((0, 0), (0, 0))
+                    values[i] = (busy - last_busy) / (total - last_total) if total > last_total else 0.0
+                    i += 1
+                self._last_cpu_times = cpu_times
+            elif group in ("diskio", "net"):
+                for new, old in zip(counters[group], self._last_counters[group]):
+                    values[i] = (new - old) / elapsed if elapsed > 0 else 0.0
+                    i += 1
+            elif group == "swap":
+                swap_total = mems.get(b"SwapTotal:", 0)
+                values[i] = (swap_total - mems.get(b"SwapFree:", 0)) / swap_total if swap_total else 0.0
+                i += 1
+            elif group == "load":
+                for load in os.pread(self._loadavg_fd, READ_BYTES, 0).split()[:3]:
+                    values[i] = float(load) / self.n_cpus
+                    i += 1
+            elif group == "procs":
+                if now >= self._next_proc_scan:
+                    self._scan_processes(mem_total, cpu_times[0][1], now)
+                    self._next_proc_scan = now + PROC_REFRESH_SEC
+                i = self._write_top(i)
+
+        self._last_time = now
+        self._last_counters = counters
+
+    def _write_top(self, i: int) -> int:
+        values = self.values
+        for rank in range(self.top_n):
+            _, _, cpu, rss = self.top_processes[rank] if rank < len(self.top_processes) else (0, "", 0.0, 0.0)
+            values[i], values[i + 1] = cpu, rss
+            i += 2
+        return i
+
+    def _sample_psutil(self) -> None:
+        psutil = self._psutil
+        vm = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+
+        values = self.values
+        values[0] = psutil.cpu_percent(interval=None) / 100.0
+        values[1] = vm.used / vm.total
+        values[2] = disk.used / disk.total
+
+        if not self._extended:
+            return
+
+        now = time.monotonic()
+        elapsed = now - self._last_time
+        counters = self._read_counters()
+        i = len(FEATURES)
+        for group in self.groups[1:]:
+            if group == "percore":
+                for percent in psutil.cpu_percent(interval=None, percpu=True)[:self.n_cpus]:
+                    values[i] = percent / 100.0
+                    i += 1
+            elif group in ("diskio", "net"):
+                for new, old in zip(counters[group], self._last_counters[group]):
+                    values[i] = (new - old) / elapsed if elapsed > 0 else 0.0
+                    i += 1
+            elif group == "swap":
+                values[i] = psutil.swap_memory().percent / 100.0
+                i += 1
+            elif group == "load":
+                for load in psutil.getloadavg():
+                    values[i] = load / self.n_cpus
+                    i += 1
+            elif group == "procs":
+                if now >= self._next_proc_scan:
+                    self._scan_processes_psutil(now)
+                    self._next_proc_scan = now + PROC_REFRESH_SEC
+                i = self._write_top(i)
+
+        self._last_time = now
+        self._last_counters = counters
+
+    # ---- public API ----
+    def sample(self) -> array:
+        """
+        Take one sample of all metrics.
+
+        Returns:
+            array: The preallocated `values` array, in `features` order.
+        """
+        if self.use_procfs:
+            self._sample_procfs()
+        else:
+            self._sample_psutil()
+        return self.values
+
+    def close(self) -> None:
+        """
+        Close the /proc file descriptors, if any.
+        """
+        if self.use_procfs:
+            for fd in self._fds.values():
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+            self._fds.clear()
@@ -0,0 +1,75 @@
+import time
+
+# =========================
+# CONFIGURATION
+# =========================
+MAX_RATE_HZ = 1000.0
+
+
+# =========================
+# DEADLINE SCHEDULER
+# =========================
+class DeadlineScheduler:
+    """
+    Fixed-rate tick scheduler driven by the monotonic clock.
+
+    Tick k is due at `start + k * interval`, so time spent doing work
+    inside a tick does not push later ticks back (no drift). When a tick
+    finishes after the next deadline has already passed, the next tick
+    fires immediately and counts as an overrun; any older deadlines that
+    also passed are skipped and counted as missed instead of being fired
+    as a burst of late ticks.
+
+    Args:
+        rate_hz (float): Ticks per second, e.g. 1, 10 or 100.
+    """
+
+    def __init__(self, rate_hz: float):
+        if not 0 < rate_hz <= MAX_RATE_HZ:
+            raise ValueError(f"rate_hz must be in (0, {MAX_RATE_HZ}], got {rate_hz}.")
+
+        self.rate_hz = float(rate_hz)
+        self.interval = 1.0 / self.rate_hz
+
+        self.ticks = 0
+        self.overruns = 0
+        self.missed = 0
+        self.max_lateness = 0.0
+
+        self._next = time.monotonic()
+
+    def wait(self) -> int:
+        """
+        Sleep until the next deadline.
+
+        Returns:
+            int: Number of deadlines missed since the previous tick
+            (0 when the schedule is being kept).
+        """
+        self.ticks += 1
+        self._next += self.interval
+        now = time.monotonic()
+
+        if now < self._next:
+            time.sleep(self._next - now)
+            return 0
+
+        lateness = now - self._next
+        missed = int(lateness // self.interval)
+        self.overruns += 1
+        self.missed += missed
+        self.max_lateness = max(self.max_lateness, lateness)
+
+        # Fire now for the latest passed deadline, skipping the older ones
+        self._next += missed * self.interval
+        return missed
+
+    def summary(self) -> str:
+        """
+        One-line report of ticks, overruns and missed deadlines.
+        """
+        return (
+            f"rate={self.rate_hz:g} Hz | ticks={self.ticks} | "
+            f"overruns={self.overruns} | missed={self.missed} | "
+            f"max_lateness={self.max_lateness * 1000:.1f} ms"
+        )
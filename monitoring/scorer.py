@@ -0,0 +1,513 @@
+import os
+import sys
+import argparse
+import tempfile
+import numpy as np
+from typing import List, Sequence
+
+# pandas, joblib and sklearn are imported only where a pickled pipeline is
+# handled, so the lean runtime (`load_lean`) starts without them
+
+# =========================
+# CONFIGURATION
+# =========================
+TREE_LEAF = -1  # sklearn marker for "no child"
+BULK_ROWS = 512  # From this batch size on, tree scorers use sklearn's Cython traversal
+LEAN_FORMAT_VERSION = 1
+
+
+# =========================
+# SCORER CLASSES
+# =========================
+class CompiledScorer:
+    """
+    Base class for scorers compiled from a trained sklearn pipeline.
+
+    A compiled scorer takes raw feature values in `features` order and
+    returns the same class labels as `pipeline.predict`, without building
+    a DataFrame or going through the ColumnTransformer on every call.
+    """
+
+    family = "generic"
+    lean_fields: Sequence[str] = ()  # Attributes saved by `export_lean`
+
+    def __init__(self, features: Sequence[str]):
+        self.features = list(features)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict class labels for a 2-D array of raw feature values.
+
+        Args:
+            X (np.ndarray): Array of shape (n_samples, n_features).
+
+        Returns:
+            np.ndarray: Predicted labels of shape (n_samples,).
+        """
+        raise NotImplementedError
+
+    def predict_one(self, values: Sequence[float]) -> int:
+        """
+        Predict the class label for a single sample.
+
+        Args:
+            values (Sequence[float]): Raw feature values in `features` order.
+
+        Returns:
+            int: Predicted label.
+        """
+        X = np.asarray(values, dtype=np.float64).reshape(1, -1)
+        return int(self.predict(X)[0])
+
+
+class LinearScorer(CompiledScorer):
+    """
+    Logistic Regression with the StandardScaler folded into its weights.
+
+    With z = (x - mean) / scale, the decision function w.z + b becomes
+    (w / scale).x + (b - sum(w * mean / scale)), i.e. a single dot product.
+    """
+
+    family = "linear"
+    lean_fields = ("weights", "bias", "classes")
+
+    def __init__(self, features, mean, scale, coef, intercept, classes):
+        super().__init__(features)
+        coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.weights = coef / scale
+        self.bias = float(intercept[0] - np.sum(coef * mean / scale))
+        self.classes = np.asarray(classes)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        scores = X @ self.weights + self.bias
+        return self.classes[(scores > 0).astype(int)]
+
+    def predict_one(self, values: Sequence[float]) -> int:
+        score = self.bias
+        for w, v in zip(self.weights, values):
+            score += w * v
+        return int(self.classes[1] if score > 0 else self.classes[0])
+
+
+class _FlatTrees:
+    """
+    All trees of an ensemble flattened into shared node arrays.
+
+    Leaves point to themselves and carry an infinite threshold, so walking
+    every tree for a fixed `depth` steps lands on the right leaf without
+    any per-tree branching.
+    """
+
+    lean_fields = ("roots", "feature", "threshold", "children", "values", "depth")
+
+    def __init__(self, trees: List, leaf_values: List[np.ndarray]):
+        n_nodes = [t.node_count for t in trees]
+        offsets = np.concatenate(([0], np.cumsum(n_nodes)[:-1]))
+
+        feature, threshold, children, values = [], [], [], []
+        for tree, offset, leaf_value in zip(trees, offsets, leaf_values):
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == TREE_LEAF
+
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            children.append(np.stack([left, right], axis=1))
+            values.append(leaf_value)
+
+        self.roots = offsets.astype(np.intp)
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold).astype(np.float64)
+        self.children = np.concatenate(children).astype(np.intp)
+        self.values = np.concatenate(values)
+        self.depth = max(int(t.max_depth) for t in trees)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Return the leaf index reached in every tree for every sample.
+
+        Args:
+            X (np.ndarray): Scaled features of shape (n_samples, n_features),
+                already rounded through float32 like sklearn trees do.
+
+        Returns:
+            np.ndarray: Leaf indices of shape (n_samples, n_trees).
+        """
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.depth):
+            go_right = X[rows, self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[nodes, go_right.view(np.int8)]
+        return nodes
+
+
+class _TreeScorer(CompiledScorer):
+    """
+    Shared scaling step for tree ensembles.
+
+    Trees compare float32-rounded scaled inputs against float64 thresholds.
+    Folding the scaler into the thresholds would change that rounding at
+    split boundaries, so the scaler is applied exactly as the pipeline does
+    (same operations, same dtype) to keep predictions bit-identical.
+
+    The flattened NumPy walk wins for the small batches of the live loop;
+    batches of `BULK_ROWS` or more (e.g. offline re-scoring) go to the
+    model's own compiled traversal instead, on the same scaled input.
+    Scorers loaded with `load_lean` have no model and always walk the
+    flattened trees.
+    """
+
+    def __init__(self, features, mean, scale, model):
+        super().__init__(features)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.model = model
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        Z = (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+        return Z.astype(np.float32).astype(np.float64)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        Z = self._scale(X)
+        if self.model is not None and len(Z) >= BULK_ROWS:
+            return self.model.predict(Z)
+        return self._predict_scaled(Z)
+
+    def _predict_scaled(self, Z: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class ForestScorer(_TreeScorer):
+    """
+    Random Forest: average leaf class probabilities, then take the argmax.
+    """
+
+    family = "forest"
+    lean_fields = ("mean", "scale", "n_trees", "classes")
+
+    def __init__(self, features, mean, scale, model):
+        super().__init__(features, mean, scale, model)
+        trees = [est.tree_ for est in model.estimators_]
+        leaf_values = []
+        for tree in trees:
+            proba = tree.value[:, 0, :].astype(np.float64)
+            totals = proba.sum(axis=1, keepdims=True)
+            if not np.allclose(totals, 1.0):
+                # Older sklearn stores raw counts instead of fractions
+                totals[totals == 0] = 1.0
+                proba = proba / totals
+            leaf_values.append(proba)
+
+        self.trees = _FlatTrees(trees, leaf_values)
+        self.n_trees = len(trees)
+        self.classes = np.asarray(model.classes_)
+
+    def _predict_scaled(self, Z: np.ndarray) -> np.ndarray:
+        leaves = self.trees.apply(Z)
+        proba = self.trees.values[leaves].sum(axis=1) / self.n_trees
+        return self.classes[np.argmax(proba, axis=1)]
+
+
+class BoostingScorer(_TreeScorer):
+    """
+    Binary Gradient Boosting: init log-odds plus learning-rate-scaled leaf
+    values, accumulated stage by stage in the same order as sklearn.
+    """
+
+    family = "boosting"
+    lean_fields = ("mean", "scale", "learning_rate", "init_raw", "classes")
+
+    def __init__(self, features, mean, scale, model):
+        super().__init__(features, mean, scale, model)
+        if model.estimators_.shape[1] != 1:
+            raise ValueError("Only binary GradientBoostingClassifier is supported.")
+
+        trees = [est.tree_ for est in model.estimators_[:, 0]]
+        leaf_values = [tree.value[:, 0, 0].astype(np.float64) for tree in trees]
+
+        self.trees = _FlatTrees(trees, leaf_values)
+        self.learning_rate = float(model.learning_rate)
+        self.init_raw = float(
+            model._raw_predict_init(np.zeros((1, len(self.features)), dtype=np.float32))[0, 0]
+        )
+        self.classes = np.asarray(model.classes_)
+
+    def _predict_scaled(self, Z: np.ndarray) -> np.ndarray:
+        leaves = self.trees.apply(Z)
+        stages = self.learning_rate * self.trees.values[leaves]
+        init = np.full((stages.shape[0], 1), self.init_raw)
+        # cumsum is sequential, matching sklearn's stage-by-stage update
+        raw = np.cumsum(np.hstack([init, stages]), axis=1)[:, -1]
+        return self.classes[(raw >= 0).astype(int)]
+
+
+class IsolationForestScorer(_TreeScorer):
+    """
+    Unsupervised Isolation Forest: average isolation depth over the trees.
+
+    Each leaf stores its depth plus the expected depth of the unbuilt
+    subtree below it, c(n_samples). A sample is an anomaly (label 1,
+    otherwise 0) when `2 ** (-mean_depth / c(max_samples))` exceeds the
+    forest's fitted offset. This matches `predict(X) == -1` in sklearn.
+    """
+
+    family = "iforest"
+    lean_fields = ("mean", "scale", "n_trees", "norm", "offset")
+
+    def __init__(self, features, mean, scale, model):
+        super().__init__(features, mean, scale, model)
+        trees = [est.tree_ for est in model.estimators_]
+        leaf_values = []
+        for tree in trees:
+            depth = np.zeros(tree.node_count, dtype=np.float64)
+            for node in range(tree.node_count):  # children always follow their parent
+                if tree.children_left[node] != TREE_LEAF:
+                    depth[tree.children_left[node]] = depth[tree.children_right[node]] = depth[node] + 1
+            leaf_values.append(depth + _average_path_length(tree.n_node_samples))
+
+        self.trees = _FlatTrees(trees, leaf_values)
+        # Trees index a per-estimator feature subset; map to input columns
+        for root, subset, tree in zip(self.trees.roots, model.estimators_features_, trees):
+            span = slice(root, root + tree.node_count)
+            self.trees.feature[span] = np.asarray(subset)[self.trees.feature[span]]
+
+        self.n_trees = len(trees)
+        self.norm = float(_average_path_length(np.array([model.max_samples_]))[0])
+        self.offset = float(model.offset_)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        Z = self._scale(X)
+        if self.model is not None and len(Z) >= BULK_ROWS:
+            return (self.model.predict(Z) == -1).astype(np.int64)
+        return self._predict_scaled(Z)
+
+    def _predict_scaled(self, Z: np.ndarray) -> np.ndarray:
+        depths = self.trees.values[self.trees.apply(Z)].sum(axis=1)
+        scores = -(2 ** (-depths / (self.n_trees * self.norm)))
+        return (scores - self.offset < 0).astype(np.int64)
+
+
+class PipelineScorer(CompiledScorer):
+    """
+    Fallback for pipelines that cannot be compiled: wraps the original
+    preprocessor and model behind the same interface.
+    """
+
+    family = "pipeline"
+
+    def __init__(self, features, preprocessor, model):
+        super().__init__(features)
+        self.preprocessor = preprocessor
+        self.model = model
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        import pandas as pd
+
+        X_raw = pd.DataFrame(X, columns=self.features)
+        return self.model.predict(self.preprocessor.transform(X_raw))
+
+
+# =========================
+# FUNCTION DEFINITIONS
+# =========================
+def _average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """
+    Expected isolation depth of an unbuilt subtree over `n_samples` points, c(n).
+    """
+    n = np.asarray(n_samples, dtype=np.float64)
+    c = np.zeros_like(n)
+    c[n == 2] = 1.0
+    big = n > 2
+    c[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return c
+
+
+def _extract_scaler(preprocessor):
+    """
+    Return (features, mean, scale) if the preprocessor is a single
+    StandardScaler over a list of columns, otherwise None.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    transformers = [t for t in preprocessor.transformers_ if t[0] != "remainder"]
+    if len(transformers) != 1:
+        return None
+
+    _, scaler, columns = transformers[0]
+    if not isinstance(scaler, StandardScaler):
+        return None
+
+    n = len(columns)
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n)
+    return list(columns), np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+def compile_pipeline(pipeline) -> CompiledScorer:
+    """
+    Compile a trained preprocess + classifier pipeline into a fast scorer.
+
+    Args:
+        pipeline (Pipeline): Trained pipeline with `preprocess` and `clf` steps.
+
+    Returns:
+        CompiledScorer: A scorer returning the same labels as `pipeline.predict`.
+
+    Behavior:
+        - LogisticRegression (and the online SGDClassifier) becomes a dot
+          product with the scaler folded in.
+        - RandomForest, GradientBoosting and IsolationForest become
+          flattened tree arrays walked in NumPy (IsolationForest labels:
+          1 = anomaly, 0 = normal).
+        - Anything else falls back to a `PipelineScorer`.
+    """
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, IsolationForest
+
+    preprocessor = pipeline.named_steps["preprocess"]
+    model = pipeline.named_steps["clf"]
+
+    scaler = _extract_scaler(preprocessor)
+    if scaler is None:
+        features = list(preprocessor.feature_names_in_)
+        return PipelineScorer(features, preprocessor, model)
+
+    features, mean, scale = scaler
+
+    if isinstance(model, (LogisticRegression, SGDClassifier)) and model.coef_.shape[0] == 1:
+        return LinearScorer(features, mean, scale, model.coef_, model.intercept_, model.classes_)
+    if isinstance(model, RandomForestClassifier) and model.n_outputs_ == 1:
+        return ForestScorer(features, mean, scale, model)
+    if isinstance(model, GradientBoostingClassifier) and model.estimators_.shape[1] == 1:
+        return BoostingScorer(features, mean, scale, model)
+    if isinstance(model, IsolationForest):
+        return IsolationForestScorer(features, mean, scale, model)
+
+    return PipelineScorer(features, preprocessor, model)
+
+
+def load_scorer(path: str) -> CompiledScorer:
+    """
+    Load a saved joblib pipeline and compile it.
+
+    Args:
+        path (str): Path to the `.joblib` pipeline file.
+
+    Returns:
+        CompiledScorer: Compiled scorer for the pipeline.
+    """
+    import joblib
+
+    return compile_pipeline(joblib.load(path))
+
+
+# =========================
+# LEAN ARTIFACT
+# =========================
+LEAN_SCORERS = {cls.family: cls for cls in (LinearScorer, ForestScorer, BoostingScorer, IsolationForestScorer)}
+
+
+def export_lean(scorer: CompiledScorer, path: str) -> str:
+    """
+    Save a compiled scorer as a self-contained `.npz` artifact.
+
+    The file holds only NumPy arrays: the scaler parameters and the
+    folded weights or flattened trees. `load_lean` rebuilds the scorer
+    from it without pandas, joblib or scikit-learn, and with the same
+    predictions. It is written atomically, so a running monitor can
+    hot-reload it.
+
+    Args:
+        scorer (CompiledScorer): Output of `compile_pipeline`.
+        path (str): Destination `.npz` file.
+
+    Returns:
+        str: `path`.
+
+    Raises:
+        ValueError: The scorer is a `PipelineScorer` (the pipeline could not
+            be compiled, so it needs scikit-learn at run time).
+    """
+    if scorer.family not in LEAN_SCORERS:
+        raise ValueError(f"A {scorer.family} scorer cannot be exported; only {list(LEAN_SCORERS)} can.")
+
+    arrays = {
+        "format_version": np.array(LEAN_FORMAT_VERSION),
+        "family": np.array(scorer.family),
+        "features": np.array(scorer.features, dtype=str),
+    }
+    for field in scorer.lean_fields:
+        arrays[field] = np.asarray(getattr(scorer, field))
+    if hasattr(scorer, "trees"):
+        for field in _FlatTrees.lean_fields:
+            arrays[f"trees_{field}"] = np.asarray(getattr(scorer.trees, field))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".npz", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def load_lean(path: str) -> CompiledScorer:
+    """
+    Load a scorer saved with `export_lean` (NumPy only, no pickles).
+
+    Raises:
+        ValueError: Unknown format version or scorer family.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        version = int(data["format_version"])
+        if version != LEAN_FORMAT_VERSION:
+            raise ValueError(f"{path}: lean format {version}, expected {LEAN_FORMAT_VERSION}.")
+        family = str(data["family"])
+        if family not in LEAN_SCORERS:
+            raise ValueError(f"{path}: unknown scorer family '{family}'.")
+
+        cls = LEAN_SCORERS[family]
+        scorer = cls.__new__(cls)
+        scorer.features = [str(f) for f in data["features"]]
+        for field in cls.lean_fields:
+            value = data[field]
+            setattr(scorer, field, value if value.ndim else value.item())
+
+        if "trees_roots" in data:
+            trees = _FlatTrees.__new__(_FlatTrees)
+            for field in _FlatTrees.lean_fields:
+                value = data[f"trees_{field}"]
+                setattr(trees, field, value if value.ndim else value.item())
+            scorer.trees = trees
+            scorer.model = None
+    return scorer
+
+
+# =========================
+# MAIN
+# =========================
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Export a trained pipeline as a lean .npz scorer artifact.")
+    parser.add_argument("model", help="Trained pipeline (.joblib).")
+    parser.add_argument("out", nargs="?", default=None,
+                        help="Destination .npz (default: next to the model, same name).")
+    args = parser.parse_args(argv)
+
+    out = args.out or os.path.splitext(args.model)[0] + ".npz"
+    scorer = load_scorer(args.model)
+    export_lean(scorer, out)
+    print(f"Exported {scorer.family} scorer ({len(scorer.features)} features) to {out} "
+          f"({os.path.getsize(out) / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
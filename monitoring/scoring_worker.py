@@ -0,0 +1,148 @@
+import time
+import queue
+import threading
+import numpy as np
+from typing import Callable, Optional, Sequence
+
+# =========================
+# CONFIGURATION
+# =========================
+QUEUE_SIZE = 10_000   # Samples buffered between the sampler and the scorer
+MAX_BATCH = 1_000     # Samples scored per vectorized predict call
+POLL_SEC = 0.2        # How often an idle worker checks for shutdown
+ERROR_REPORT_EVERY = 60  # After the first failure, print every Nth one
+
+
+# =========================
+# SCORING WORKER
+# =========================
+class ScoringWorker:
+    """
+    Score samples on a background thread so collection never waits on inference.
+
+    The sampling loop calls `submit` with one row per tick; the worker drains
+    whatever has accumulated, scores it with a single vectorized `predict`
+    call and hands each (row, prediction) pair to `on_result`. If scoring
+    falls so far behind that the queue fills up, new samples are dropped
+    from scoring (and counted) instead of blocking the sampler. A batch
+    whose `predict` or `on_result` raises (e.g. a failed log write) is
+    counted and reported, and the worker carries on with the next one.
+
+    Args:
+        scorer: Object with `predict(X) -> labels` (see `monitoring.scorer`).
+        on_result (Callable[[Sequence, int], None]): Called on the worker
+            thread for every scored row.
+        feature_slice (slice): Which part of each row holds the model features.
+        queue_size (int): Maximum number of pending samples.
+        max_batch (int): Maximum samples per predict call.
+        instrumentation (Instrumentation, optional): Receives the duration
+            of every predict call as stage "score".
+    """
+
+    def __init__(self,
+                 scorer,
+                 on_result: Callable[[Sequence, int], None],
+                 feature_slice: slice,
+                 queue_size: int = QUEUE_SIZE,
+                 max_batch: int = MAX_BATCH,
+                 instrumentation=None):
+        self.scorer = scorer
+        self.on_result = on_result
+        self.feature_slice = feature_slice
+        self.max_batch = max_batch
+        self.instrumentation = instrumentation
+
+        self.scored = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+
+        self._queue: "queue.Queue[Optional[Sequence]]" = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="scoring-worker", daemon=True)
+
+    def start(self) -> "ScoringWorker":
+        self._thread.start()
+        return self
+
+    def submit(self, row: Sequence) -> bool:
+        """
+        Queue one row for scoring without blocking.
+
+        Returns:
+            bool: False if the queue was full and the row was dropped.
+        """
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def set_scorer(self, scorer) -> None:
+        """
+        Replace the scorer; takes effect from the next batch.
+
+        The worker reads `self.scorer` once per batch, so a batch is never
+        scored half by the old model and half by the new one.
+        """
+        self.scorer = scorer
+
+    def backlog(self) -> int:
+        return self._queue.qsize()
+
+    def _score(self, rows) -> None:
+        X = np.array([row[self.feature_slice] for row in rows], dtype=np.float64)
+        scorer = self.scorer
+        start = time.perf_counter_ns()
+        predictions = scorer.predict(X)
+        if self.instrumentation is not None:
+            self.instrumentation.observe("score", time.perf_counter_ns() - start)
+        self.batches += 1
+        self.scored += len(rows)
+        for row, prediction in zip(rows, predictions):
+            self.on_result(row, int(prediction))
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=POLL_SEC)
+            except queue.Empty:
+                continue
+
+            rows = []
+            item = first
+            while True:
+                if item is None:
+                    stopping = True
+                else:
+                    rows.append(item)
+                if len(rows) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if rows:
+                try:
+                    self._score(rows)
+                except Exception as e:  # A dead worker would stop logging and alerts silently
+                    self.errors += 1
+                    if self.errors % ERROR_REPORT_EVERY == 1 or ERROR_REPORT_EVERY == 1:
+                        print(f"[scoring_worker] Batch of {len(rows)} failed ({self.errors} failures so far): {e!r}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Score everything still queued, then stop the worker thread.
+        """
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def summary(self) -> str:
+        return (
+            f"scored={self.scored} | batches={self.batches} | "
+            f"backlog={self.backlog()} | dropped={self.dropped} | errors={self.errors}"
+        )
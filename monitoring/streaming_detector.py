@@ -0,0 +1,270 @@
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+from from_root import from_root
+
+# =========================
+# CONFIGURATION
+# =========================
+UNSUPERVISED_FILE = os.path.join(from_root(), "models", "unsupervised_pipeline_simple.joblib")
+
+DETECTORS = ("hst", "zscore", "iforest")
+
+WINDOW = 250            # Samples per mass window (HST) / effective rolling window (z-score)
+N_TREES = 25
+DEPTH = 8
+HST_THRESHOLD = 0.2     # Anomaly if normalized mass score falls below this
+SIZE_LIMIT = 0.1        # Fraction of WINDOW below which an HST node stops descending
+
+Z_THRESHOLD = 3.5       # Robust z-score (MAD units) above which a sample is an anomaly
+MIN_SCALE = 0.01        # Floor of the MAD estimate (ratios are logged with 4 decimals)
+MAD_TO_SIGMA = 1.4826
+WARMUP = 30             # Samples before the z-score detector may alert
+
+
+# =========================
+# HALF-SPACE TREES
+# =========================
+class HalfSpaceTrees:
+    """
+    Streaming Half-Space Trees detector (Tan, Ting & Liu, 2011).
+
+    Every tree recursively halves a randomly perturbed copy of the feature
+    space. Each node counts the samples of the previous window (`ref`)
+    and of the current one (`latest`). Every `window` samples, `latest`
+    becomes the reference and the counts restart. A sample's score is the
+    reference mass of the deepest node it reaches, scaled by 2**depth.
+    Scores are summed over trees and normalized to [0, 1]. Points in
+    regions that were sparse in the last window score low.
+
+    Memory is fixed (`n_trees * 2**(depth+1)` counters) and every sample
+    costs `n_trees * depth` node visits. A batch is scored in one
+    vectorized pass per window segment: scoring reads only `ref`, so this
+    gives the same results as processing one sample at a time.
+
+    Args:
+        features (Sequence[str]): Feature names, in column order of `X`.
+        window (int): Samples per mass window; nothing is flagged before
+            the first window completes.
+        n_trees (int): Number of trees.
+        depth (int): Tree depth.
+        threshold (float): Normalized score below which a sample is an anomaly.
+        limits (Sequence[tuple], optional): (low, high) range per feature;
+            defaults to (0, 1), the range of the usage ratios.
+        seed (int): Random seed for the tree structure.
+    """
+
+    family = "hst"
+
+    def __init__(self,
+                 features: Sequence[str],
+                 window: int = WINDOW,
+                 n_trees: int = N_TREES,
+                 depth: int = DEPTH,
+                 threshold: float = HST_THRESHOLD,
+                 limits: Optional[Sequence[tuple]] = None,
+                 seed: int = 42):
+        self.features = list(features)
+        self.window = int(window)
+        self.n_trees = n_trees
+        self.depth = depth
+        self.threshold = threshold
+        self.size_limit = SIZE_LIMIT * window
+
+        k = len(self.features)
+        limits = np.asarray(limits if limits is not None else [(0.0, 1.0)] * k, dtype=np.float64)
+        self.low = limits[:, 0]
+        self.span = np.where(limits[:, 1] > limits[:, 0], limits[:, 1] - limits[:, 0], 1.0)
+
+        rng = np.random.default_rng(seed)
+        n_internal = 2 ** depth - 1
+        self.split_dim = np.zeros((n_trees, n_internal), dtype=np.intp)
+        self.split_value = np.zeros((n_trees, n_internal), dtype=np.float64)
+        for t in range(n_trees):
+            # Perturbed workspace around a random point, as in the paper
+            sq = rng.random(k)
+            half = 2 * np.maximum(sq, 1 - sq)
+            self._build(t, 0, sq - half, sq + half, rng)
+
+        n_nodes = 2 ** (depth + 1) - 1
+        self.ref = np.zeros((n_trees, n_nodes), dtype=np.float64)
+        self.latest = np.zeros((n_trees, n_nodes), dtype=np.float64)
+        self.seen = 0
+        self._trees = np.arange(n_trees)
+        self._level_weight = 2.0 ** np.arange(depth + 1)
+        self._max_score = n_trees * window * 2.0 ** depth  # whole window in one leaf of every tree
+
+    def _build(self, tree: int, node: int, mins: np.ndarray, maxs: np.ndarray, rng) -> None:
+        if node >= self.split_dim.shape[1]:
+            return
+        dim = int(rng.integers(len(mins)))
+        mid = (mins[dim] + maxs[dim]) / 2
+        self.split_dim[tree, node] = dim
+        self.split_value[tree, node] = mid
+        left_max, right_min = maxs.copy(), mins.copy()
+        left_max[dim] = right_min[dim] = mid
+        self._build(tree, 2 * node + 1, mins, left_max, rng)
+        self._build(tree, 2 * node + 2, right_min, maxs, rng)
+
+    def _paths(self, U: np.ndarray) -> np.ndarray:
+        """
+        Node index at every level for every sample and tree: (rows, trees, depth + 1).
+        """
+        rows = np.arange(len(U))[:, None]
+        nodes = np.zeros((len(U), self.n_trees), dtype=np.intp)
+        paths = [nodes]
+        for _ in range(self.depth):
+            dims = self.split_dim[self._trees, nodes]
+            go_right = U[rows, dims] > self.split_value[self._trees, nodes]
+            nodes = 2 * nodes + 1 + go_right
+            paths.append(nodes)
+        return np.stack(paths, axis=2)
+
+    def _score(self, paths: np.ndarray) -> np.ndarray:
+        mass = self.ref[self._trees[None, :, None], paths]
+        terminal = mass <= self.size_limit
+        terminal[..., -1] = True
+        stop = np.argmax(terminal, axis=2)
+        stop_mass = np.take_along_axis(mass, stop[..., None], axis=2)[..., 0]
+        return (stop_mass * self._level_weight[stop]).sum(axis=1) / self._max_score
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        """
+        Score a batch in arrival order and learn from it.
+
+        Returns:
+            np.ndarray: Normalized mass scores (low = anomalous); NaN while
+            the first window is still filling.
+        """
+        U = (np.asarray(X, dtype=np.float64) - self.low) / self.span
+        scores = np.empty(len(U))
+        start = 0
+        while start < len(U):
+            # Segment up to the next window boundary
+            end = min(len(U), start + self.window - self.seen % self.window)
+            paths = self._paths(U[start:end])
+            if self.seen >= self.window:
+                scores[start:end] = self._score(paths)
+            else:
+                scores[start:end] = np.nan
+            np.add.at(self.latest, (self._trees[None, :, None], paths), 1.0)
+            self.seen += end - start
+            if self.seen % self.window == 0:
+                self.ref, self.latest = self.latest, self.ref
+                self.latest[:] = 0.0
+            start = end
+        return scores
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        scores = self.score_samples(X)
+        return (scores < self.threshold).astype(np.int64)  # NaN (warm-up) compares False
+
+    def predict_one(self, values: Sequence[float]) -> int:
+        return int(self.predict(np.asarray(values, dtype=np.float64).reshape(1, -1))[0])
+
+
+# =========================
+# ROBUST Z-SCORE
+# =========================
+class RobustZScoreDetector:
+    """
+    Streaming robust z-score on rolling median and MAD estimates.
+
+    The median and the median absolute deviation of every feature are
+    tracked with sign-based stochastic updates. Each step moves by a fixed
+    fraction (about 2 / (window + 1)) of the current scale. This costs O(1)
+    time and memory per sample, unlike an exact rolling median, and a
+    single spike moves the estimates by at most one step. A sample is an
+    anomaly when any feature rises more than `threshold` robust standard
+    deviations (1.4826 MAD) above its median, or deviates either way with
+    `two_sided=True`.
+
+    Args:
+        features (Sequence[str]): Feature names, in column order of `X`.
+        window (int): Effective window length in samples.
+        threshold (float): Robust z-score above which a sample is an anomaly.
+        min_scale (float): Floor of the MAD estimate (flat metrics).
+        warmup (int): Samples before anything is flagged.
+        two_sided (bool): Also flag drops below the median.
+    """
+
+    family = "zscore"
+
+    def __init__(self,
+                 features: Sequence[str],
+                 window: int = WINDOW,
+                 threshold: float = Z_THRESHOLD,
+                 min_scale: float = MIN_SCALE,
+                 warmup: int = WARMUP,
+                 two_sided: bool = False):
+        self.features = list(features)
+        self.rate = 2.0 / (window + 1)
+        self.threshold = threshold
+        self.min_scale = min_scale
+        self.warmup = warmup
+        self.two_sided = two_sided
+
+        self.median: Optional[np.ndarray] = None
+        self.mad = np.full(len(self.features), min_scale)
+        self.seen = 0
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        """
+        Score a batch in arrival order and learn from it.
+
+        Returns:
+            np.ndarray: Largest robust z-score per sample (NaN during warm-up).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        scores = np.empty(len(X))
+        for i, x in enumerate(X):
+            if self.median is None:
+                self.median = x.copy()
+            deviation = x - self.median
+            z = deviation / (MAD_TO_SIGMA * self.mad)
+            scores[i] = (np.abs(z) if self.two_sided else z).max() if self.seen >= self.warmup else np.nan
+
+            step = self.rate * self.mad
+            self.median += step * np.sign(deviation)
+            self.mad = np.maximum(self.mad + step * np.where(np.abs(deviation) > self.mad, 1.0, -1.0),
+                                  self.min_scale)
+            self.seen += 1
+        return scores
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return (self.score_samples(X) > self.threshold).astype(np.int64)  # NaN compares False
+
+    def predict_one(self, values: Sequence[float]) -> int:
+        return int(self.predict(np.asarray(values, dtype=np.float64).reshape(1, -1))[0])
+
+
+# =========================
+# FACTORY
+# =========================
+def make_detector(kind: str, features: Sequence[str], **options):
+    """
+    Build an unsupervised detector with the scorer interface
+    (`features`, `family`, `predict(X) -> 0/1`).
+
+    Args:
+        kind (str): "hst" or "zscore" (learn online from the first sample,
+            no training needed), or "iforest" (the shipped
+            `UNSUPERVISED_FILE` Isolation Forest, compiled).
+        features (Sequence[str]): Feature columns the monitor provides.
+        **options: Detector constructor arguments.
+
+    Raises:
+        ValueError: Unknown kind, or an Isolation Forest trained on other features.
+    """
+    if kind == "hst":
+        return HalfSpaceTrees(features, **options)
+    if kind == "zscore":
+        return RobustZScoreDetector(features, **options)
+    if kind == "iforest":
+        from monitoring.scorer import load_scorer
+        scorer = load_scorer(options.get("path", UNSUPERVISED_FILE))
+        if list(scorer.features) != list(features):
+            raise ValueError(f"{UNSUPERVISED_FILE} expects features {scorer.features}, got {list(features)}.")
+        return scorer
+    raise ValueError(f"Unknown detector '{kind}'. Choose from {list(DETECTORS)}.")
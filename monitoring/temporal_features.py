@@ -0,0 +1,406 @@
+import re
+from collections import deque
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:  # pandas is only needed for the offline (DataFrame) path
+    import pandas as pd
+
+# =========================
+# CONFIGURATION
+# =========================
+BASE_METRICS = ["cpu_ratio", "ram_ratio", "disk_ratio"]
+RATE_METRICS = ["disk_ratio"]   # Metrics that also get a growth rate (per second)
+
+SCALE = 10_000        # Metrics are logged with 4 decimals: work in exact integer units
+DEFAULT_WINDOW = 30   # Samples (30 s at the default 1 Hz)
+MAX_WINDOW = 3_600    # Keeps every integer sum below 2**53, so float conversions are exact
+MAX_GAP_MS = 10_000   # A longer pause (logger restart) starts a fresh window
+CONTEXT_WINDOWS = 4   # Raw rows kept (x window) to continue features across batches
+TIMESTAMP_COLUMNS = ("timestamp_ms", "timestamp")
+
+_NAME = re.compile(r"^(?P<metric>.+)_(?P<stat>ewma|mean|std|max|rate)(?P<window>\d+)$|^(?P<dmetric>.+)_diff$")
+
+
+# =========================
+# NAMING
+# =========================
+def feature_names(metrics: Sequence[str] = BASE_METRICS, window: int = DEFAULT_WINDOW) -> List[str]:
+    """
+    Names of the temporal features for `metrics`, in engine output order.
+
+    Per metric: EWMA (span = window), rolling mean/std/max over the last
+    `window` samples, first difference, plus a growth rate for
+    `RATE_METRICS`.
+    """
+    names = []
+    for m in metrics:
+        names += [f"{m}_ewma{window}", f"{m}_mean{window}", f"{m}_std{window}", f"{m}_max{window}", f"{m}_diff"]
+        if m in RATE_METRICS:
+            names.append(f"{m}_rate{window}")
+    return names
+
+
+def is_temporal(name: str) -> bool:
+    return _NAME.match(name) is not None
+
+
+def parse_feature_names(names: Sequence[str]) -> Optional[Tuple[List[str], int]]:
+    """
+    Recover (metrics, window) from a model's feature list.
+
+    Returns:
+        Optional[Tuple[List[str], int]]: None if no temporal features are used.
+
+    Raises:
+        ValueError: Temporal features with different windows.
+    """
+    metrics, windows = [], set()
+    for name in names:
+        match = _NAME.match(name)
+        if match is None:
+            continue
+        metric = match.group("metric") or match.group("dmetric")
+        if match.group("window"):
+            windows.add(int(match.group("window")))
+        if metric not in metrics:
+            metrics.append(metric)
+
+    if not metrics:
+        return None
+    if len(windows) > 1:
+        raise ValueError(f"Temporal features use several windows: {sorted(windows)}.")
+    return metrics, windows.pop() if windows else DEFAULT_WINDOW
+
+
+# =========================
+# SHARED ARITHMETIC
+# =========================
+def _finish(s, ss, n, mx, first, last, prev, ts_first, ts_last):
+    """
+    Turn exact integer window statistics into feature values.
+
+    Used unchanged by the per-tick engine (arrays of one value per metric)
+    and by the vectorized DataFrame path (arrays of shape (rows, metrics)),
+    so both run the same float operations on the same integers and produce
+    bit-identical results.
+    """
+    mean = s / n / SCALE
+    std = np.sqrt((n * ss - s * s) / (n * n)) / SCALE
+    dt = ts_last - ts_first
+    rate = np.where(dt > 0, (last - first) * 1000 / np.maximum(dt * SCALE, 1), 0.0)
+    return mean, std, mx / SCALE, (last - prev) / SCALE, rate
+
+
+def _ewma_step(e: float, x: float, alpha: float) -> float:
+    return e + alpha * (x - e)
+
+
+# =========================
+# FEATURE ENGINE
+# =========================
+class TemporalFeatureEngine:
+    """
+    Rolling-window features computed identically in training and serving.
+
+    Live: `update(ts_ms, values)` is O(1) per tick regardless of the
+    window. It uses ring buffers with running integer sums for
+    mean/std/rate and monotonic deques for the rolling max.
+
+    Training: `transform(df)` computes the same features over a whole
+    DataFrame with cumulative sums and a rolling max. Only the EWMA, a
+    recurrence, is evaluated as a tight scalar loop.
+
+    Metrics are quantized to the loggers' 4 decimals (integer units of
+    1/`SCALE`) before anything else. All window sums are therefore exact
+    integers, and both paths feed them through the same `_finish`, which
+    makes training and serving features bit-identical. A pause longer
+    than `max_gap_ms` (logger restart) resets the windows in both paths.
+
+    Args:
+        metrics (Sequence[str]): Base metric columns, in `values` order.
+        window (int): Window length in samples (EWMA span = window).
+        max_gap_ms (int): Pause that starts a new window.
+    """
+
+    def __init__(self,
+                 metrics: Sequence[str] = BASE_METRICS,
+                 window: int = DEFAULT_WINDOW,
+                 max_gap_ms: int = MAX_GAP_MS):
+        if not 1 <= window <= MAX_WINDOW:
+            raise ValueError(f"window must be in [1, {MAX_WINDOW}], got {window}.")
+        self.metrics = list(metrics)
+        self.window = int(window)
+        self.alpha = 2.0 / (window + 1)
+        self.max_gap_ms = max_gap_ms
+        self.names = feature_names(self.metrics, self.window)
+        self._rate_cols = [i for i, m in enumerate(self.metrics) if m in RATE_METRICS]
+        self.reset()
+
+    @classmethod
+    def from_feature_names(cls, names: Sequence[str], **kwargs) -> Optional["TemporalFeatureEngine"]:
+        """
+        Build the engine a model's feature list needs, or None if it needs none.
+        """
+        parsed = parse_feature_names(names)
+        if parsed is None:
+            return None
+        metrics, window = parsed
+        return cls(metrics, window, **kwargs)
+
+    # ---- live path ----
+    def reset(self) -> None:
+        k = len(self.metrics)
+        self._q = np.zeros((self.window, k), dtype=np.int64)
+        self._ts = np.zeros(self.window, dtype=np.int64)
+        self._sum = np.zeros(k, dtype=np.int64)
+        self._sumsq = np.zeros(k, dtype=np.int64)
+        self._max = [deque() for _ in range(k)]  # (tick, value), values decreasing
+        self._ewma = [0.0] * k
+        self._prev = np.zeros(k, dtype=np.int64)
+        self._tick = 0
+        self._last_ts = None
+
+    def update(self, ts_ms: int, values: Sequence[float]) -> np.ndarray:
+        """
+        Add one sample and return its features in `names` order.
+
+        Args:
+            ts_ms (int): Sample timestamp (epoch milliseconds).
+            values (Sequence[float]): Metric values in `metrics` order.
+
+        Returns:
+            np.ndarray: Feature values, float64.
+        """
+        if self._last_ts is not None and ts_ms - self._last_ts > self.max_gap_ms:
+            self.reset()
+        self._last_ts = ts_ms
+
+        q = np.rint(np.asarray(values, dtype=np.float64) * SCALE).astype(np.int64)
+        t = self._tick
+        slot = t % self.window
+
+        if t >= self.window:
+            old = self._q[slot]
+            self._sum -= old
+            self._sumsq -= old * old
+        self._q[slot] = q
+        self._ts[slot] = ts_ms
+        self._sum += q
+        self._sumsq += q * q
+
+        n = min(t + 1, self.window)
+        first_slot = (t - n + 1) % self.window
+        prev = self._prev if t > 0 else q
+
+        mx = np.empty(len(q), dtype=np.int64)
+        x = q / SCALE
+        for i, value in enumerate(q.tolist()):
+            dq = self._max[i]
+            while dq and dq[-1][1] <= value:
+                dq.pop()
+            dq.append((t, value))
+            if dq[0][0] <= t - self.window:
+                dq.popleft()
+            mx[i] = dq[0][1]
+            self._ewma[i] = float(x[i]) if t == 0 else _ewma_step(self._ewma[i], float(x[i]), self.alpha)
+
+        mean, std, mxf, diff, rate = _finish(
+            self._sum, self._sumsq, np.int64(n), mx,
+            self._q[first_slot], q, prev, self._ts[first_slot], np.int64(ts_ms)
+        )
+        self._prev = q
+        self._tick += 1
+        return self._assemble(np.asarray(self._ewma), mean, std, mxf, diff, rate)
+
+    def _assemble(self, ewma, mean, std, mx, diff, rate) -> np.ndarray:
+        """
+        Interleave per-statistic arrays (last axis = metric) into `names` order.
+        """
+        columns = []
+        for i in range(len(self.metrics)):
+            columns += [ewma[..., i], mean[..., i], std[..., i], mx[..., i], diff[..., i]]
+            if i in self._rate_cols:
+                columns.append(rate[..., i])
+        return np.stack(columns, axis=-1)
+
+    # ---- training path ----
+    def transform(self, df: "pd.DataFrame", timestamp_column: Optional[str] = None) -> "pd.DataFrame":
+        """
+        Compute the features for every row of a time-ordered DataFrame.
+
+        Args:
+            df (pd.DataFrame): Metrics with a timestamp column and `metrics`.
+            timestamp_column (str, optional): Defaults to the first of
+                `TIMESTAMP_COLUMNS` present.
+
+        Returns:
+            pd.DataFrame: Feature columns (`names`), same index as `df`.
+        """
+        import pandas as pd
+
+        ts_col = timestamp_column or next(c for c in TIMESTAMP_COLUMNS if c in df.columns)
+        ts = df[ts_col].to_numpy(dtype=np.int64)
+        q = np.rint(df[self.metrics].to_numpy(dtype=np.float64) * SCALE).astype(np.int64)
+        rows = len(q)
+        if rows == 0:
+            return pd.DataFrame(columns=self.names, index=df.index, dtype=np.float64)
+
+        idx = np.arange(rows)
+        # Windows never reach back past the start of the current segment
+        breaks = np.flatnonzero(np.diff(ts) > self.max_gap_ms) + 1
+        seg_start = np.zeros(rows, dtype=np.int64)
+        seg_start[breaks] = breaks
+        seg_start = np.maximum.accumulate(seg_start)
+        lo = np.maximum(idx - self.window + 1, seg_start)
+        n = (idx - lo + 1)[:, None]
+
+        zeros = np.zeros((1, q.shape[1]), dtype=np.int64)
+        csum = np.vstack([zeros, np.cumsum(q, axis=0)])
+        csq = np.vstack([zeros, np.cumsum(q * q, axis=0)])
+        s = csum[idx + 1] - csum[lo]
+        ss = csq[idx + 1] - csq[lo]
+
+        mx = np.empty_like(q)
+        bounds = np.concatenate([[0], breaks, [rows]])
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            mx[a:b] = pd.DataFrame(q[a:b]).rolling(self.window, min_periods=1).max().to_numpy(dtype=np.int64)
+
+        prev = np.vstack([q[:1], q[:-1]])
+        prev[seg_start == idx] = q[seg_start == idx]
+
+        mean, std, mxf, diff, rate = _finish(s, ss, n, mx, q[lo], q, prev, ts[lo][:, None], ts[:, None])
+
+        x = q / SCALE
+        ewma = np.empty_like(x)
+        starts = set(bounds[:-1].tolist())
+        for j in range(x.shape[1]):
+            column = x[:, j].tolist()
+            out = ewma[:, j]
+            e = 0.0
+            for i, value in enumerate(column):
+                e = value if i in starts else _ewma_step(e, value, self.alpha)
+                out[i] = e
+
+        return pd.DataFrame(self._assemble(ewma, mean, std, mxf, diff, rate), columns=self.names, index=df.index)
+
+
+# =========================
+# TRAINING HELPER
+# =========================
+def add_temporal_features(
+    df: "pd.DataFrame",
+    window: int = DEFAULT_WINDOW,
+    metrics: Sequence[str] = BASE_METRICS
+) -> Tuple["pd.DataFrame", List[str]]:
+    """
+    Append temporal feature columns to a metrics DataFrame.
+
+    Rows are put in timestamp order first (stable, so already ordered
+    logs are untouched), as the live engine sees them.
+
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: Extended frame and the new column names.
+    """
+    import pandas as pd
+
+    engine = TemporalFeatureEngine(metrics, window)
+    ts_col = next(c for c in TIMESTAMP_COLUMNS if c in df.columns)
+    if not df[ts_col].is_monotonic_increasing:
+        df = df.sort_values(ts_col, kind="stable").reset_index(drop=True)
+    features = engine.transform(df, ts_col)
+    return pd.concat([df, features], axis=1), engine.names
+
+
+def continue_temporal_features(
+    df: "pd.DataFrame",
+    features: Sequence[str],
+    context: Optional["pd.DataFrame"] = None
+) -> Tuple["pd.DataFrame", Optional["pd.DataFrame"]]:
+    """
+    Add the temporal columns named in `features` (if any) to a batch of
+    raw metrics that continues an earlier batch.
+
+    `context` holds the raw rows just before `df`, so rolling windows and
+    the EWMA carry on from the previous batch instead of restarting at
+    its first row. The EWMA is only approximately continued, as
+    `CONTEXT_WINDOWS` windows of history are kept.
+
+    Args:
+        df (pd.DataFrame): Raw metrics rows.
+        features (Sequence[str]): The model's feature columns.
+        context (pd.DataFrame, optional): Context returned by the previous call.
+
+    Returns:
+        Tuple[pd.DataFrame, Optional[pd.DataFrame]]: Rows with the temporal
+        columns added (in timestamp order), and the context for the next
+        call (None when `features` has no temporal features).
+    """
+    import pandas as pd
+
+    engine = TemporalFeatureEngine.from_feature_names(features)
+    if engine is None:
+        return df, None
+
+    ts_col = next(c for c in TIMESTAMP_COLUMNS if c in df.columns)
+    if not df[ts_col].is_monotonic_increasing:
+        df = df.sort_values(ts_col, kind="stable")
+    df = df.reset_index(drop=True)
+
+    raw = df[[ts_col] + engine.metrics]
+    if context is not None:
+        raw = pd.concat([context.set_axis(raw.columns, axis=1), raw], ignore_index=True)
+    temporal = engine.transform(raw, ts_col).iloc[len(raw) - len(df):].set_axis(df.index)
+    context = raw.tail(CONTEXT_WINDOWS * engine.window).reset_index(drop=True)
+    return pd.concat([df, temporal], axis=1), context
+
+
+# =========================
+# LIVE MODEL INPUTS
+# =========================
+class FeatureAssembler:
+    """
+    Build a model's input row from one tick of base metrics.
+
+    Runs the `TemporalFeatureEngine` the model's feature names call for
+    (if any) and orders base and temporal values like `features`.
+
+    Args:
+        features (Sequence[str]): The scorer's feature names.
+        base (Sequence[str]): Base metric names, in sampler order.
+
+    Raises:
+        ValueError: A feature that is neither a base metric nor a temporal
+            feature of one.
+    """
+
+    def __init__(self, features: Sequence[str], base: Sequence[str] = BASE_METRICS):
+        self.features = list(features)
+        self.base = list(base)
+        self.engine = TemporalFeatureEngine.from_feature_names(self.features)
+
+        available = list(self.base)
+        if self.engine is not None:
+            unknown = [m for m in self.engine.metrics if m not in self.base]
+            if unknown:
+                raise ValueError(f"Temporal features need unavailable metrics: {unknown}.")
+            self._engine_idx = [self.base.index(m) for m in self.engine.metrics]
+            available += self.engine.names
+
+        missing = [f for f in self.features if f not in available]
+        if missing:
+            raise ValueError(f"Model needs features that are not computed live: {missing}.")
+        self._order = [available.index(f) for f in self.features]
+        self._identity = self.engine is None and self._order == list(range(len(self.base)))
+
+    def __call__(self, ts_ms: int, values: Sequence[float]) -> Tuple[float, ...]:
+        """
+        Return the model inputs for one sample, in `features` order.
+        """
+        if self._identity:
+            return tuple(values)
+        full = list(values)
+        if self.engine is not None:
+            full += self.engine.update(ts_ms, [values[i] for i in self._engine_idx]).tolist()
+        return tuple(full[i] for i in self._order)
@@ -0,0 +1,375 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from from_root import from_root
+
+from monitoring.scorer import load_scorer
+from monitoring.temporal_features import TemporalFeatureEngine, continue_temporal_features, is_temporal
+from storage.time_index import RangeReader
+
+# =========================
+# CONFIGURATION
+# =========================
+MODEL_PATH = os.path.join(from_root(), "models", "supervised_pipeline_simple.joblib")
+INFERENCE_LOG = os.path.join(from_root(), "output", "test_results", "system_inference_log.csv")
+
+# Columns of main.py's inference log, used when the file has no header row
+INFERENCE_COLUMNS = ["timestamp_ms", "datetime_utc", "cpu_ratio", "ram_ratio", "disk_ratio", "predicted_stress"]
+
+COMPARE_COLUMNS = ("predicted_stress", "label", "pred_label")  # Logged verdicts, first match wins
+TIMESTAMP_COLUMNS = ("timestamp_ms", "timestamp")
+LABELS = np.array(["normal", "anomaly"])
+
+PARTITION_BYTES = 64 << 20   # Target CSV bytes per task
+CHUNK_SIZE = 200_000         # Rows parsed and scored per vectorized call (tree scorers use
+                             # n_rows x n_trees index arrays, so this bounds memory)
+N_JOBS = os.cpu_count() or 1
+
+# Filled in each worker process by `_init_worker`
+_SCORER = None
+
+
+# =========================
+# PARTITIONING
+# =========================
+def csv_layout(path: str) -> Tuple[List[str], int]:
+    """
+    Return the column names of a CSV and the byte offset of its first data row.
+
+    Files without a header row (like main.py's inference log, which was
+    started before headers were written) get `INFERENCE_COLUMNS`.
+    """
+    with open(path, "rb") as f:
+        first = f.readline()
+    fields = first.decode().strip().split(",")
+    try:
+        float(fields[0])
+    except ValueError:
+        return fields, len(first)
+    if len(fields) != len(INFERENCE_COLUMNS):
+        raise ValueError(f"{path} has no header and does not match the inference log layout.")
+    return list(INFERENCE_COLUMNS), 0
+
+
+def csv_partitions(path: str, partition_bytes: int = PARTITION_BYTES) -> List[Tuple[int, int]]:
+    """
+    Split a CSV into byte ranges that start and end on line boundaries.
+
+    Args:
+        path (str): CSV file.
+        partition_bytes (int): Target size of each range.
+
+    Returns:
+        List[Tuple[int, int]]: (start, end) byte offsets covering every data row.
+    """
+    _, data_start = csv_layout(path)
+    size = os.path.getsize(path)
+    bounds = [data_start]
+    with open(path, "rb") as f:
+        offset = data_start + partition_bytes
+        while offset < size:
+            f.seek(offset)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+            offset = f.tell() + partition_bytes
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def plan_tasks(paths: List[str], partition_bytes: int = PARTITION_BYTES) -> List[Dict[str, Any]]:
+    """
+    Build one task per CSV byte range or binary store chunk, in input order.
+    """
+    from storage import metric_store
+
+    tasks = []
+    for path in paths:
+        if path.endswith(".csv"):
+            columns, _ = csv_layout(path)
+            for start, end in csv_partitions(path, partition_bytes):
+                tasks.append({"kind": "csv", "path": path, "columns": columns, "start": start, "end": end})
+        else:
+            for chunk_path in metric_store.list_chunks(path):
+                dtype, _ = metric_store.read_header(chunk_path)
+                tasks.append({"kind": "bin", "path": chunk_path, "columns": list(dtype.names)})
+    return tasks
+
+
+def required_columns(features: List[str]) -> List[str]:
+    """
+    Logged columns a model needs: its plain metric features, plus the
+    timestamp and base metrics its temporal features are computed from.
+    """
+    needed = [f for f in features if not is_temporal(f)]
+    engine = TemporalFeatureEngine.from_feature_names(features)
+    if engine is not None:
+        needed += [m for m in engine.metrics if m not in needed]
+    return needed
+
+
+def check_columns(tasks: List[Dict[str, Any]], features: List[str]) -> None:
+    """
+    Fail before scoring if an input lacks columns the model needs.
+
+    Raises:
+        ValueError: Names the first input and its missing columns.
+    """
+    needed = required_columns(features)
+    temporal = TemporalFeatureEngine.from_feature_names(features) is not None
+    for task in tasks:
+        missing = [c for c in needed if c not in task["columns"]]
+        if temporal and not any(c in task["columns"] for c in TIMESTAMP_COLUMNS):
+            missing.append(TIMESTAMP_COLUMNS[0])
+        if missing:
+            raise ValueError(
+                f"{task['path']} lacks columns {missing} that the model needs "
+                f"(features: {', '.join(features)})."
+            )
+
+
+# =========================
+# WORKER FUNCTIONS
+# =========================
+def _init_worker(model_path: str) -> None:
+    global _SCORER
+    _SCORER = load_scorer(model_path)
+    model = getattr(_SCORER, "model", None)
+    if model is not None and "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)  # parallelism comes from the process pool
+
+
+def _iter_chunks(task: Dict[str, Any], usecols: List[str], chunksize: int):
+    if task["kind"] == "bin":
+        from storage import metric_store
+        records = metric_store.open_chunk(task["path"])
+        for start in range(0, len(records), chunksize):
+            yield metric_store.records_to_frame(records[start:start + chunksize])
+        return
+
+    reader = RangeReader(task["path"], task["start"], task["end"])
+    try:
+        yield from pd.read_csv(
+            reader, header=None, names=task["columns"], usecols=usecols,
+            chunksize=chunksize, engine="c"
+        )
+    finally:
+        reader.close()
+
+
+def _as_binary(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Logged verdicts as 0/1, and a mask of the rows that have one.
+    """
+    known = values.notna().to_numpy()
+    if pd.api.types.is_numeric_dtype(values):
+        return np.where(known, values.to_numpy(), 0).astype(np.int8), known
+    return (values.to_numpy() == "anomaly").astype(np.int8), known
+
+
+def _score_task(task: Dict[str, Any], out_path: Optional[str], chunksize: int) -> Dict[str, int]:
+    """
+    Score one partition in chunks and optionally write its predictions.
+
+    Temporal features are computed per partition in time order, carried
+    across its chunks; windows restart at the start of each partition.
+    Rows without a logged verdict are scored but left out of the
+    comparison.
+
+    Returns:
+        Dict[str, int]: Row count and a logged-vs-new confusion table.
+    """
+    features = _SCORER.features
+    columns = task["columns"]
+    needed = required_columns(features)
+    ts_col = next((c for c in TIMESTAMP_COLUMNS if c in columns), None)
+    logged_col = next((c for c in COMPARE_COLUMNS if c in columns), None)
+    usecols = [c for c in columns if c in needed or c in (ts_col, logged_col)]
+    context = None
+
+    stats = {"rows": 0, "new_anomalies": 0, "compared": 0,
+             "normal_normal": 0, "normal_anomaly": 0, "anomaly_normal": 0, "anomaly_anomaly": 0}
+
+    out = open(out_path, "w", newline="") if out_path else None
+    try:
+        for chunk in _iter_chunks(task, usecols, chunksize):
+            chunk, context = continue_temporal_features(chunk, features, context)
+            X = chunk[features].to_numpy(dtype=np.float64)
+            new = np.asarray(_SCORER.predict(X)).astype(np.int8)
+            stats["rows"] += len(new)
+            stats["new_anomalies"] += int(new.sum())
+
+            result = {}
+            if ts_col is not None:
+                result[ts_col] = chunk[ts_col].to_numpy()
+
+            if logged_col is not None and logged_col in chunk:
+                logged, known = _as_binary(chunk[logged_col])
+                table = np.bincount(logged[known] * 2 + new[known], minlength=4)
+                stats["compared"] += int(known.sum())
+                stats["normal_normal"] += int(table[0])
+                stats["normal_anomaly"] += int(table[1])
+                stats["anomaly_normal"] += int(table[2])
+                stats["anomaly_anomaly"] += int(table[3])
+                result["logged_stress"] = np.where(known, LABELS[logged], "")
+
+            if out is not None:
+                result["rescored_stress"] = LABELS[new]
+                pd.DataFrame(result).to_csv(out, header=False, index=False)
+    finally:
+        if out is not None:
+            out.close()
+    return stats
+
+
+# =========================
+# RESCORING
+# =========================
+def rescore(
+    paths: List[str],
+    model_path: str = MODEL_PATH,
+    out_path: Optional[str] = None,
+    n_jobs: int = N_JOBS,
+    chunksize: int = CHUNK_SIZE,
+    partition_bytes: int = PARTITION_BYTES
+) -> Dict[str, Any]:
+    """
+    Re-score historical logs with a (new) pipeline, in parallel.
+
+    Steps:
+        - Splits CSV files into line-aligned byte ranges and binary stores
+          into daily chunks.
+        - Scores each partition on a process pool with the compiled scorer
+          (loaded once per worker), parsing and predicting in large chunks.
+        - Compares against the logged verdict column (`predicted_stress`
+          for inference logs, `label` for the training CSV) when present;
+          rows with an empty verdict are not compared.
+        - Optionally writes timestamp, logged and rescored verdicts to
+          `out_path`, concatenating the partitions in input order.
+
+    Args:
+        paths (List[str]): CSV logs and/or binary metric stores.
+        model_path (str): Pipeline `.joblib` to score with.
+        out_path (str, optional): Predictions CSV to write.
+        n_jobs (int): Worker processes.
+        chunksize (int): Rows per vectorized scoring call.
+        partition_bytes (int): Target CSV bytes per task.
+
+    Returns:
+        Dict[str, Any]: Totals, verdict changes and throughput.
+
+    Raises:
+        ValueError: An input lacks columns the model needs.
+    """
+    start = time.perf_counter()
+    tasks = plan_tasks(paths, partition_bytes)
+    if not tasks:
+        raise FileNotFoundError(f"No data found in: {paths}")
+
+    check_columns(tasks, load_scorer(model_path).features)
+    if out_path and len({tuple(_output_header(t)) for t in tasks}) > 1:
+        raise ValueError("Inputs have different layouts; write them to separate --out files.")
+
+    workdir = tempfile.mkdtemp(prefix="rescore_", dir=os.path.dirname(os.path.abspath(out_path)) if out_path else None)
+    part_paths = [os.path.join(workdir, f"part_{i:06d}.csv") if out_path else None for i in range(len(tasks))]
+
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, n_jobs),
+                                 initializer=_init_worker,
+                                 initargs=(model_path,)) as pool:
+            futures = [pool.submit(_score_task, task, part, chunksize) for task, part in zip(tasks, part_paths)]
+            results = [f.result() for f in futures]
+
+        if out_path:
+            header = _output_header(tasks[0])
+            with open(out_path, "wb") as out:
+                out.write((",".join(header) + "\n").encode())
+                for part in part_paths:
+                    with open(part, "rb") as f:
+                        shutil.copyfileobj(f, out, 16 << 20)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = {key: sum(r[key] for r in results) for key in results[0]}
+    summary["partitions"] = len(tasks)
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    summary["rows_per_sec"] = round(summary["rows"] / max(summary["seconds"], 1e-9))
+    if summary["compared"]:
+        changed = summary["normal_anomaly"] + summary["anomaly_normal"]
+        summary["changed"] = changed
+        summary["agreement"] = round(1 - changed / summary["compared"], 6)
+    return summary
+
+
+def _output_header(task: Dict[str, Any]) -> List[str]:
+    columns = task["columns"]
+    header = [c for c in TIMESTAMP_COLUMNS if c in columns][:1]
+    if any(c in columns for c in COMPARE_COLUMNS):
+        header.append("logged_stress")
+    return header + ["rescored_stress"]
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print(f"Rescored {summary['rows']} rows in {summary['partitions']} partitions "
+          f"in {summary['seconds']} s ({summary['rows_per_sec']} rows/s)")
+    print(f"New anomalies: {summary['new_anomalies']}")
+    if summary["compared"]:
+        print(f"Compared with logged verdicts: {summary['compared']} rows, "
+              f"agreement {summary['agreement']:.4%}")
+        print(f"  normal  -> normal : {summary['normal_normal']}")
+        print(f"  normal  -> anomaly: {summary['normal_anomaly']}")
+        print(f"  anomaly -> normal : {summary['anomaly_normal']}")
+        print(f"  anomaly -> anomaly: {summary['anomaly_anomaly']}")
+
+
+# =========================
+# MAIN
+# =========================
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Parse command-line options for re-scoring.
+    """
+    parser = argparse.ArgumentParser(description="Re-score historical logs with a pipeline.")
+    parser.add_argument(
+        "--data",
+        nargs="+",
+        default=[INFERENCE_LOG],
+        help="CSV logs and/or binary metric stores (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--model",
+        default=MODEL_PATH,
+        help="Pipeline .joblib to score with (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--out",
+        default=None,
+        help="Write timestamp, logged and rescored verdicts to this CSV."
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=N_JOBS,
+        help="Worker processes (default: all cores)."
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=CHUNK_SIZE,
+        help="Rows per vectorized scoring call (default: %(default)s)."
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    print_summary(rescore(args.data, args.model, args.out, args.jobs, args.chunksize))
@@ -1,14 +1,155 @@
-from training import data_ingestion, data_preprocessing, model_training_and_evaluation
+import argparse
+
+from training import data_ingestion, data_preprocessing, model_training_and_evaluation, incremental, model_cost, fleet
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command-line options for retraining.
+    """
+    parser = argparse.ArgumentParser(description="Retrain the supervised anomaly detector.")
+    parser.add_argument(
+        "--data",
+        default=data_ingestion.PATH,
+        help="Metrics CSV or binary store directory (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--search",
+        choices=model_training_and_evaluation.SEARCH_STRATEGIES,
+        default="grid",
+        help="Hyperparameter search: exhaustive grid or cached successive halving (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=-1,
+        help="Parallel worker budget for the search, or hosts trained at once with --fleet (-1 = all cores)."
+    )
+    parser.add_argument(
+        "--selection",
+        choices=model_cost.SELECTION_STRATEGIES,
+        default=model_cost.SELECTION,
+        help="How the shipped model is chosen: best F1, best F1 within --max-p99-us/--max-size-kb, "
+             "or the fastest Pareto candidate within --f1-tolerance of the best F1 (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--max-p99-us",
+        type=float,
+        default=model_cost.MAX_P99_US,
+        help="Budget: single-sample p99 predict latency in microseconds."
+    )
+    parser.add_argument(
+        "--max-size-kb",
+        type=float,
+        default=None,
+        help="Budget: serialized pipeline size in KB."
+    )
+    parser.add_argument(
+        "--f1-tolerance",
+        type=float,
+        default=model_cost.F1_TOLERANCE,
+        help="F1 a cheaper model may give up in pareto selection (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--fleet",
+        nargs="?",
+        const=fleet.FLEET_DATA_DIR,
+        default=None,
+        metavar="DIR",
+        help="Train one model per host from DIR/<host>.csv or DIR/<host>/ (default DIR: %(const)s)."
+    )
+    parser.add_argument(
+        "--fleet-out",
+        default=fleet.FLEET_MODEL_DIR,
+        help="Fleet mode: root of the per-host model directories (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--hosts",
+        type=lambda value: [h for h in value.split(",") if h],
+        default=None,
+        help="Fleet mode: comma-separated hosts to train (default: all)."
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=float,
+        default=None,
+        help="Fleet mode: memory budget for all workers; limits parallelism, and a worker over its RSS share is killed."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Update the saved model with rows added since the last checkpoint instead of a full rebuild."
+    )
+    parser.add_argument(
+        "--incremental-model",
+        choices=incremental.MODEL_KINDS,
+        default="forest",
+        help="Incremental learner used when bootstrapping: append trees to RF/GB or online SGD (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Compute labelling thresholds with streaming quantile sketches instead of loading the raw data at once."
+    )
+    parser.add_argument(
+        "--validate-sketch",
+        action="store_true",
+        help="With --streaming, also print sketch vs exact thresholds (loads the full dataset; small data only)."
+    )
+    parser.add_argument(
+        "--temporal-window",
+        type=int,
+        default=0,
+        help="Also train on rolling/EWMA/delta features over this many samples (0 = off)."
+    )
+    return parser.parse_args()
+
 
 if __name__=='__main__':
-    df = data_ingestion.load_data()
+    args = parse_args()
+
+    max_size_bytes = args.max_size_kb * 1024 if args.max_size_kb else model_cost.MAX_SIZE_BYTES
+
+    if args.fleet:
+        fleet.train_fleet(
+            data_dir=args.fleet,
+            out_dir=args.fleet_out,
+            max_workers=None if args.jobs == -1 else args.jobs,
+            memory_mb=args.memory_mb,
+            hosts=args.hosts,
+            search=args.search,
+            selection=args.selection,
+            max_p99_us=args.max_p99_us,
+            max_size_bytes=max_size_bytes,
+            f1_tolerance=args.f1_tolerance,
+            temporal_window=args.temporal_window
+        )
+    elif args.incremental:
+        incremental.incremental_update(path=args.data, kind=args.incremental_model)
+    else:
+        if args.streaming or args.validate_sketch:
+            df = data_ingestion.load_training_data_streaming(args.data, validate=args.validate_sketch)
+        else:
+            df = data_ingestion.load_data(args.data)
+        features = data_preprocessing.feature_columns(df)
+
+        if args.temporal_window:
+            from monitoring.temporal_features import add_temporal_features
+            df, temporal = add_temporal_features(df, args.temporal_window)
+            features = features + temporal
+
+        pipeline, X_train, y_train, X_test,y_test = data_preprocessing.preprocess_data(df, features)
 
-    pipeline, X_train, y_train, X_test,y_test = data_preprocessing.preprocess_data(df)
-    
-    best_model, best_params = model_training_and_evaluation.model_training_and_eval(pipeline=pipeline, 
-                                                                                    X_train=X_train, 
-                                                                                    y_train=y_train, 
-                                                                                    X_test=X_test, 
-                                                                                    y_test=y_test)
+        best_model, best_params = model_training_and_evaluation.model_training_and_eval(pipeline=pipeline,
+                                                                                        X_train=X_train,
+                                                                                        y_train=y_train,
+                                                                                        X_test=X_test,
+                                                                                        y_test=y_test,
+                                                                                        search=args.search,
+                                                                                        n_jobs=args.jobs,
+                                                                                        selection=args.selection,
+                                                                                        max_p99_us=args.max_p99_us,
+                                                                                        max_size_bytes=max_size_bytes,
+                                                                                        f1_tolerance=args.f1_tolerance)
 
-    model_training_and_evaluation.save_model_and_params(best_model, best_params)
\ No newline at end of file
+        model_training_and_evaluation.save_model_and_params(best_model, best_params)
@@ -1,3 +1,6 @@
+import sys
+import json
+import argparse
 from tests import cpu_test, ram_test, disk_test # type: ignore
 from typing import Callable
 
@@ -33,10 +36,50 @@ def run_test(mode: str = 'cpu') -> None:
         print(f"\n{mode.upper()} test canceled by user.")
 
 
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command-line options; without any, the interactive menu runs.
+    """
+    parser = argparse.ArgumentParser(description="System stress test runner.")
+    parser.add_argument(
+        "--scenario",
+        default=None,
+        help="Run a JSON (or YAML, with PyYAML) scenario of concurrent stressors non-interactively "
+             "(see tests/scenarios/example.json)."
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Validate the scenario and print the resolved plan without running it."
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["cpu", "ram", "disk"],
+        default=None,
+        help="Run a single test non-interactively and exit."
+    )
+    return parser.parse_args()
+
+
 # =========================
 # MAIN
 # =========================
 if __name__ == '__main__':
+    args = parse_args()
+
+    if args.scenario:
+        from tests.scenario import load_scenario, run_scenario
+
+        scenario = load_scenario(args.scenario)
+        if args.dry_run:
+            print(json.dumps(scenario, indent=2))
+            sys.exit(0)
+        sys.exit(run_scenario(scenario))
+
+    if args.mode:
+        run_test(args.mode)
+        sys.exit(0)
+
     print("System Stress Test Runner (CTRL+C cancels a test, not the script)")
 
     while True:
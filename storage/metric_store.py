@@ -0,0 +1,447 @@
+import os
+import sys
+import json
+import time
+import atexit
+import struct
+import argparse
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, List, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:  # pandas is imported where frames are built, so writers start without it
+    import pandas as pd
+
+# =========================
+# CONFIGURATION
+# =========================
+MAGIC = b"DCMLREC1"
+HEADER_ALIGN = 64           # Header is padded so records start on a 64-byte boundary
+CHUNK_PREFIX = "metrics_"
+CHUNK_SUFFIX = ".bin"
+
+TIMESTAMP_COLUMN = "timestamp_ms"
+SKIPPED_COLUMNS = {"datetime_utc"}  # Derivable from timestamp_ms, not stored
+DECIMALS = 4                        # Precision the loggers round metrics to
+
+FLUSH_ROWS = 60
+FLUSH_INTERVAL_SEC = 10.0
+FSYNC_POLICY = "flush"
+FSYNC_POLICIES = ("never", "flush", "close")
+
+
+# =========================
+# FORMAT HELPERS
+# =========================
+def record_dtype(columns: Sequence[str]) -> np.dtype:
+    """
+    Build the fixed-width record dtype for a logger's column list.
+
+    `timestamp_ms` is stored as int64, `datetime_utc` is dropped (it is
+    rebuilt from the timestamp on export) and every other column is a
+    float32 metric.
+
+    Args:
+        columns (Sequence[str]): Logger CSV columns.
+
+    Returns:
+        np.dtype: Little-endian structured dtype.
+    """
+    fields = []
+    for name in columns:
+        if name in SKIPPED_COLUMNS:
+            continue
+        fields.append((name, "<i8" if name == TIMESTAMP_COLUMN else "<f4"))
+    return np.dtype(fields)
+
+
+def encode_header(dtype: np.dtype) -> bytes:
+    """
+    Encode a chunk header: magic, header length and a JSON field list.
+    """
+    schema = json.dumps({"version": 1, "fields": dtype.descr}).encode()
+    size = len(MAGIC) + 4 + len(schema)
+    size += -size % HEADER_ALIGN
+    header = MAGIC + struct.pack("<I", size) + schema
+    return header.ljust(size, b" ")
+
+
+def read_header(path: str):
+    """
+    Read a chunk header.
+
+    Returns:
+        Tuple[np.dtype, int]: Record dtype and header length in bytes.
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(len(MAGIC) + 4)
+        if prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a metric chunk file: {path}")
+        (size,) = struct.unpack("<I", prefix[len(MAGIC):])
+        schema = json.loads(f.read(size - len(prefix)).decode().rstrip())
+    fields = [(name, fmt) for name, fmt in schema["fields"]]
+    return np.dtype(fields), size
+
+
+def chunk_name(timestamp_ms: int) -> str:
+    """
+    Name of the daily (UTC) chunk file a timestamp belongs to.
+    """
+    day = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+    return f"{CHUNK_PREFIX}{day:%Y%m%d}{CHUNK_SUFFIX}"
+
+
+def list_chunks(path: str) -> List[str]:
+    """
+    Return the chunk files for a store directory (or a single chunk path),
+    oldest first.
+    """
+    if os.path.isfile(path):
+        return [path]
+    if not os.path.isdir(path):
+        return []
+    names = sorted(
+        n for n in os.listdir(path)
+        if n.startswith(CHUNK_PREFIX) and n.endswith(CHUNK_SUFFIX)
+    )
+    return [os.path.join(path, n) for n in names]
+
+
+def is_store(path: str) -> bool:
+    """
+    True if `path` is a chunk file or a directory of chunk files.
+    """
+    return path.endswith(CHUNK_SUFFIX) or os.path.isdir(path)
+
+
+# =========================
+# READING
+# =========================
+def open_chunk(path: str) -> np.memmap:
+    """
+    Memory-map one chunk file as a structured record array.
+
+    A torn trailing record (e.g. from a crash mid-write) is ignored.
+    """
+    dtype, offset = read_header(path)
+    n = (os.path.getsize(path) - offset) // dtype.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(n,))
+
+
+def load_records(path: str) -> np.ndarray:
+    """
+    Load every record of a store as one structured array.
+
+    Args:
+        path (str): Store directory or single chunk file.
+
+    Returns:
+        np.ndarray: Records in file order. A single chunk is returned as a
+        zero-copy memmap.
+    """
+    chunks = [open_chunk(p) for p in list_chunks(path)]
+    if not chunks:
+        raise FileNotFoundError(f"No metric chunks found at: {path}")
+    if len(chunks) == 1:
+        return chunks[0]
+    return np.concatenate(chunks)
+
+
+def records_to_frame(records: np.ndarray, decimals: int = DECIMALS) -> "pd.DataFrame":
+    """
+    Convert structured records to the DataFrame layout of the CSV loggers.
+
+    float32 metrics are widened and rounded back to the loggers' precision
+    so values match what the CSV path would have produced.
+    """
+    import pandas as pd
+
+    data = {}
+    for name in records.dtype.names:
+        column = np.asarray(records[name])
+        if name == TIMESTAMP_COLUMN:
+            data[name] = column.astype(np.int64)
+        else:
+            data[name] = np.round(column.astype(np.float64), decimals)
+    return pd.DataFrame(data)
+
+
+def read_frame(path: str) -> "pd.DataFrame":
+    """
+    Read a binary metric store into a DataFrame.
+
+    Args:
+        path (str): Store directory or single chunk file.
+
+    Returns:
+        pd.DataFrame: One row per record, `timestamp_ms` plus metric columns.
+    """
+    return records_to_frame(load_records(path))
+
+
+def read_frame_after(path: str, after_ms: int) -> "pd.DataFrame":
+    """
+    Read only the records with `timestamp_ms > after_ms`.
+
+    Daily chunks that end before `after_ms` are skipped by name and the
+    first relevant chunk is entered with a binary search, so the cost is
+    proportional to the new data rather than the whole history.
+
+    Args:
+        path (str): Store directory or single chunk file.
+        after_ms (int): Exclusive lower bound (epoch milliseconds).
+
+    Returns:
+        pd.DataFrame: New records in file order (possibly empty).
+    """
+    import pandas as pd
+
+    first_chunk = chunk_name(after_ms)
+    parts = []
+    for chunk_path in list_chunks(path):
+        if os.path.isdir(path) and os.path.basename(chunk_path) < first_chunk:
+            continue
+        records = open_chunk(chunk_path)
+        start = np.searchsorted(records[TIMESTAMP_COLUMN], after_ms, side="right")
+        if start < len(records):
+            parts.append(records_to_frame(records[start:]))
+
+    if not parts:
+        dtype, _ = read_header(list_chunks(path)[0])
+        return records_to_frame(np.zeros(0, dtype=dtype))
+    return pd.concat(parts, ignore_index=True)
+
+
+def export_csv(path: str, csv_path: str) -> int:
+    """
+    Export a binary store to CSV with the metric logger's schema.
+
+    Args:
+        path (str): Store directory or single chunk file.
+        csv_path (str): Destination CSV file.
+
+    Returns:
+        int: Number of rows written.
+    """
+    import pandas as pd
+
+    df = read_frame(path)
+    dt = pd.to_datetime(df[TIMESTAMP_COLUMN], unit="ms").dt.strftime("%Y-%m-%dT%H:%M:%S.%f")
+    df.insert(1, "datetime_utc", dt)
+    df.to_csv(csv_path, index=False)
+    return len(df)
+
+
+def import_csv(csv_path: str, path: str, timestamp_column: str = TIMESTAMP_COLUMN) -> int:
+    """
+    Convert an existing metrics CSV into a binary store.
+
+    Args:
+        csv_path (str): Source CSV file.
+        path (str): Destination store directory.
+        timestamp_column (str): Name of the epoch-milliseconds column in the CSV.
+
+    Returns:
+        int: Number of rows imported.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(csv_path).rename(columns={timestamp_column: TIMESTAMP_COLUMN})
+    columns = [TIMESTAMP_COLUMN] + [
+        c for c in df.columns
+        if c != TIMESTAMP_COLUMN and pd.api.types.is_numeric_dtype(df[c])
+    ]
+    with BinaryLogSink(path, columns, fsync_policy="close") as sink:
+        records = np.zeros(len(df), dtype=sink.dtype)
+        for name in sink.dtype.names:
+            records[name] = df[name].to_numpy()
+        sink.write_records(records)
+    return len(df)
+
+
+# =========================
+# WRITING
+# =========================
+class BinaryLogSink:
+    """
+    Append-only writer for daily fixed-width record chunks.
+
+    Drop-in replacement for `monitoring.log_sink.CsvLogSink`: rows are given
+    in `columns` order, buffered in a preallocated record array and written
+    with one `write` per flush. Each UTC day goes to its own chunk file,
+    which starts with a small self-describing header.
+
+    Args:
+        path (str): Store directory.
+        columns (Sequence[str]): Logger columns, in the order rows are given.
+        flush_rows (int): Row count that triggers a flush.
+        flush_interval_sec (float): Maximum age of buffered rows in seconds.
+        fsync_policy (str): When to fsync: "never", "flush" or "close".
+    """
+
+    def __init__(self,
+                 path: str,
+                 columns: Sequence[str],
+                 flush_rows: int = FLUSH_ROWS,
+                 flush_interval_sec: float = FLUSH_INTERVAL_SEC,
+                 fsync_policy: str = FSYNC_POLICY):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync_policy '{fsync_policy}'. Choose from {list(FSYNC_POLICIES)}.")
+
+        self.path = path
+        self.columns = list(columns)
+        self.dtype = record_dtype(self.columns)
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval_sec = flush_interval_sec
+        self.fsync_policy = fsync_policy
+
+        # Positions of the stored columns inside incoming rows
+        self._keep = [i for i, c in enumerate(self.columns) if c not in SKIPPED_COLUMNS]
+        self._ts_pos = self.dtype.names.index(TIMESTAMP_COLUMN)
+
+        self._buffer = np.zeros(self.flush_rows, dtype=self.dtype)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        self._file = None
+        self._chunk = None
+        self.closed = False
+
+        os.makedirs(path, exist_ok=True)
+        atexit.register(self.close)
+
+    def _open_chunk(self, name: str) -> None:
+        if self._file is not None:
+            self._sync_if("flush")
+            self._file.close()
+
+        chunk_path = os.path.join(self.path, name)
+        exists = os.path.exists(chunk_path) and os.path.getsize(chunk_path) > 0
+        if exists:
+            dtype, offset = read_header(chunk_path)
+            if dtype != self.dtype:
+                raise ValueError(f"Schema mismatch with existing chunk: {chunk_path}")
+            # Drop a torn trailing record (crash mid-write), or every record
+            # appended after it would be misaligned
+            size = os.path.getsize(chunk_path)
+            valid = offset + (size - offset) // dtype.itemsize * dtype.itemsize
+            if size > valid:
+                os.truncate(chunk_path, valid)
+
+        self._file = open(chunk_path, "ab")
+        if not exists:
+            self._file.write(encode_header(self.dtype))
+        self._chunk = name
+
+    def _sync_if(self, policy: str) -> None:
+        if self._file is not None and self.fsync_policy == policy:
+            os.fsync(self._file.fileno())
+
+    def write_row(self, row: Sequence) -> None:
+        """
+        Buffer one row and flush if the row or time limit is reached.
+
+        Args:
+            row (Sequence): Values in `columns` order.
+        """
+        self._buffer[self._pending] = tuple(row[i] for i in self._keep)
+        self._pending += 1
+        if (self._pending >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval_sec):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Append buffered records to their daily chunk(s).
+        """
+        self._last_flush = time.monotonic()
+        if self._pending == 0 or self.closed:
+            return
+
+        self._append(self._buffer[:self._pending])
+        self._pending = 0
+
+    def write_records(self, records: np.ndarray) -> None:
+        """
+        Append a whole structured array (with this sink's dtype) at once.
+
+        Args:
+            records (np.ndarray): Time-ordered records.
+        """
+        self.flush()
+        if len(records):
+            self._append(np.ascontiguousarray(records, dtype=self.dtype))
+
+    def _append(self, records: np.ndarray) -> None:
+        days = records[TIMESTAMP_COLUMN] // 86_400_000
+
+        # Records are time-ordered, so split only where the UTC day changes
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        for part in np.split(records, bounds):
+            name = chunk_name(int(part[TIMESTAMP_COLUMN][0]))
+            if name != self._chunk:
+                self._open_chunk(name)
+            self._file.write(part.tobytes())
+
+        self._file.flush()
+        self._sync_if("flush")
+
+    def close(self) -> None:
+        """
+        Flush pending rows and close the current chunk. Safe to call more than once.
+        """
+        if self.closed:
+            return
+
+        self.flush()
+        self._sync_if("close")
+        if self._file is not None:
+            self._file.close()
+        self.closed = True
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "BinaryLogSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+# =========================
+# MAIN
+# =========================
+def main(argv=None) -> None:
+    """
+    Command-line entry point: convert between CSV and the binary store.
+
+    Examples:
+        python -m storage.metric_store import notebooks/Data/system_metrics_binary.csv notebooks/Data/metrics_bin --timestamp-column timestamp
+        python -m storage.metric_store export notebooks/Data/metrics_bin metrics.csv
+    """
+    parser = argparse.ArgumentParser(description="Binary metric store tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Convert a metrics CSV into a binary store.")
+    p_import.add_argument("csv_path")
+    p_import.add_argument("store_path")
+    p_import.add_argument("--timestamp-column", default=TIMESTAMP_COLUMN)
+
+    p_export = sub.add_parser("export", help="Export a binary store to CSV.")
+    p_export.add_argument("store_path")
+    p_export.add_argument("csv_path")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        n = import_csv(args.csv_path, args.store_path, args.timestamp_column)
+        print(f"Imported {n} rows into {args.store_path}")
+    else:
+        n = export_csv(args.store_path, args.csv_path)
+        print(f"Exported {n} rows to {args.csv_path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
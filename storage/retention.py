@@ -0,0 +1,622 @@
+import os
+import csv
+import gzip
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from from_root import from_root
+
+if TYPE_CHECKING:  # pandas is only needed by the offline jobs, not by the loggers
+    import pandas as pd
+
+# =========================
+# CONFIGURATION
+# =========================
+INFERENCE_LOG = os.path.join(from_root(), "output", "test_results", "system_inference_log.csv")
+METRICS_LOG = os.path.join(from_root(), "notebooks", "Data", "system_metrics_binary.csv")
+
+# Columns of main.py's inference log, used when the file has no header row
+INFERENCE_COLUMNS = ["timestamp_ms", "datetime_utc", "cpu_ratio", "ram_ratio", "disk_ratio", "predicted_stress"]
+
+# Logs handled by `python -m storage.retention` without arguments
+DEFAULT_LOGS = {
+    INFERENCE_LOG: INFERENCE_COLUMNS,
+    METRICS_LOG: None,
+}
+
+ROTATE_BYTES = 64 << 20        # Default segment size for --rotate-mb
+RAW_RETENTION_DAYS = 7         # Compressed raw segments are kept this long
+MINUTE_RETENTION_DAYS = 90     # 1-minute rollups are kept this long; hourly ones forever
+
+SEGMENTS_SUFFIX = ".segments"  # <log>.segments/<log>-<first_ms>-<last_ms>.csv.gz
+ROLLUPS_SUFFIX = ".rollups"    # <log>.rollups/<log>_1min.csv, <log>_1h.csv
+COMPRESS_LEVEL = 6
+COMPRESS_GRACE_SEC = 300       # Retention leaves younger plain segments to the logger that sealed them
+COPY_BLOCK_BYTES = 1 << 20
+
+ROLLUP_LEVELS = {"1min": 60_000, "1h": 3_600_000}
+ROLLUP_STATS = ("min", "mean", "max", "p95")
+ROLLUP_QUANTILE = 0.95
+ROLLUP_LEVEL = "1min"          # Level `read_rollup_metrics` trains from by default
+ROLLUP_STAT = "mean"           # Statistic that stands in for the raw metric when training
+
+TIMESTAMP_COLUMN = "timestamp_ms"                # Rollups always use this name
+TIMESTAMP_COLUMNS = ("timestamp_ms", "timestamp")  # Accepted in raw logs, first match wins
+NON_METRIC_COLUMNS = {"timestamp_ms", "timestamp", "predicted_stress", "pred_label", "label"}
+VERDICT_COLUMNS = ("predicted_stress", "pred_label", "label")  # Counted as `anomalies`, first match wins
+
+DAY_MS = 86_400_000
+
+
+# =========================
+# LAYOUT
+# =========================
+def _stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def segment_dir(path: str) -> str:
+    """
+    Directory holding the closed segments of log `path`.
+    """
+    return os.path.splitext(path)[0] + SEGMENTS_SUFFIX
+
+
+def rollup_dir(path: str) -> str:
+    """
+    Directory holding the rollups of log `path`.
+    """
+    return os.path.splitext(path)[0] + ROLLUPS_SUFFIX
+
+
+def rollup_path(path: str, level: str) -> str:
+    """
+    Rollup CSV of log `path` for `level` ("1min" or "1h").
+    """
+    return os.path.join(rollup_dir(path), f"{_stem(path)}_{level}.csv")
+
+
+def list_segments(path: str) -> List[Tuple[int, int, str]]:
+    """
+    Closed segments of a log, oldest first.
+
+    Args:
+        path (str): The active log file or its `.segments` directory.
+
+    Returns:
+        List[Tuple[int, int, str]]: (first_ms, last_ms, segment path). Plain
+        segments whose compression has not finished are included, unless
+        their `.gz` is already in place.
+    """
+    directory = path if path.endswith(SEGMENTS_SUFFIX) else segment_dir(path)
+    if not os.path.isdir(directory):
+        return []
+
+    names = set(os.listdir(directory))
+    segments = []
+    for name in names:
+        if not (name.endswith(".csv") or name.endswith(".csv.gz")):
+            continue
+        if name + ".gz" in names:  # Compressed; the plain file is about to be removed
+            continue
+        try:
+            first, last = name[:name.index(".csv")].rsplit("-", 2)[1:]
+            segments.append((int(first), int(last), os.path.join(directory, name)))
+        except ValueError:
+            continue
+    return sorted(segments)
+
+
+def is_rollup(path: str) -> bool:
+    """
+    True if `path` is a rollup directory or a rollup CSV inside one.
+    """
+    path = path.rstrip(os.sep)
+    return path.endswith(ROLLUPS_SUFFIX) or os.path.dirname(path).endswith(ROLLUPS_SUFFIX)
+
+
+def is_segments(path: str) -> bool:
+    """
+    True if `path` is a `.segments` directory.
+    """
+    return path.rstrip(os.sep).endswith(SEGMENTS_SUFFIX)
+
+
+# =========================
+# ROTATION
+# =========================
+def csv_header(path: str, columns: Optional[Sequence[str]] = None) -> Tuple[List[str], bool]:
+    """
+    Column names of a log and whether the file starts with a header row.
+
+    Files without a header (like the early inference log) use `columns`,
+    or `INFERENCE_COLUMNS` if the field count matches.
+
+    Raises:
+        ValueError: If the file has no header and its columns are unknown.
+    """
+    with open(path, newline="") as f:
+        first = next(csv.reader(f), [])
+    try:
+        float(first[0])
+    except (IndexError, ValueError):
+        return first, True
+    columns = columns or INFERENCE_COLUMNS
+    if len(columns) != len(first):
+        raise ValueError(f"{path} has no header row; pass its columns.")
+    return list(columns), False
+
+
+def _time_range(path: str, has_header: bool) -> Tuple[int, int]:
+    """
+    First and last `timestamp_ms` of a log (first column), reading only its ends.
+    """
+    with open(path, "rb") as f:
+        if has_header:
+            f.readline()
+        first = f.readline()
+        f.seek(max(0, os.path.getsize(path) - 4096))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    return int(first.split(b",")[0]), int(lines[-1].split(b",")[0])
+
+
+def compress_segment(plain_path: str, level: int = COMPRESS_LEVEL) -> str:
+    """
+    Gzip a plain segment block by block and remove the original.
+
+    The `.gz` is written under a unique temporary name and renamed when
+    complete, so an interrupted run leaves the plain segment for the next
+    attempt. A logger's background compression and a retention pass may
+    work on the same segment at once: an existing `.gz` or a vanished
+    plain file means the other one got there first.
+
+    Returns:
+        str: Path of the compressed segment.
+    """
+    gz_path = plain_path + ".gz"
+    if not os.path.exists(gz_path):
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(gz_path) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(gz_path))
+        try:
+            with open(plain_path, "rb") as src, os.fdopen(fd, "wb") as raw, \
+                    gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=level) as dst:
+                shutil.copyfileobj(src, dst, COPY_BLOCK_BYTES)
+        except FileNotFoundError:
+            os.remove(tmp)
+            return gz_path
+        except BaseException:
+            os.remove(tmp)
+            raise
+        os.replace(tmp, gz_path)
+    try:
+        os.remove(plain_path)
+    except FileNotFoundError:
+        pass
+    return gz_path
+
+
+def seal_segment(path: str,
+                 columns: Optional[Sequence[str]] = None,
+                 compress: bool = True) -> Optional[str]:
+    """
+    Move a closed log file into its segments directory and compress it.
+
+    The segment is named after its first and last timestamp, so queries and
+    retention can skip segments without opening them. A header row is added
+    to files that lack one. The log file must not be open for writing
+    (`CsvLogSink` closes it before sealing).
+
+    Args:
+        path (str): Log file to seal. Missing or header-only files are left alone.
+        columns (Sequence[str], optional): Columns of a header-less file.
+        compress (bool): Gzip the segment right away.
+
+    Returns:
+        str or None: Segment path, or None if there was nothing to seal.
+    """
+    if not os.path.exists(path):
+        return None
+    names, has_header = csv_header(path, columns)
+    try:
+        first_ms, last_ms = _time_range(path, has_header)
+    except (IndexError, ValueError):
+        return None  # Header only
+
+    directory = segment_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    segment = os.path.join(directory, f"{_stem(path)}-{first_ms}-{last_ms}.csv")
+
+    if has_header:
+        os.replace(path, segment)
+    else:
+        with open(path, "rb") as src, open(segment, "wb") as dst:
+            dst.write((",".join(names) + "\n").encode())
+            shutil.copyfileobj(src, dst, COPY_BLOCK_BYTES)
+        os.remove(path)
+
+    return compress_segment(segment) if compress else segment
+
+
+def seal_in_background(path: str, columns: Sequence[str]) -> threading.Thread:
+    """
+    Seal a just-closed log file, compressing it on a daemon thread.
+
+    The rename is done before returning, so the caller can reopen `path`
+    right away; only the compression runs in the background. A segment
+    left uncompressed by an exit is picked up by `apply_retention`.
+    """
+    segment = seal_segment(path, columns, compress=False)
+    thread = threading.Thread(
+        target=lambda: segment and compress_segment(segment),
+        name="log-segment-compress",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+# =========================
+# ROLLUPS
+# =========================
+def timestamp_column(columns: Sequence[str]) -> str:
+    """
+    Return the epoch-milliseconds column of a raw log.
+    """
+    for name in TIMESTAMP_COLUMNS:
+        if name in columns:
+            return name
+    raise KeyError(f"No timestamp column found; expected one of {TIMESTAMP_COLUMNS}.")
+
+
+def metric_columns(df: "pd.DataFrame") -> List[str]:
+    """
+    Numeric columns that are rolled up (everything except timestamps and verdicts).
+    """
+    import pandas as pd
+    return [
+        c for c in df.columns
+        if c not in NON_METRIC_COLUMNS and pd.api.types.is_numeric_dtype(df[c])
+    ]
+
+
+def rollup_frame(df: "pd.DataFrame", bucket_ms: int) -> "pd.DataFrame":
+    """
+    Aggregate raw rows into fixed time buckets.
+
+    Args:
+        df (pd.DataFrame): Raw log rows (time column `timestamp_ms` or `timestamp`).
+        bucket_ms (int): Bucket width in milliseconds.
+
+    Returns:
+        pd.DataFrame: One row per non-empty bucket: `timestamp_ms` (bucket
+        start), `datetime_utc`, `count`, `<metric>_{min,mean,max,p95}` and,
+        if the log has a verdict column, `anomalies`.
+    """
+    import pandas as pd
+
+    metrics = metric_columns(df)
+    bucket = df[timestamp_column(df.columns)].to_numpy() // bucket_ms * bucket_ms
+    grouped = df[metrics].groupby(bucket, sort=True)
+
+    out = {"count": grouped.size()}
+    for stat in ROLLUP_STATS:
+        values = grouped.quantile(ROLLUP_QUANTILE) if stat == "p95" else grouped.agg(stat)
+        for m in metrics:
+            out[f"{m}_{stat}"] = values[m].round(4)
+
+    verdict = next((c for c in VERDICT_COLUMNS if c in df.columns), None)
+    if verdict is not None:
+        flags = df[verdict].isin(["anomaly", 1, "1"]).astype(np.int64)
+        out["anomalies"] = flags.groupby(bucket, sort=True).sum()
+
+    result = pd.DataFrame(out)
+    result.index.name = TIMESTAMP_COLUMN
+    result = result.reset_index()
+    dt = pd.to_datetime(result[TIMESTAMP_COLUMN], unit="ms").dt.strftime("%Y-%m-%dT%H:%M:%S")
+    result.insert(1, "datetime_utc", dt)
+    return result
+
+
+def _last_bucket(path: str) -> Optional[int]:
+    """
+    Start of the last bucket in a rollup CSV, read from the file's tail.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f:
+        f.seek(max(0, os.path.getsize(path) - 4096))
+        last = [line for line in f.read().splitlines() if line.strip()][-1]
+    try:
+        return int(last.split(b",")[0])
+    except ValueError:
+        return None  # Header only
+
+
+def read_segment(path: str) -> "pd.DataFrame":
+    """
+    Read a segment with its time column named `timestamp_ms`.
+    """
+    import pandas as pd
+    try:
+        df = pd.read_csv(path)
+    except FileNotFoundError:
+        if path.endswith(".gz"):
+            raise
+        df = pd.read_csv(path + ".gz")  # Compressed since it was listed
+    return df.rename(columns={timestamp_column(df.columns): TIMESTAMP_COLUMN})
+
+
+def update_rollups(path: str, levels: Dict[str, int] = ROLLUP_LEVELS) -> Dict[str, int]:
+    """
+    Append the complete buckets of newly sealed segments to the rollups.
+
+    Each level resumes after the last bucket it already holds. Segments are
+    read one at a time; rows of a bucket that may continue in the next
+    segment are carried over, so memory stays bounded by one segment plus
+    one bucket of the coarsest level. Buckets after the end of the newest
+    segment are left for the next run, because the active log may still
+    add rows to them.
+
+    Args:
+        path (str): Active log file.
+        levels (Dict[str, int]): Level name -> bucket width in milliseconds.
+
+    Returns:
+        Dict[str, int]: Buckets appended per level.
+    """
+    import pandas as pd
+
+    resume = {}
+    for name, width in levels.items():
+        last = _last_bucket(rollup_path(path, name))
+        resume[name] = -1 if last is None else last + width
+    start = min(resume.values())
+
+    appended = {name: 0 for name in levels}
+    carry = None
+    for first_ms, last_ms, segment in list_segments(path):
+        if last_ms < start:
+            continue
+        df = read_segment(segment)
+        df = df[df[TIMESTAMP_COLUMN] >= start]
+        if carry is not None:
+            df = pd.concat([carry, df], ignore_index=True)
+        if df.empty:
+            continue
+
+        end = int(df[TIMESTAMP_COLUMN].max())
+        for name, width in levels.items():
+            complete_before = end // width * width
+            rows = df[(df[TIMESTAMP_COLUMN] >= resume[name]) & (df[TIMESTAMP_COLUMN] < complete_before)]
+            if rows.empty:
+                continue
+            rollup = rollup_frame(rows, width)
+            target = rollup_path(path, name)
+            os.makedirs(rollup_dir(path), exist_ok=True)
+            new_file = not os.path.exists(target) or os.path.getsize(target) == 0
+            rollup.to_csv(target, mode="a", header=new_file, index=False)
+            resume[name] = complete_before
+            appended[name] += len(rollup)
+
+        carry = df[df[TIMESTAMP_COLUMN] >= min(resume.values())]
+    return appended
+
+
+def read_rollup(path: str, level: str = ROLLUP_LEVEL) -> "pd.DataFrame":
+    """
+    Read a rollup CSV.
+
+    Args:
+        path (str): Rollup CSV, a `.rollups` directory or the log itself.
+        level (str): Level to read when `path` is not a CSV inside `.rollups`.
+    """
+    import pandas as pd
+
+    if not (path.endswith(".csv") and is_rollup(path)):
+        log = path.rstrip(os.sep)
+        if log.endswith(ROLLUPS_SUFFIX):
+            log = log[:-len(ROLLUPS_SUFFIX)] + ".csv"
+        path = rollup_path(log, level)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No rollup found at: {path} (run `python -m storage.retention`).")
+    return pd.read_csv(path)
+
+
+def read_rollup_metrics(path: str, stat: str = ROLLUP_STAT, level: str = ROLLUP_LEVEL) -> "pd.DataFrame":
+    """
+    Read a rollup as metric rows, one per bucket, for training.
+
+    `<metric>_<stat>` becomes `<metric>`, so the frame has the same columns
+    as the raw log and the usual labelling and pipelines apply.
+
+    Args:
+        path (str): Rollup CSV, a `.rollups` directory or the log itself.
+        stat (str): One of `ROLLUP_STATS`.
+        level (str): Rollup level when `path` is not a rollup CSV.
+
+    Returns:
+        pd.DataFrame: `timestamp_ms` plus one column per rolled-up metric.
+    """
+    if stat not in ROLLUP_STATS:
+        raise ValueError(f"Invalid rollup stat '{stat}'. Choose from {list(ROLLUP_STATS)}.")
+    df = read_rollup(path, level)
+    suffix = f"_{stat}"
+    columns = {c: c[:-len(suffix)] for c in df.columns if c.endswith(suffix)}
+    return df[[TIMESTAMP_COLUMN] + list(columns)].rename(columns=columns)
+
+
+def read_segments(path: str) -> "pd.DataFrame":
+    """
+    Read every closed segment of a log (a `.segments` directory) as one frame.
+    """
+    import pandas as pd
+
+    segments = list_segments(path)
+    if not segments:
+        raise FileNotFoundError(f"No log segments found at: {path}")
+    return pd.concat([read_segment(p) for _, _, p in segments], ignore_index=True)
+
+
+def iter_segments(path: str) -> Iterator["pd.DataFrame"]:
+    """
+    Yield the closed segments of a log one at a time, oldest first.
+    """
+    for _, _, segment in list_segments(path):
+        yield read_segment(segment)
+
+
+# =========================
+# RETENTION
+# =========================
+def _prune_rollup(path: str, cutoff_ms: int) -> int:
+    """
+    Drop rollup rows older than `cutoff_ms`; returns the number removed.
+    """
+    import pandas as pd
+
+    if not os.path.exists(path):
+        return 0
+    df = pd.read_csv(path)
+    keep = df[TIMESTAMP_COLUMN] >= cutoff_ms
+    removed = int((~keep).sum())
+    if removed:
+        tmp = path + ".tmp"
+        df[keep].to_csv(tmp, index=False)
+        os.replace(tmp, path)
+    return removed
+
+
+def apply_retention(path: str,
+                    columns: Optional[Sequence[str]] = None,
+                    rotate: bool = False,
+                    raw_days: float = RAW_RETENTION_DAYS,
+                    minute_days: float = MINUTE_RETENTION_DAYS,
+                    now_ms: Optional[int] = None) -> Dict[str, int]:
+    """
+    Run one retention pass over a log.
+
+    Behavior:
+        - With `rotate`, the active file is sealed first. Only do this when
+          no process is writing it; running loggers rotate themselves
+          (`--rotate-mb` / `--rotate-hours`).
+        - Segments left uncompressed (e.g. by a logger that exited while
+          compressing) are compressed, once they are older than
+          `COMPRESS_GRACE_SEC`; a running logger may still be compressing
+          a newer one.
+        - Complete buckets of new segments are appended to the rollups.
+        - Raw segments older than `raw_days` are deleted, but only once
+          every rollup level covers them.
+        - 1-minute rollups older than `minute_days` are pruned; hourly
+          rollups are kept.
+
+    Args:
+        path (str): Active log file.
+        columns (Sequence[str], optional): Columns if the log has no header.
+        rotate (bool): Seal the active file first.
+        raw_days (float): Raw retention in days.
+        minute_days (float): 1-minute rollup retention in days.
+        now_ms (int, optional): Reference time; defaults to the newest segment's end.
+
+    Returns:
+        Dict[str, int]: Counts of what was done.
+    """
+    report = {"sealed": 0, "compressed": 0, "deleted": 0, "pruned_1min": 0}
+    if rotate and seal_segment(path, columns):
+        report["sealed"] = 1
+
+    for _, _, segment in list_segments(path):
+        try:
+            recent = time.time() - os.path.getmtime(segment) < COMPRESS_GRACE_SEC
+        except FileNotFoundError:  # Just compressed by the logger
+            continue
+        if segment.endswith(".csv") and not recent:
+            compress_segment(segment)
+            report["compressed"] += 1
+
+    for name, n in update_rollups(path).items():
+        report[f"rollup_{name}"] = n
+
+    segments = list_segments(path)
+    if not segments:
+        return report
+    if now_ms is None:
+        now_ms = segments[-1][1]
+
+    covered = min(
+        (_last_bucket(rollup_path(path, name)) or -1) + width
+        for name, width in ROLLUP_LEVELS.items()
+    )
+    raw_cutoff = now_ms - int(raw_days * DAY_MS)
+    for _, last_ms, segment in segments:
+        if last_ms < raw_cutoff and last_ms < covered:
+            os.remove(segment)
+            report["deleted"] += 1
+
+    report["pruned_1min"] = _prune_rollup(rollup_path(path, "1min"), now_ms - int(minute_days * DAY_MS))
+    return report
+
+
+def disk_usage(path: str) -> Dict[str, int]:
+    """
+    Bytes used by a log's active file, segments and rollups.
+    """
+    def size(p):
+        if os.path.isfile(p):
+            return os.path.getsize(p)
+        if os.path.isdir(p):
+            return sum(os.path.getsize(os.path.join(p, n)) for n in os.listdir(p))
+        return 0
+    return {"active": size(path), "segments": size(segment_dir(path)), "rollups": size(rollup_dir(path))}
+
+
+# =========================
+# CLI
+# =========================
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compress closed log segments, build 1-minute/hourly rollups and enforce retention."
+    )
+    parser.add_argument(
+        "logs",
+        nargs="*",
+        help="Log files (default: the inference log and the metrics CSV)."
+    )
+    parser.add_argument(
+        "--rotate",
+        action="store_true",
+        help="Seal the active file first. Only when no logger is writing it."
+    )
+    parser.add_argument(
+        "--raw-days",
+        type=float,
+        default=RAW_RETENTION_DAYS,
+        help="Keep raw segments this many days (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--minute-days",
+        type=float,
+        default=MINUTE_RETENTION_DAYS,
+        help="Keep 1-minute rollups this many days (default: %(default)s)."
+    )
+    args = parser.parse_args()
+
+    logs = {p: DEFAULT_LOGS.get(os.path.abspath(p)) for p in args.logs} if args.logs else DEFAULT_LOGS
+    for path, columns in logs.items():
+        if not os.path.exists(path) and not list_segments(path):
+            print(f"[retention] {path}: nothing to do")
+            continue
+        report = apply_retention(path, columns, args.rotate, args.raw_days, args.minute_days)
+        usage = disk_usage(path)
+        print(
+            f"[retention] {path}: " + ", ".join(f"{k}={v}" for k, v in report.items())
+            + " | " + ", ".join(f"{k}={v / 2 ** 20:.1f} MB" for k, v in usage.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
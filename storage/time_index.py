@@ -0,0 +1,412 @@
+import io
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+
+from storage import retention
+
+if TYPE_CHECKING:  # pandas is imported when rows are returned, not to seek
+    import pandas as pd
+
+# =========================
+# CONFIGURATION
+# =========================
+MAGIC = b"DCMLIDX1"
+INDEX_SUFFIX = ".idx"         # Sidecar next to the log: <log>.idx
+INDEX_EVERY_ROWS = 1024       # One (timestamp_ms, byte offset) entry per block of rows
+SCAN_BLOCK_BYTES = 8 << 20    # Read size while (re)indexing
+ENTRY_DTYPE = np.dtype([("timestamp_ms", "<i8"), ("offset", "<i8")])
+
+EPISODE_GAP_MS = 5_000        # Anomalous rows closer than this belong to one episode
+TIMESTAMP_COLUMN = "timestamp_ms"
+
+
+# =========================
+# BYTE RANGES
+# =========================
+class RangeReader:
+    """
+    File-like view of bytes [start, end) of a file, for `pd.read_csv`.
+    """
+
+    def __init__(self, path: str, start: int, end: int):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def complete_end(path: str, size: int) -> int:
+    """
+    Byte offset just past the last newline in the first `size` bytes of `path`.
+
+    Rows after it are still being written, so readers stop there.
+    """
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0:
+            start = max(0, pos - SCAN_BLOCK_BYTES)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            pos = start
+    return 0
+
+
+# =========================
+# INDEX
+# =========================
+class TimeIndex:
+    """
+    Sparse index of a time-ordered CSV log on `timestamp_ms`.
+
+    Every `every` rows, the timestamp and byte offset of the row are stored
+    in a sidecar file (16 bytes per entry, ~250 KB per year of 1 Hz data
+    with the default block size). A range query bisects the entries and
+    reads only the blocks that can hold matching rows.
+
+    The index is append-only like the log: `update` scans just the bytes
+    written since the last entry, so calling it before each query (or
+    periodically from a background indexer) is cheap. If the log was
+    rotated or rewritten, the index is rebuilt. Rows are assumed to be in
+    non-decreasing timestamp order, which holds for the loggers' output.
+
+    Args:
+        path (str): CSV log.
+        every (int): Rows per index block.
+    """
+
+    def __init__(self, path: str, every: int = INDEX_EVERY_ROWS):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.every = max(1, int(every))
+        self.columns: List[str] = []
+        self.data_offset = 0
+        self.entries = np.zeros(0, dtype=ENTRY_DTYPE)
+        self.indexed_bytes = 0  # End of the last complete line seen by `update`
+
+    # =========================
+    # BUILDING
+    # =========================
+    def _load(self) -> None:
+        if not os.path.exists(self.index_path):
+            self.entries = np.zeros(0, dtype=ENTRY_DTYPE)
+            return
+        with open(self.index_path, "rb") as f:
+            header = f.read(len(MAGIC) + 8)
+            raw = f.read()
+        if header[:len(MAGIC)] != MAGIC or int.from_bytes(header[len(MAGIC):], "little") != self.every:
+            self.entries = np.zeros(0, dtype=ENTRY_DTYPE)
+            return
+        n = len(raw) // ENTRY_DTYPE.itemsize
+        self.entries = np.frombuffer(raw[:n * ENTRY_DTYPE.itemsize], dtype=ENTRY_DTYPE).copy()
+
+    def _valid(self, size: int) -> bool:
+        """
+        True if the loaded entries still describe the log (not rotated/rewritten).
+        """
+        if len(self.entries) == 0:
+            return False
+        first = self.entries[0]
+        if first["offset"] != self.data_offset or self.entries[-1]["offset"] >= size:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(int(first["offset"]))
+            line = f.readline()
+        try:
+            return int(line.split(b",", 1)[0]) == int(first["timestamp_ms"])
+        except ValueError:
+            return False
+
+    def update(self) -> int:
+        """
+        Bring the index up to date with the log.
+
+        Returns:
+            int: Number of entries added (all of them after a rebuild).
+        """
+        size = os.path.getsize(self.path)
+        self.columns, has_header = retention.csv_header(self.path)
+        self.data_offset = 0
+        if has_header:
+            with open(self.path, "rb") as f:
+                self.data_offset = len(f.readline())
+
+        self._load()
+        if self._valid(size):
+            start = int(self.entries[-1]["offset"])
+            kept = len(self.entries)
+        else:
+            self.entries = np.zeros(0, dtype=ENTRY_DTYPE)
+            start, kept = self.data_offset, 0
+
+        # Scan from the start of the last block; its first row is already indexed.
+        # Line starts are found with NumPy; only block-starting rows are parsed.
+        new: List[Tuple[int, int]] = []
+        row_in_block = 0
+        offset = start
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            tail = b""
+            while True:
+                chunk = f.read(SCAN_BLOCK_BYTES)
+                if not chunk:
+                    break
+                buf = tail + chunk
+                ends = np.flatnonzero(np.frombuffer(buf, dtype=np.uint8) == ord("\n"))
+                if len(ends) == 0:
+                    tail = buf
+                    continue
+                starts = np.concatenate([[0], ends[:-1] + 1])
+                for pos in starts[(np.arange(len(starts)) + row_in_block) % self.every == 0]:
+                    if kept and offset + pos == start:
+                        continue
+                    new.append((int(buf[pos:buf.index(b",", pos)]), offset + int(pos)))
+                row_in_block = (row_in_block + len(starts)) % self.every
+                consumed = int(ends[-1]) + 1
+                offset += consumed
+                tail = buf[consumed:]
+
+        self.indexed_bytes = offset
+        if new:
+            self.entries = np.concatenate([self.entries, np.array(new, dtype=ENTRY_DTYPE)])
+            self._save(append=kept > 0, added=new)
+        elif not kept and os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        return len(new)
+
+    def _save(self, append: bool, added: List[Tuple[int, int]]) -> None:
+        if append:
+            with open(self.index_path, "ab") as f:
+                f.write(np.array(added, dtype=ENTRY_DTYPE).tobytes())
+            return
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + self.every.to_bytes(8, "little"))
+            f.write(self.entries.tobytes())
+        os.replace(tmp, self.index_path)
+
+    # =========================
+    # QUERYING
+    # =========================
+    def byte_range(self, start_ms: int, end_ms: int) -> Tuple[int, int]:
+        """
+        Byte range of the log that holds every row with start_ms <= ts <= end_ms.
+        """
+        ts = self.entries["timestamp_ms"]
+        # The block before the first entry >= start_ms can still hold matching rows
+        first = max(0, int(np.searchsorted(ts, start_ms, side="left")) - 1)
+        last = int(np.searchsorted(ts, end_ms, side="right"))
+        begin = int(self.entries["offset"][first]) if len(ts) else self.data_offset
+        end = int(self.entries["offset"][last]) if last < len(ts) else self.indexed_bytes
+        return begin, end
+
+    def query(self, start_ms: int, end_ms: int) -> "pd.DataFrame":
+        """
+        Rows with start_ms <= timestamp_ms <= end_ms, read by seeking to their blocks.
+
+        The time column is returned as `timestamp_ms` whatever the log calls it.
+        """
+        import pandas as pd
+
+        begin, end = self.byte_range(start_ms, end_ms)
+        with open(self.path, "rb") as f:
+            f.seek(begin)
+            data = f.read(max(0, end - begin))
+        if not data:
+            return pd.DataFrame(columns=self.columns)
+        df = pd.read_csv(io.BytesIO(data), names=self.columns, header=None)
+        df = df.rename(columns={retention.timestamp_column(self.columns): TIMESTAMP_COLUMN})
+        ts = df[TIMESTAMP_COLUMN]
+        return df[(ts >= start_ms) & (ts <= end_ms)].reset_index(drop=True)
+
+
+# =========================
+# QUERY API
+# =========================
+def parse_time(value: str) -> int:
+    """
+    Epoch milliseconds from epoch milliseconds or an ISO date/time (UTC if no offset).
+    """
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _query_segments(path: str, start_ms: int, end_ms: int) -> List["pd.DataFrame"]:
+    """
+    Matching rows from rotated segments; only segments overlapping the range are read.
+    """
+    parts = []
+    for first_ms, last_ms, segment in retention.list_segments(path):
+        if last_ms < start_ms or first_ms > end_ms:
+            continue
+        df = retention.read_segment(segment)
+        ts = df[TIMESTAMP_COLUMN]
+        parts.append(df[(ts >= start_ms) & (ts <= end_ms)])
+    return parts
+
+
+def _query_store(path: str, start_ms: int, end_ms: int) -> "pd.DataFrame":
+    """
+    Matching rows from a binary metric store: daily chunks by name, then a binary search.
+    """
+    import pandas as pd
+    from storage import metric_store
+
+    first_chunk, last_chunk = metric_store.chunk_name(start_ms), metric_store.chunk_name(end_ms)
+    parts = []
+    for chunk_path in metric_store.list_chunks(path):
+        name = os.path.basename(chunk_path)
+        if os.path.isdir(path) and not first_chunk <= name <= last_chunk:
+            continue
+        records = metric_store.open_chunk(chunk_path)
+        ts = records[TIMESTAMP_COLUMN]
+        lo = np.searchsorted(ts, start_ms, side="left")
+        hi = np.searchsorted(ts, end_ms, side="right")
+        if hi > lo:
+            parts.append(metric_store.records_to_frame(records[lo:hi]))
+    if not parts:
+        return pd.DataFrame(columns=[TIMESTAMP_COLUMN])
+    return pd.concat(parts, ignore_index=True)
+
+
+def query(path: str, start_ms: int, end_ms: int, every: int = INDEX_EVERY_ROWS) -> "pd.DataFrame":
+    """
+    Return the rows of a log between two timestamps (inclusive).
+
+    Args:
+        path (str): CSV log (its rotated segments are included) or binary
+            metric store.
+        start_ms (int): Range start, epoch milliseconds.
+        end_ms (int): Range end, epoch milliseconds.
+        every (int): Index block size for CSV logs.
+
+    Returns:
+        pd.DataFrame: Matching rows in time order, time column `timestamp_ms`.
+    """
+    import pandas as pd
+
+    if os.path.isdir(path) or path.endswith(".bin"):
+        return _query_store(path, start_ms, end_ms)
+
+    parts = _query_segments(path, start_ms, end_ms)
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        index = TimeIndex(path, every)
+        index.update()
+        parts.append(index.query(start_ms, end_ms))
+    parts = [p for p in parts if len(p)]
+    if not parts:
+        return pd.DataFrame(columns=[TIMESTAMP_COLUMN])
+    return pd.concat(parts, ignore_index=True)
+
+
+def episodes(df: "pd.DataFrame", gap_ms: int = EPISODE_GAP_MS) -> "pd.DataFrame":
+    """
+    Group anomalous rows into episodes.
+
+    Rows are anomalous if their verdict column (`predicted_stress`,
+    `pred_label` or `label`) says so. Anomalous rows less than `gap_ms`
+    apart form one episode.
+
+    Returns:
+        pd.DataFrame: One row per episode: start/end (ms and UTC),
+        duration, sample count and the peak of each metric.
+    """
+    import pandas as pd
+
+    verdict = next((c for c in retention.VERDICT_COLUMNS if c in df.columns), None)
+    if verdict is None:
+        raise ValueError("The log has no verdict column; episodes need predictions or labels.")
+
+    anomalous = df[df[verdict].isin(["anomaly", 1, "1"])]
+    if anomalous.empty:
+        return pd.DataFrame(columns=["start_ms", "end_ms", "start_utc", "end_utc", "duration_sec", "samples"])
+
+    ts = anomalous[TIMESTAMP_COLUMN].to_numpy()
+    episode = np.concatenate([[0], np.cumsum(np.diff(ts) > gap_ms)])
+    grouped = anomalous.groupby(episode)
+    metrics = retention.metric_columns(df)
+
+    out = pd.DataFrame({
+        "start_ms": grouped[TIMESTAMP_COLUMN].min(),
+        "end_ms": grouped[TIMESTAMP_COLUMN].max(),
+        "samples": grouped.size(),
+    })
+    for m in metrics:
+        out[f"{m}_max"] = grouped[m].max()
+    out.insert(2, "start_utc", pd.to_datetime(out["start_ms"], unit="ms").dt.strftime("%Y-%m-%dT%H:%M:%S"))
+    out.insert(3, "end_utc", pd.to_datetime(out["end_ms"], unit="ms").dt.strftime("%Y-%m-%dT%H:%M:%S"))
+    out.insert(4, "duration_sec", (out["end_ms"] - out["start_ms"]) / 1000)
+    return out.reset_index(drop=True)
+
+
+# =========================
+# CLI
+# =========================
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Query a metric or inference log by time range using a sparse timestamp index."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Create or update the index of a CSV log.")
+    build.add_argument("log", nargs="?", default=retention.INFERENCE_LOG)
+    build.add_argument("--every", type=int, default=INDEX_EVERY_ROWS, help="Rows per index block (default: %(default)s).")
+    build.add_argument("--watch", type=float, default=None, metavar="SEC",
+                       help="Keep running and update the index every SEC seconds.")
+
+    q = sub.add_parser("query", help="Print the rows or anomaly episodes in a time range.")
+    q.add_argument("log", nargs="?", default=retention.INFERENCE_LOG)
+    q.add_argument("--from", dest="start", required=True, help="Start: epoch ms or ISO time (UTC).")
+    q.add_argument("--to", dest="end", required=True, help="End (inclusive): epoch ms or ISO time (UTC).")
+    q.add_argument("--episodes", action="store_true", help="Print anomaly episodes instead of rows.")
+    q.add_argument("--gap-ms", type=int, default=EPISODE_GAP_MS, help="Episode gap (default: %(default)s).")
+    q.add_argument("--every", type=int, default=INDEX_EVERY_ROWS, help="Rows per index block (default: %(default)s).")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = TimeIndex(args.log, args.every)
+        while True:
+            t0 = time.perf_counter()
+            added = index.update()
+            print(f"[time_index] {args.log}: +{added} entries, {len(index.entries)} total, "
+                  f"{index.indexed_bytes / 2 ** 20:.1f} MB indexed, {(time.perf_counter() - t0) * 1000:.1f} ms")
+            if args.watch is None:
+                break
+            try:
+                time.sleep(args.watch)
+            except KeyboardInterrupt:
+                break
+        return
+
+    t0 = time.perf_counter()
+    df = query(args.log, parse_time(args.start), parse_time(args.end), args.every)
+    result = episodes(df, args.gap_ms) if args.episodes else df
+    elapsed = (time.perf_counter() - t0) * 1000
+    result.to_csv(sys.stdout, index=False)
+    print(f"[time_index] {len(result)} {'episodes' if args.episodes else 'rows'} in {elapsed:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import os
+import sys
+import csv
+import json
+import time
+import signal
+import subprocess
+import multiprocessing as mp
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from from_root import from_root
+
+from tests import workload
+
+# =========================
+# CONFIGURATION
+# =========================
+SCENARIO_DIR = os.path.join(from_root(), "output", "scenarios")
+STRESSOR_TYPES = ("cpu", "ram", "disk", "workload", "legacy")
+LEGACY_TESTS = ("cpu", "ram", "disk")
+
+TICK_SEC = 1.0            # Supervisor period: process checks and one label row per tick
+LEAD_IN_SEC = 10.0        # Default idle time logged before the first stressor may start
+TAIL_SEC = 10.0           # Default idle time logged after the last stressor ends
+STOP_TIMEOUT_SEC = 10.0   # Grace period for a stressor/logger to clean up before it is killed
+
+LABEL_COLUMNS = ["timestamp_ms", "datetime_utc", "label", "active"]
+
+
+# =========================
+# SCENARIO FILES
+# =========================
+def load_scenario(path: str) -> Dict[str, Any]:
+    """
+    Read a scenario from JSON, or YAML when PyYAML is installed.
+
+    Raises:
+        ImportError: A YAML file without PyYAML.
+    """
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML scenarios need PyYAML (pip install pyyaml); or use a .json scenario.")
+            scenario = yaml.safe_load(f)
+        else:
+            scenario = json.load(f)
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return normalize_scenario(scenario)
+
+
+def stressor_schedule(spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    The `tests.workload` schedule one stressor plays (not used by "legacy").
+    """
+    kind = spec["type"]
+    if kind == "workload":
+        schedule = spec["schedule"]
+        if isinstance(schedule, str):
+            return workload.load_schedule(schedule)
+        return workload.normalize_schedule(schedule)
+
+    segment = {"name": spec["name"], "duration": spec["duration"]}
+    if "label" in spec:
+        segment["label"] = spec["label"]
+    if kind == "disk":
+        segment["disk_mbps"] = spec.get("mbps", 0)
+        segment["disk_iops"] = spec.get("iops", 0)
+    else:
+        segment[kind] = spec["level"]
+    return workload.normalize_schedule([segment])
+
+
+def normalize_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate a scenario and fill in defaults.
+
+    A scenario has a list of `stressors` (each with a `type`, a `start`
+    offset in seconds and a `duration`), optional `logger` options for
+    `metric_logger.py` (`rate`, `metrics`, `out`), and optional `labels`
+    and `dataset` paths. Stressor types:
+
+        - cpu / ram: `level` ratio (number or [start, end] ramp).
+        - disk: `mbps` and `iops`.
+        - workload: a `tests.workload` `schedule` (preset name or segments);
+          its duration is the schedule's.
+        - legacy: one of the original full-blast tests (`test`: cpu, ram or
+          disk), stopped after `duration`; always labelled anomalous.
+
+    Raises:
+        ValueError: Anything that would only fail halfway through a run.
+    """
+    stressors = scenario.get("stressors") or []
+    if not stressors:
+        raise ValueError("A scenario needs at least one stressor.")
+
+    lead_in = float(scenario.get("lead_in", LEAD_IN_SEC))
+    normalized = []
+    for i, spec in enumerate(stressors):
+        spec = dict(spec)
+        kind = spec.get("type")
+        if kind not in STRESSOR_TYPES:
+            raise ValueError(f"Stressor {i}: type must be one of {list(STRESSOR_TYPES)}, got {kind!r}.")
+        spec["name"] = str(spec.get("name", f"{kind}{i}"))
+        spec["start"] = lead_in + float(spec.get("start", 0))
+
+        if kind == "legacy":
+            if spec.get("test") not in LEGACY_TESTS:
+                raise ValueError(f"Stressor {i}: legacy test must be one of {list(LEGACY_TESTS)}.")
+            spec["duration"] = float(spec.get("duration", 30))
+            spec["label"] = int(spec.get("label", 1))
+        else:
+            if kind != "workload" and "duration" not in spec:
+                raise ValueError(f"Stressor {i}: missing duration.")
+            if kind in ("cpu", "ram") and "level" not in spec:
+                raise ValueError(f"Stressor {i}: missing level.")
+            try:
+                spec["segments"] = stressor_schedule(spec)
+            except (KeyError, ValueError) as e:
+                raise ValueError(f"Stressor {i}: {e}")
+            spec["duration"] = sum(s["duration"] for s in spec["segments"])
+        normalized.append(spec)
+
+    name = scenario["name"]
+    out = dict(scenario, stressors=normalized, lead_in=lead_in)
+    out["tail"] = float(scenario.get("tail", TAIL_SEC))
+    out["end"] = max(s["start"] + s["duration"] for s in normalized) + out["tail"]
+    out["labels"] = scenario.get("labels") or os.path.join(SCENARIO_DIR, f"{name}_labels.csv")
+
+    logger = scenario.get("logger")
+    if logger:
+        logger = dict(logger)
+        logger.setdefault("rate", 1)
+        logger.setdefault("metrics", "core")
+        logger.setdefault("out", os.path.join(SCENARIO_DIR, f"{name}_metrics.csv"))
+        out["logger"] = logger
+        out["dataset"] = scenario.get("dataset") or os.path.join(SCENARIO_DIR, f"{name}_dataset.csv")
+    return out
+
+
+# =========================
+# STRESSOR PROCESSES
+# =========================
+_stressor_pid = None
+
+
+def _terminate_as_interrupt(signum, frame):
+    if os.getpid() != _stressor_pid:
+        os._exit(0)  # a stressor's own worker process: nothing to clean up
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)  # one interrupt; let the cleanup finish
+    raise KeyboardInterrupt
+
+
+def _run_stressor(spec: Dict[str, Any]) -> None:
+    """
+    Entry point of a stressor process.
+
+    SIGTERM is turned into KeyboardInterrupt so the stressor's own cleanup
+    (worker processes, held memory, scratch files) runs when the supervisor
+    stops it.
+    """
+    global _stressor_pid
+    _stressor_pid = os.getpid()
+    signal.signal(signal.SIGTERM, _terminate_as_interrupt)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the supervisor
+
+    try:
+        if spec["type"] == "legacy":
+            from tests import cpu_test, ram_test, disk_test
+
+            if spec["test"] == "cpu":
+                cpu_test.cpu_test(duration=int(spec["duration"]))
+            elif spec["test"] == "ram":
+                ram_test.ram_test(**spec.get("args", {}))
+            else:
+                disk_test.disk_test(**spec.get("args", {}))
+            return
+
+        disk_path = spec.get("path") or os.path.join(SCENARIO_DIR, f"{spec['name']}_disk.bin")
+        workload.run_workload(spec["segments"], disk_path=disk_path,
+                              cpu_workers=spec.get("workers"), verbose=False)
+    except KeyboardInterrupt:
+        pass  # stopped by the supervisor after the stressor cleaned up
+
+
+def _stop(process, timeout: float = STOP_TIMEOUT_SEC) -> None:
+    """
+    Ask a process to clean up and exit; kill it if it does not.
+    """
+    if isinstance(process, subprocess.Popen):
+        if process.poll() is not None:
+            return
+        process.send_signal(signal.SIGINT if os.name == "posix" else signal.CTRL_BREAK_EVENT)
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        return
+
+    if not process.is_alive():
+        return
+    process.terminate()
+    process.join(timeout)
+    if process.is_alive():
+        process.kill()
+        process.join()
+
+
+def _active_label(spec: Dict[str, Any], t: float) -> Optional[int]:
+    """
+    The stressor's ground-truth label `t` seconds into the scenario, or
+    None while it is not running.
+    """
+    offset = t - spec["start"]
+    if offset < 0 or offset >= spec["duration"]:
+        return None
+    if spec["type"] == "legacy":
+        return spec["label"]
+    active = workload.targets_at(spec["segments"], offset)
+    return workload.label_at(*active) if active else None
+
+
+# =========================
+# SUPERVISOR
+# =========================
+def run_scenario(scenario: Dict[str, Any]) -> int:
+    """
+    Run every stressor of a scenario concurrently and record ground truth.
+
+    Stressors run in their own processes, each started at its offset and
+    stopped after its duration. The supervisor writes one label row per
+    `TICK_SEC` (1 if any active stressor is in an anomalous segment). If
+    the scenario has a `logger`, `metric_logger.py` runs for the whole
+    scenario and its output is joined with the labels into `dataset`.
+    Everything is stopped and cleaned up on exit, including Ctrl+C and
+    stressors that crash.
+
+    Args:
+        scenario (Dict[str, Any]): Output of `normalize_scenario`.
+
+    Returns:
+        int: 0 if every stressor exited cleanly, 1 otherwise.
+    """
+    os.makedirs(SCENARIO_DIR, exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(scenario["labels"])), exist_ok=True)
+
+    logger = None
+    if scenario.get("logger"):
+        options = scenario["logger"]
+        os.makedirs(os.path.dirname(os.path.abspath(options["out"])), exist_ok=True)
+        logger = subprocess.Popen(
+            [sys.executable, os.path.join(from_root(), "metric_logger.py"),
+             "--rate", str(options["rate"]), "--metrics", str(options["metrics"]), "--out", options["out"]],
+            cwd=from_root(),
+            start_new_session=os.name == "posix",
+            # Ctrl+C in the terminal reaches the supervisor only; the logger is stopped with a
+            # SIGINT of its own, which must not stay ignored if this process was started with it ignored
+            preexec_fn=(lambda: signal.signal(signal.SIGINT, signal.SIG_DFL)) if os.name == "posix" else None,
+            creationflags=getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+        )
+        print(f"[scenario] metric_logger -> {options['out']}")
+
+    pending = sorted(scenario["stressors"], key=lambda s: s["start"])
+    running: List[tuple] = []
+    failures = []
+    label_rows = 0
+
+    print(f"[scenario] {scenario['name']}: {len(pending)} stressors over {scenario['end']:g} s. Press Ctrl+C to stop.")
+    start = next_tick = time.monotonic()
+    try:
+        with open(scenario["labels"], "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(LABEL_COLUMNS)
+
+            while True:
+                t = time.monotonic() - start
+                if t >= scenario["end"]:
+                    break
+
+                while pending and pending[0]["start"] <= t:
+                    spec = pending.pop(0)
+                    process = mp.Process(target=_run_stressor, args=(spec,), name=spec["name"])
+                    process.start()
+                    running.append((spec, process))
+                    print(f"[scenario] t={t:6.1f} s start {spec['name']} ({spec['type']}, {spec['duration']:g} s)")
+
+                for spec, process in list(running):
+                    if t >= spec["start"] + spec["duration"]:
+                        _stop(process)
+                        running.remove((spec, process))
+                        print(f"[scenario] t={t:6.1f} s stop  {spec['name']}")
+                    elif not process.is_alive():
+                        running.remove((spec, process))
+                        if process.exitcode != 0:
+                            failures.append(spec["name"])
+                            print(f"[scenario] t={t:6.1f} s {spec['name']} exited with code {process.exitcode}")
+
+                if logger is not None and logger.poll() is not None:
+                    raise RuntimeError(f"metric_logger exited early with code {logger.returncode}.")
+
+                active = [(s["name"], _active_label(s, t)) for s in scenario["stressors"]]
+                active = [(name, label) for name, label in active if label is not None]
+                now = datetime.now(timezone.utc)
+                writer.writerow([
+                    int(now.timestamp() * 1000),
+                    now.strftime("%Y-%m-%dT%H:%M:%S.%f"),
+                    int(any(label for _, label in active)),
+                    ";".join(name for name, _ in active),
+                ])
+                label_rows += 1
+
+                next_tick += TICK_SEC
+                time.sleep(max(0.0, next_tick - time.monotonic()))
+
+    except KeyboardInterrupt:
+        print("\nScenario stopped by user.")
+
+    finally:
+        for _, process in running:
+            _stop(process)
+        if logger is not None:
+            _stop(logger)
+
+    print(f"[scenario] {label_rows} label rows -> {scenario['labels']}")
+    if logger is not None and os.path.exists(scenario["logger"]["out"]):
+        rows = workload.attach_labels(scenario["logger"]["out"], scenario["labels"], scenario["dataset"],
+                                      tolerance_ms=int(TICK_SEC * 1000))
+        print(f"[scenario] {rows} labelled metric rows -> {scenario['dataset']}")
+    if failures:
+        print(f"[scenario] Failed stressors: {', '.join(failures)}")
+    return 1 if failures else 0
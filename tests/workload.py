@@ -0,0 +1,483 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import threading
+import multiprocessing as mp
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import psutil
+
+# =========================
+# CONFIGURATION
+# =========================
+CONTROL_SEC = 0.5          # Controller period: targets, RAM and labels are updated this often
+DUTY_PERIOD_SEC = 0.05     # CPU workers alternate busy/idle within this period
+CPU_GAIN = 0.5             # Closed-loop correction per control step (fraction of the error)
+RAM_CHUNK_MB = 64          # RAM is held/released in chunks of this size
+MAX_RAM_RATIO = 0.90       # Never push system RAM usage beyond this, whatever the schedule says
+DISK_FILE_MB = 256         # The disk writer reuses a file of at most this size
+DISK_FILE = "workload_disk.bin"
+FSYNC_SEC = 1.0            # The disk writer fsyncs this often
+IOPS_BLOCK_KB = 4          # Block size when a segment sets disk_iops without disk_mbps
+
+# A control tick is labelled anomalous (1) if any current target reaches
+# these levels, unless its segment sets "label" itself
+STRESS_LEVELS = {"cpu": 0.5, "ram": 0.75, "disk_mbps": 50.0, "disk_iops": 500.0}
+RESOURCES = ("cpu", "ram", "disk_mbps", "disk_iops")
+
+LABEL_COLUMNS = ["timestamp_ms", "datetime_utc", "segment", "label",
+                 "cpu_target", "ram_target", "disk_mbps_target", "disk_iops_target"]
+
+# Built-in schedules; levels are a number (plateau) or [start, end] (linear ramp)
+PRESETS: Dict[str, List[Dict[str, Any]]] = {
+    "demo": [
+        {"name": "idle", "duration": 30},
+        {"name": "cpu_ramp", "duration": 60, "cpu": [0.1, 0.8]},
+        {"name": "cpu_plateau", "duration": 30, "cpu": 0.8},
+        {"name": "cool_down", "duration": 30},
+        {"name": "ram_burst", "duration": 20, "ram": 0.8},
+        {"name": "cool_down", "duration": 30},
+        {"name": "disk_burst", "duration": 20, "disk_mbps": 80, "disk_iops": 200},
+        {"name": "mixed", "duration": 30, "cpu": 0.6, "ram": 0.7},
+        {"name": "idle", "duration": 30},
+    ],
+    "quick": [
+        {"name": "idle", "duration": 5},
+        {"name": "cpu_burst", "duration": 5, "cpu": 0.7},
+        {"name": "idle", "duration": 5},
+    ],
+}
+
+
+# =========================
+# SCHEDULE
+# =========================
+def normalize_schedule(segments: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Validate a schedule and fill in defaults.
+
+    Each segment is a dict with a "duration" in seconds and optional
+    targets: "cpu" and "ram" as ratios of the machine (0-1), "disk_mbps"
+    and "disk_iops" as write rates. A target is a number (held for the
+    whole segment) or a [start, end] pair (linear ramp). Missing targets
+    mean no load from this workload. "disk_iops" alone writes
+    `IOPS_BLOCK_KB` blocks. "name" and "label" (0/1) are optional;
+    without a label, each control tick is labelled from the current
+    (interpolated) targets by `label_at`, so a ramp turns anomalous only
+    once it crosses `STRESS_LEVELS`.
+
+    Raises:
+        ValueError: Unknown keys, bad durations or out-of-range targets.
+    """
+    normalized = []
+    for i, segment in enumerate(segments):
+        unknown = set(segment) - set(RESOURCES) - {"name", "duration", "label"}
+        if unknown:
+            raise ValueError(f"Segment {i}: unknown keys {sorted(unknown)}.")
+        duration = float(segment.get("duration", 0))
+        if duration <= 0:
+            raise ValueError(f"Segment {i}: duration must be > 0 seconds.")
+
+        out = {"name": str(segment.get("name", f"segment{i}")), "duration": duration}
+        for resource in RESOURCES:
+            level = segment.get(resource, 0.0)
+            start, end = (level, level) if isinstance(level, (int, float)) else level
+            start, end = float(start), float(end)
+            if min(start, end) < 0 or (resource in ("cpu", "ram") and max(start, end) > 1):
+                raise ValueError(f"Segment {i}: {resource} must be within "
+                                 f"{'[0, 1]' if resource in ('cpu', 'ram') else '>= 0'}.")
+            out[resource] = (start, end)
+
+        out["label"] = int(bool(segment["label"])) if "label" in segment else None
+        normalized.append(out)
+    return normalized
+
+
+def random_schedule(duration: float, seed: int = 42, mean_gap: float = 60.0) -> List[Dict[str, Any]]:
+    """
+    Reproducible schedule of idle gaps and random bursts and ramps.
+
+    The same `duration` and `seed` always give the same schedule.
+    """
+    rng = random.Random(seed)
+    segments, elapsed = [], 0.0
+    while elapsed < duration:
+        gap = min(rng.expovariate(1 / mean_gap), duration - elapsed)
+        segments.append({"name": "idle", "duration": max(gap, 1.0)})
+        elapsed += max(gap, 1.0)
+        if elapsed >= duration:
+            break
+
+        length = min(rng.uniform(10, 60), duration - elapsed)
+        kind = rng.choice(["cpu", "cpu_ramp", "ram", "disk", "mixed"])
+        segment = {"name": f"{kind}_burst", "duration": max(length, 1.0)}
+        if kind == "cpu":
+            segment["cpu"] = round(rng.uniform(0.6, 0.95), 2)
+        elif kind == "cpu_ramp":
+            segment["cpu"] = [round(rng.uniform(0.05, 0.3), 2), round(rng.uniform(0.6, 0.95), 2)]
+        elif kind == "ram":
+            segment["ram"] = round(rng.uniform(0.75, 0.85), 2)
+        elif kind == "disk":
+            segment["disk_mbps"] = round(rng.uniform(50, 150))
+            segment["disk_iops"] = round(rng.uniform(100, 1000))
+        else:
+            segment["cpu"] = round(rng.uniform(0.5, 0.8), 2)
+            segment["ram"] = round(rng.uniform(0.7, 0.8), 2)
+        segments.append(segment)
+        elapsed += segment["duration"]
+    return segments
+
+
+def load_schedule(spec: str) -> List[Dict[str, Any]]:
+    """
+    A preset name ("demo", "quick") or a JSON file with a list of segments.
+    """
+    if spec in PRESETS:
+        return normalize_schedule(PRESETS[spec])
+    with open(spec) as f:
+        data = json.load(f)
+    return normalize_schedule(data["segments"] if isinstance(data, dict) else data)
+
+
+def targets_at(schedule: List[Dict[str, Any]], t: float) -> Optional[Tuple[Dict[str, Any], Dict[str, float]]]:
+    """
+    The active segment and its interpolated targets `t` seconds into the
+    schedule, or None once the schedule is over.
+    """
+    start = 0.0
+    for segment in schedule:
+        if t < start + segment["duration"]:
+            frac = (t - start) / segment["duration"]
+            return segment, {r: segment[r][0] + (segment[r][1] - segment[r][0]) * frac for r in RESOURCES}
+        start += segment["duration"]
+    return None
+
+
+def label_at(segment: Dict[str, Any], targets: Dict[str, float]) -> int:
+    """
+    Ground-truth label for one control tick: the segment's own label if it
+    sets one, else 1 if any current target reaches its `STRESS_LEVELS`.
+    """
+    if segment["label"] is not None:
+        return segment["label"]
+    return int(any(targets[r] >= STRESS_LEVELS[r] for r in RESOURCES))
+
+
+# =========================
+# STRESSORS
+# =========================
+def _duty_worker(duty, stop, period: float = DUTY_PERIOD_SEC) -> None:
+    """
+    Busy-loop for `duty.value * period`, sleep for the rest, repeat.
+    """
+    clock = time.perf_counter
+    while not stop.is_set():
+        start = clock()
+        busy_until = start + duty.value * period
+        while clock() < busy_until:
+            pass
+        rest = start + period - clock()
+        if rest > 0:
+            time.sleep(rest)
+
+
+class CpuLoad:
+    """
+    Drive total CPU utilisation to a target with duty-cycled workers.
+
+    One worker process per core runs at the same duty cycle. The duty
+    starts at the target and is corrected every control step by the
+    measured error (integral control), so other load on the machine is
+    accounted for instead of stacked on top.
+    """
+
+    def __init__(self, workers: Optional[int] = None, closed_loop: bool = True):
+        self.closed_loop = closed_loop
+        self._duty = mp.Value("d", 0.0, lock=False)
+        self._stop = mp.Event()
+        self._workers = [
+            mp.Process(target=_duty_worker, args=(self._duty, self._stop), daemon=True)
+            for _ in range(workers or os.cpu_count() or 1)
+        ]
+        self._correction = 0.0
+        for p in self._workers:
+            p.start()
+        psutil.cpu_percent(interval=None)
+
+    def update(self, target: float) -> None:
+        if target <= 0:
+            self._duty.value, self._correction = 0.0, 0.0
+            psutil.cpu_percent(interval=None)
+            return
+        if self.closed_loop:
+            measured = psutil.cpu_percent(interval=None) / 100.0
+            self._correction = min(0.5, max(-0.5, self._correction + CPU_GAIN * (target - measured)))
+        self._duty.value = min(1.0, max(0.0, target + self._correction))
+
+    def close(self) -> None:
+        self._stop.set()
+        for p in self._workers:
+            p.join(timeout=2)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+
+
+class RamLoad:
+    """
+    Hold just enough memory to bring system RAM usage to a target ratio.
+
+    Memory is allocated and released in `RAM_CHUNK_MB` chunks with every
+    page touched, so it really counts as used. Usage is capped at
+    `MAX_RAM_RATIO` regardless of the target.
+    """
+
+    def __init__(self, chunk_mb: int = RAM_CHUNK_MB, max_ratio: float = MAX_RAM_RATIO):
+        self.chunk_bytes = chunk_mb * 1024 * 1024
+        self.max_ratio = max_ratio
+        self._chunks: List[bytearray] = []
+
+    @property
+    def held_bytes(self) -> int:
+        return len(self._chunks) * self.chunk_bytes
+
+    def update(self, target: float) -> None:
+        vm = psutil.virtual_memory()
+        others = vm.total - vm.available - self.held_bytes
+        want = max(0.0, min(target, self.max_ratio) * vm.total - others)
+        while self.held_bytes + self.chunk_bytes <= want:
+            chunk = bytearray(self.chunk_bytes)
+            chunk[::4096] = b"\x01" * len(range(0, self.chunk_bytes, 4096))
+            self._chunks.append(chunk)
+        while self._chunks and self.held_bytes > want:
+            self._chunks.pop()
+
+    def close(self) -> None:
+        self._chunks.clear()
+
+
+class DiskLoad:
+    """
+    Sustain a target write bandwidth and IOPS on a bounded file.
+
+    A background thread writes blocks of `mbps / iops` MB at `iops` writes
+    per second on a drift-free schedule (1 MB blocks without an IOPS
+    target, `IOPS_BLOCK_KB` blocks without a bandwidth target), wrapping
+    around a file of at most
+    `DISK_FILE_MB` so the disk never fills up. It fsyncs every
+    `FSYNC_SEC` and deletes the file on close.
+    """
+
+    def __init__(self, path: str = DISK_FILE, max_mb: int = DISK_FILE_MB):
+        self.path = path
+        self.max_bytes = max_mb * 1024 * 1024
+        self.written = 0
+        self._mbps = 0.0
+        self._iops = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="disk-load", daemon=True)
+        self._thread.start()
+
+    def update(self, mbps: float, iops: float) -> None:
+        self._mbps, self._iops = mbps, iops
+
+    def _run(self) -> None:
+        block = b""
+        offset = 0
+        next_write = last_sync = time.monotonic()
+        with open(self.path, "wb") as f:
+            while not self._stop.is_set():
+                mbps, iops = self._mbps, self._iops
+                if mbps <= 0 and iops <= 0:
+                    self._stop.wait(CONTROL_SEC)
+                    next_write = time.monotonic()
+                    continue
+                if mbps <= 0:
+                    size = IOPS_BLOCK_KB * 1024
+                else:
+                    iops = iops if iops > 0 else max(1.0, mbps)  # default: 1 MB blocks
+                    size = max(512, int(mbps * 1024 * 1024 / iops))
+                if len(block) != size:
+                    block = os.urandom(size)  # incompressible, unlike zeros
+
+                if offset + size > self.max_bytes:
+                    offset = 0
+                f.seek(offset)
+                f.write(block)
+                offset += size
+                self.written += size
+
+                now = time.monotonic()
+                if now - last_sync >= FSYNC_SEC:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    last_sync = now
+                next_write = max(next_write + 1.0 / iops, now - 1.0)  # catch up at most 1 s
+                delay = next_write - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+# =========================
+# WORKLOAD
+# =========================
+def run_workload(schedule: List[Dict[str, Any]],
+                 labels_path: Optional[str] = None,
+                 cpu_workers: Optional[int] = None,
+                 disk_path: str = DISK_FILE,
+                 closed_loop: bool = True,
+                 verbose: bool = True) -> int:
+    """
+    Play a schedule and record ground-truth labels.
+
+    Stressors are only started for resources the schedule uses. Every
+    `CONTROL_SEC` the controller sets the current targets and appends one
+    row to `labels_path` (`LABEL_COLUMNS`: timestamp, segment, 0/1 label
+    from `label_at` and the targets). Everything is released on exit, including Ctrl+C.
+
+    Args:
+        schedule (List[Dict[str, Any]]): Output of `normalize_schedule`.
+        labels_path (str, optional): CSV file for the ground-truth labels.
+        cpu_workers (int, optional): CPU worker processes (default: one per core).
+        disk_path (str): Scratch file for the disk writer.
+        closed_loop (bool): Correct the CPU duty cycle by the measured utilisation.
+        verbose (bool): Print one line per segment.
+
+    Returns:
+        int: Number of label rows written.
+    """
+    uses = {r: any(max(s[r]) > 0 for s in schedule) for r in RESOURCES}
+    cpu = CpuLoad(cpu_workers, closed_loop) if uses["cpu"] else None
+    ram = RamLoad() if uses["ram"] else None
+    disk = DiskLoad(disk_path) if uses["disk_mbps"] or uses["disk_iops"] else None
+
+    label_file = writer = None
+    if labels_path:
+        os.makedirs(os.path.dirname(os.path.abspath(labels_path)), exist_ok=True)
+        new = not os.path.exists(labels_path) or os.path.getsize(labels_path) == 0
+        label_file = open(labels_path, "a", newline="")
+        writer = csv.writer(label_file)
+        if new:
+            writer.writerow(LABEL_COLUMNS)
+
+    rows = 0
+    current = None
+    start = next_tick = time.monotonic()
+    try:
+        while True:
+            active = targets_at(schedule, time.monotonic() - start)
+            if active is None:
+                break
+            segment, targets = active
+            if segment is not current and verbose:
+                label = "by target" if segment["label"] is None else segment["label"]
+                print(f"[workload] {segment['name']} ({segment['duration']:g} s, label={label})", flush=True)
+            current = segment
+
+            if cpu is not None:
+                cpu.update(targets["cpu"])
+            if ram is not None:
+                ram.update(targets["ram"])
+            if disk is not None:
+                disk.update(targets["disk_mbps"], targets["disk_iops"])
+
+            if writer is not None:
+                now = datetime.now(timezone.utc)
+                writer.writerow([
+                    int(now.timestamp() * 1000),
+                    now.strftime("%Y-%m-%dT%H:%M:%S.%f"),
+                    segment["name"],
+                    label_at(segment, targets),
+                    round(targets["cpu"], 4),
+                    round(targets["ram"], 4),
+                    round(targets["disk_mbps"], 2),
+                    round(targets["disk_iops"], 2),
+                ])
+                rows += 1
+
+            next_tick += CONTROL_SEC
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+    except KeyboardInterrupt:
+        if verbose:
+            print("\nWorkload stopped by user.")
+    finally:
+        for stressor in (cpu, ram, disk):
+            if stressor is not None:
+                stressor.close()
+        if label_file is not None:
+            label_file.close()
+    return rows
+
+
+def attach_labels(metrics_path: str, labels_path: str, out_path: str, tolerance_ms: int = 1000) -> int:
+    """
+    Add the workload's ground truth to metrics collected at the same time.
+
+    Each metric row gets the `true_label` (and `segment` or `active`
+    stressors, when present) of the latest label row at or before it
+    (within `tolerance_ms`); rows outside the workload are dropped.
+
+    Returns:
+        int: Number of labelled rows written to `out_path`.
+    """
+    import pandas as pd
+
+    metrics = pd.read_csv(metrics_path).sort_values("timestamp_ms")
+    labels = pd.read_csv(labels_path).sort_values("timestamp_ms")
+    labels = labels[["timestamp_ms", "label"] + [c for c in ("segment", "active") if c in labels]]
+    merged = pd.merge_asof(metrics, labels.rename(columns={"label": "true_label"}),
+                           on="timestamp_ms", direction="backward", tolerance=tolerance_ms)
+    merged = merged.dropna(subset=["true_label"]).astype({"true_label": int})
+    merged.to_csv(out_path, index=False)
+    return len(merged)
+
+
+# =========================
+# MAIN
+# =========================
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Play a controlled, labelled stress workload.")
+    parser.add_argument("--schedule", default="demo",
+                        help=f"Preset ({', '.join(PRESETS)}), 'random', or a JSON file with segments (default: %(default)s).")
+    parser.add_argument("--duration", type=float, default=600,
+                        help="Length of the 'random' schedule in seconds (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the 'random' schedule (default: %(default)s).")
+    parser.add_argument("--labels", default=None, help="CSV file to append ground-truth labels to.")
+    parser.add_argument("--cpu-workers", type=int, default=None, help="CPU worker processes (default: one per core).")
+    parser.add_argument("--disk-path", default=DISK_FILE, help="Scratch file for disk load (default: %(default)s).")
+    parser.add_argument("--open-loop", action="store_true", help="Do not correct CPU duty by measured utilisation.")
+    parser.add_argument("--print", action="store_true", dest="print_only", help="Print the schedule and exit.")
+    args = parser.parse_args(argv)
+
+    if args.schedule == "random":
+        schedule = normalize_schedule(random_schedule(args.duration, args.seed))
+    else:
+        schedule = load_schedule(args.schedule)
+
+    if args.print_only:
+        json.dump(schedule, sys.stdout, indent=2)
+        print()
+        return
+
+    total = sum(s["duration"] for s in schedule)
+    print(f"Running {len(schedule)} segments ({total:g} s). Press Ctrl+C to stop.")
+    rows = run_workload(schedule, args.labels, args.cpu_workers, args.disk_path, not args.open_loop)
+    if args.labels:
+        print(f"{rows} label rows written to {args.labels}")
+
+
+if __name__ == "__main__":
+    main()
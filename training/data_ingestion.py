@@ -1,6 +1,7 @@
 import pandas as pd
 from from_root import from_root
 from dotenv import load_dotenv
+from typing import Dict, Iterator, Tuple
 import os
 
 # =========================
@@ -21,15 +22,92 @@ except TypeError:
     raise ValueError("One or more .env variables are missing or invalid. "
                     "Ensure CPU_QUANTILE, RAM_QUANTILE, DISK_QUANTILE, and ERROR are set.")
 
+# threshold name -> (column, quantile, margin added on top of the quantile)
+THRESHOLD_SPEC = {
+    "cpu": ("cpu_ratio", CPU_QUANTILE, 0.0),
+    "ram": ("ram_ratio", RAM_QUANTILE, ERROR),
+    "disk": ("disk_ratio", DISK_QUANTILE, ERROR),
+}
+
+CHUNK_SIZE = 500_000  # Rows per chunk in streaming mode
+SKETCH_K = 256        # KLL accuracy parameter (rank error ~ 1.7 / k)
+
 
 # =========================
 # FUNCTION DEFINITIONS
 # =========================
-def load_data() -> pd.DataFrame:
+def read_metrics(path: str = PATH) -> pd.DataFrame:
+    """
+    Read raw system metrics from a CSV file or a binary metric store.
+
+    Args:
+        path (str): CSV file, or a binary store directory / `.bin` chunk
+            written by `metric_logger.py --format bin`. Binary stores are
+            memory-mapped instead of parsed. A `.rollups` directory or
+            rollup CSV (see `storage.retention`) gives one row per bucket,
+            with each metric's `ROLLUP_STAT`; a `.segments` directory gives
+            all rotated raw segments.
+
+    Returns:
+        pd.DataFrame: Raw metrics, one row per sample.
+    """
+    from storage import retention
+
+    if retention.is_rollup(path):
+        return retention.read_rollup_metrics(path)
+    if retention.is_segments(path):
+        return retention.read_segments(path)
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+
+    from storage import metric_store
+    return metric_store.read_frame(path)
+
+
+def compute_thresholds(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Compute exact labelling thresholds from in-memory data.
+
+    Args:
+        df (pd.DataFrame): Raw metrics.
+
+    Returns:
+        Dict[str, float]: Threshold per metric ("cpu", "ram", "disk").
+    """
+    return {
+        name: df[column].quantile(q) + margin
+        for name, (column, q, margin) in THRESHOLD_SPEC.items()
+    }
+
+
+def apply_labels(df: pd.DataFrame, thresholds: Dict[str, float]) -> pd.DataFrame:
+    """
+    Add the rule-based `pred_label` column (1 if any metric exceeds its threshold).
+
+    Args:
+        df (pd.DataFrame): Raw metrics, modified in place.
+        thresholds (Dict[str, float]): Output of `compute_thresholds`.
+
+    Returns:
+        pd.DataFrame: The same DataFrame with `pred_label` added.
+    """
+    df["pred_label"] = (
+        (df["cpu_ratio"] > thresholds["cpu"]) |
+        (df["ram_ratio"] > thresholds["ram"]) |
+        (df["disk_ratio"] > thresholds["disk"])
+    ).astype(int)
+    return df
+
+
+def load_data(path: str = PATH) -> pd.DataFrame:
     """
     Load system metrics dataset, compute dynamic thresholds from quantiles,
     and apply a rule-based anomaly detection.
 
+    Args:
+        path (str): Metrics CSV, binary store, `.rollups` or `.segments` directory
+            (see `read_metrics`). Defaults to the CSV at `PATH`.
+
     Returns:
         pd.DataFrame: Original dataset with an added 'pred_label' column,
                     where 1 = anomaly, 0 = normal.
@@ -41,21 +119,11 @@ def load_data() -> pd.DataFrame:
         - Prints label counts, percentages, and computed thresholds.
     """
     # Load dataset
-    df = pd.read_csv(PATH)
+    df = read_metrics(path)
 
-    # Compute thresholds
-    thresholds = {
-        "cpu": df["cpu_ratio"].quantile(CPU_QUANTILE),
-        "ram": df["ram_ratio"].quantile(RAM_QUANTILE) + ERROR,
-        "disk": df["disk_ratio"].quantile(DISK_QUANTILE) + ERROR
-    }
-
-    # Apply rule-based anomaly detection
-    df["pred_label"] = (
-        (df["cpu_ratio"] > thresholds["cpu"]) |
-        (df["ram_ratio"] > thresholds["ram"]) |
-        (df["disk_ratio"] > thresholds["disk"])
-    ).astype(int)
+    # Compute thresholds and apply rule-based anomaly detection
+    thresholds = compute_thresholds(df)
+    apply_labels(df, thresholds)
 
     # Print statistics
     print("Label counts:")
@@ -71,6 +139,180 @@ def load_data() -> pd.DataFrame:
     return df
 
 
+# =========================
+# STREAMING (OUT-OF-CORE)
+# =========================
+def iter_metrics(path: str = PATH, chunksize: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Yield raw metrics in chunks of at most `chunksize` rows.
+
+    CSV files are parsed incrementally; binary stores are memory-mapped one
+    daily chunk at a time, so only one chunk of rows is ever materialized.
+
+    Args:
+        path (str): Metrics CSV or binary store.
+        chunksize (int): Maximum rows per yielded DataFrame.
+    """
+    from storage import retention
+
+    if retention.is_rollup(path):
+        df = retention.read_rollup_metrics(path)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+        return
+    if retention.is_segments(path):
+        for segment in retention.iter_segments(path):
+            for start in range(0, len(segment), chunksize):
+                yield segment.iloc[start:start + chunksize]
+        return
+    if path.endswith(".csv"):
+        yield from pd.read_csv(path, chunksize=chunksize)
+        return
+
+    from storage import metric_store
+    for chunk_path in metric_store.list_chunks(path):
+        records = metric_store.open_chunk(chunk_path)
+        for start in range(0, len(records), chunksize):
+            yield metric_store.records_to_frame(records[start:start + chunksize])
+
+
+def compute_thresholds_streaming(
+    path: str = PATH,
+    chunksize: int = CHUNK_SIZE,
+    k: int = SKETCH_K
+):
+    """
+    Compute labelling thresholds in one streaming pass with KLL sketches.
+
+    Args:
+        path (str): Metrics CSV or binary store.
+        chunksize (int): Rows per chunk.
+        k (int): Sketch accuracy parameter.
+
+    Returns:
+        Tuple[Dict[str, float], Dict[str, KLLSketch]]: Thresholds and the
+        per-metric sketches (mergeable across files or hosts).
+    """
+    from training.quantile_sketch import KLLSketch
+
+    sketches = {name: KLLSketch(k=k) for name in THRESHOLD_SPEC}
+    for chunk in iter_metrics(path, chunksize):
+        for name, (column, _, _) in THRESHOLD_SPEC.items():
+            sketches[name].update(chunk[column].to_numpy())
+
+    thresholds = {
+        name: sketches[name].quantile(q) + margin
+        for name, (_, q, margin) in THRESHOLD_SPEC.items()
+    }
+    return thresholds, sketches
+
+
+def validate_thresholds(path: str, thresholds: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    """
+    Compare streaming thresholds with exact pandas quantiles.
+
+    Loads the whole dataset, so use it on small data only.
+
+    Args:
+        path (str): Metrics CSV or binary store.
+        thresholds (Dict[str, float]): Thresholds from the sketches.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per metric: sketch value, exact value,
+        absolute value error and rank error of the sketch value.
+    """
+    df = read_metrics(path)
+    exact = compute_thresholds(df)
+
+    report = {}
+    print("\nSketch vs exact thresholds:")
+    for name, (column, q, margin) in THRESHOLD_SPEC.items():
+        value = thresholds[name] - margin
+        # With ties the sketch value covers a range of ranks; error is 0 inside it
+        rank_lo = (df[column] < value).mean()
+        rank_hi = (df[column] <= value).mean()
+        report[name] = {
+            "sketch": thresholds[name],
+            "exact": exact[name],
+            "abs_error": abs(thresholds[name] - exact[name]),
+            "rank_error": max(rank_lo - q, q - rank_hi, 0.0),
+        }
+        r = report[name]
+        print(
+            f"{name}: sketch={r['sketch']:.4f} exact={r['exact']:.4f} "
+            f"abs_err={r['abs_error']:.4f} rank_err={r['rank_error']:.4%}"
+        )
+    return report
+
+
+def load_data_streaming(
+    path: str = PATH,
+    chunksize: int = CHUNK_SIZE,
+    k: int = SKETCH_K,
+    validate: bool = False
+) -> Tuple[Dict[str, float], Iterator[pd.DataFrame]]:
+    """
+    Out-of-core counterpart of `load_data` with constant peak memory.
+
+    Pass 1 streams the data through mergeable KLL quantile sketches to get
+    the thresholds; pass 2 (the returned iterator) streams it again and
+    labels each chunk with the same rule as `load_data`.
+
+    Args:
+        path (str): Metrics CSV or binary store.
+        chunksize (int): Rows per chunk; bounds peak memory.
+        k (int): Sketch accuracy parameter (rank error ~ 1.7 / k).
+        validate (bool): Also compute exact pandas quantiles and print the
+            difference. Loads the full dataset; small data only.
+
+    Returns:
+        Tuple[Dict[str, float], Iterator[pd.DataFrame]]: Thresholds and a
+        lazy iterator of labelled chunks (with `pred_label`).
+    """
+    thresholds, _ = compute_thresholds_streaming(path, chunksize, k)
+
+    print("Computed thresholds (streaming):")
+    for name, v in thresholds.items():
+        print(f"{name}: {v:.4f}")
+
+    if validate:
+        validate_thresholds(path, thresholds)
+
+    labelled = (apply_labels(chunk, thresholds) for chunk in iter_metrics(path, chunksize))
+    return thresholds, labelled
+
+
+def load_training_data_streaming(
+    path: str = PATH,
+    chunksize: int = CHUNK_SIZE,
+    k: int = SKETCH_K,
+    validate: bool = False
+) -> pd.DataFrame:
+    """
+    Labelled training frame built from `load_data_streaming`.
+
+    The raw dataset is never loaded as a whole: thresholds come from the
+    sketches, and each labelled chunk keeps only its numeric columns
+    (timestamp, metrics, `pred_label`), which drops the per-row datetime
+    strings. The search still needs the resulting frame in memory.
+
+    Args:
+        path (str): Metrics CSV or binary store.
+        chunksize (int): Rows per chunk.
+        k (int): Sketch accuracy parameter.
+        validate (bool): Print sketch vs exact thresholds (small data only).
+
+    Returns:
+        pd.DataFrame: Numeric metrics with `pred_label`, like `load_data`.
+    """
+    _, labelled = load_data_streaming(path, chunksize, k, validate)
+    df = pd.concat((chunk.select_dtypes("number") for chunk in labelled), ignore_index=True)
+
+    print("\nLabel counts:")
+    print(df["pred_label"].value_counts())
+    return df
+
+
 # =========================
 # MAIN
 # =========================
@@ -5,7 +5,7 @@ from sklearn.linear_model import LogisticRegression
 from imblearn.pipeline import Pipeline
 from imblearn.over_sampling import SMOTE
 import pandas as pd
-from typing import Tuple
+from typing import Sequence, Tuple
 
 # =========================
 # CONFIGURATION
@@ -13,14 +13,33 @@ from typing import Tuple
 FEATURES = ["cpu_ratio", "ram_ratio", "disk_ratio"]
 
 
+def feature_columns(df: pd.DataFrame) -> list:
+    """
+    Return the feature columns to train on: `FEATURES` plus any optional
+    sampler metrics present in `df` (per-core CPU, disk I/O, network,
+    swap, load, top processes; see `monitoring.sampler.METRIC_GROUPS`).
+
+    Args:
+        df (pd.DataFrame): Raw metrics as logged by `metric_logger.py`.
+
+    Returns:
+        list: Column names, in `df` order after `FEATURES`.
+    """
+    from monitoring.sampler import metric_group
+
+    return FEATURES + [c for c in df.columns if c not in FEATURES and metric_group(c) is not None]
+
+
 def preprocess_data(
-    df: pd.DataFrame
+    df: pd.DataFrame,
+    features: Sequence[str] = FEATURES
 ) -> Tuple[Pipeline, pd.DataFrame, pd.Series, pd.DataFrame, pd.Series]:
     """
     Prepare a supervised learning pipeline and split data into train/test sets.
 
     This function:
-    - Extracts predefined system ratio features
+    - Extracts the system ratio features (plus any extra feature columns,
+      e.g. temporal features from `monitoring.temporal_features`)
     - Performs a stratified train/test split on the target label
     - Scales numeric features using StandardScaler
     - Applies SMOTE with a safe, data-dependent neighbor configuration
@@ -29,6 +48,7 @@ def preprocess_data(
     Args:
         df (pd.DataFrame): Input dataset containing feature columns and
             a binary target column named `pred_label`.
+        features (Sequence[str]): Feature columns to train on.
 
     Returns:
         Tuple containing:
@@ -39,7 +59,8 @@ def preprocess_data(
             y_test (pd.Series): Test labels.
     """
 
-    X = df[FEATURES]
+    features = list(features)
+    X = df[features]
     y = df["pred_label"]
 
     X_train, X_test, y_train, y_test = train_test_split(
@@ -52,7 +73,7 @@ def preprocess_data(
 
     preprocessor = ColumnTransformer(
         transformers=[
-            ("num", StandardScaler(), FEATURES)
+            ("num", StandardScaler(), features)
         ]
     )
 
@@ -0,0 +1,352 @@
+import os
+import time
+import contextlib
+import traceback
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from from_root import from_root
+
+from training import model_cost
+
+# =========================
+# CONFIGURATION
+# =========================
+FLEET_DATA_DIR = os.path.join(from_root(), "notebooks", "Data", "fleet")  # collector.aggregator's OUT_DIR
+FLEET_MODEL_DIR = os.path.join(from_root(), "models", "fleet")
+SUMMARY_FILE = "summary.csv"
+LOG_FILE = "train.log"
+STATUS_WIDTH = 40             # Printed width of the status column (summary.csv has it in full)
+
+WORKER_BASE_MB = 250          # RSS of a worker with pandas/sklearn/imblearn loaded
+DATA_MEMORY_FACTOR = 12       # Peak training memory per byte of dataset on disk (frame, folds, SMOTE)
+MEMORY_HEADROOM = 1.5         # Per-worker RSS limit = estimate x headroom (when a budget is set)
+RSS_POLL_SEC = 0.5            # How often running workers are checked against the RSS limit
+
+SUMMARY_COLUMNS = [
+    "host", "status", "rows", "anomaly_rate", "model", "cv_f1", "test_f1",
+    "p99_us", "load_sec", "search_sec", "total_sec", "peak_rss_mb",
+]
+
+
+# =========================
+# DISCOVERY
+# =========================
+def discover_hosts(data_dir: str = FLEET_DATA_DIR) -> Dict[str, str]:
+    """
+    Find per-host datasets.
+
+    A host is a `<host>.csv` file or a `<host>/` directory (a binary store
+    as written by `collector.aggregator`, or `.segments`/`.rollups` from
+    `storage.retention`) directly under `data_dir`.
+
+    Returns:
+        Dict[str, str]: Host name -> dataset path, sorted by host.
+    """
+    if not os.path.isdir(data_dir):
+        raise FileNotFoundError(f"Fleet data directory not found: {data_dir}")
+
+    hosts = {}
+    for name in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, name)
+        if name.startswith("."):
+            continue
+        if os.path.isdir(path):
+            hosts[name] = path
+        elif name.endswith(".csv"):
+            hosts[name[:-len(".csv")]] = path
+    return hosts
+
+
+def dataset_bytes(path: str) -> int:
+    """
+    Size of a dataset on disk (all files of a directory).
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, n))
+        for root, _, names in os.walk(path) for n in names
+    )
+
+
+def estimate_memory_mb(path: str) -> float:
+    """
+    Rough peak RSS of training one host, used to size the worker pool.
+    """
+    return WORKER_BASE_MB + dataset_bytes(path) * DATA_MEMORY_FACTOR / 2 ** 20
+
+
+def plan_workers(hosts: Dict[str, str],
+                 max_workers: Optional[int] = None,
+                 memory_mb: Optional[float] = None) -> Tuple[int, Optional[float]]:
+    """
+    Choose the number of parallel workers under a CPU and memory budget.
+
+    Args:
+        hosts (Dict[str, str]): Host -> dataset path.
+        max_workers (int, optional): CPU budget (default: all cores).
+        memory_mb (float, optional): Total memory budget for the workers.
+
+    Returns:
+        Tuple[int, Optional[float]]: Worker count and the per-worker RSS
+        limit in MB (None without a memory budget).
+    """
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(hosts) or 1))
+    if not memory_mb:
+        return workers, None
+
+    largest = max((estimate_memory_mb(p) for p in hosts.values()), default=WORKER_BASE_MB)
+    fit = int(memory_mb // largest)
+    if fit < 1:
+        raise ValueError(
+            f"Memory budget {memory_mb:.0f} MB is below the estimated {largest:.0f} MB "
+            f"needed for the largest host."
+        )
+    workers = min(workers, fit)
+    return workers, min(memory_mb / workers, largest * MEMORY_HEADROOM)
+
+
+# =========================
+# WORKER
+# =========================
+def _rss_mb(pid: int) -> float:
+    """
+    Current resident memory of a worker process (0 once it has exited).
+    """
+    import psutil
+
+    try:
+        return psutil.Process(pid).memory_info().rss / 2 ** 20
+    except psutil.Error:
+        return 0.0
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def train_host(host: str,
+               path: str,
+               out_dir: str = FLEET_MODEL_DIR,
+               search: str = "grid",
+               selection: str = model_cost.SELECTION,
+               max_p99_us: Optional[float] = model_cost.MAX_P99_US,
+               max_size_bytes: Optional[float] = model_cost.MAX_SIZE_BYTES,
+               f1_tolerance: float = model_cost.F1_TOLERANCE,
+               temporal_window: int = 0) -> Dict[str, Any]:
+    """
+    Run the full retraining pipeline for one host.
+
+    Labelling thresholds, preprocessing, search and model selection are
+    the same as `retrain.py`, but computed from this host's data only.
+    The search runs single-threaded, since parallelism comes from training
+    many hosts at once. Output of the steps goes to `<out_dir>/<host>/train.log`.
+
+    Args:
+        host (str): Host name.
+        path (str): The host's dataset (CSV, binary store, segments or rollups).
+        out_dir (str): Root of the per-host model directories.
+        search (str): "grid" or "halving".
+        selection, max_p99_us, max_size_bytes, f1_tolerance: See
+            `model_training_and_evaluation.model_training_and_eval`.
+        temporal_window (int): Rolling feature window (0 = off).
+
+    Returns:
+        Dict[str, Any]: One `SUMMARY_COLUMNS` row. Failures are reported
+        with status "failed: ..." instead of raising.
+    """
+    import joblib
+    from sklearn.metrics import f1_score
+    from training import data_ingestion, data_preprocessing, model_training_and_evaluation
+
+    host_dir = os.path.join(out_dir, host)
+    os.makedirs(host_dir, exist_ok=True)
+    row: Dict[str, Any] = {column: None for column in SUMMARY_COLUMNS}
+    row.update(host=host, status="ok")
+
+    start = time.perf_counter()
+    # Estimators with n_jobs=-1 (e.g. the random forests) run sequentially too,
+    # so W workers use W cores
+    with open(os.path.join(host_dir, LOG_FILE), "w") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log), \
+            joblib.parallel_config(backend="sequential"):
+        try:
+            df = data_ingestion.load_data(path)
+            features = data_preprocessing.feature_columns(df)
+            if temporal_window:
+                from monitoring.temporal_features import add_temporal_features
+                df, temporal = add_temporal_features(df, temporal_window)
+                features = features + temporal
+            pipeline, X_train, y_train, X_test, y_test = data_preprocessing.preprocess_data(df, features)
+            row.update(rows=len(df), anomaly_rate=round(float(df["pred_label"].mean()), 4))
+            row["load_sec"] = round(time.perf_counter() - start, 2)
+
+            search_start = time.perf_counter()
+            best_model, best_params = model_training_and_evaluation.model_training_and_eval(
+                pipeline, X_train, y_train, X_test, y_test,
+                search=search,
+                n_jobs=1,
+                selection=selection,
+                max_p99_us=max_p99_us,
+                max_size_bytes=max_size_bytes,
+                f1_tolerance=f1_tolerance
+            )
+            row["search_sec"] = round(time.perf_counter() - search_start, 2)
+
+            model_training_and_evaluation.save_model_and_params(
+                best_model,
+                best_params,
+                model_path=os.path.join(host_dir, os.path.basename(model_training_and_evaluation.MODEL_PATH)),
+                params_path=os.path.join(host_dir, os.path.basename(model_training_and_evaluation.PARAMS_PATH))
+            )
+
+            chosen = next(c for c in best_params["selection"]["candidates"]
+                          if c["name"] == best_params["selection"]["chosen"])
+            row.update(
+                model=best_params["selection"]["chosen"],
+                cv_f1=round(chosen["f1"], 4),
+                test_f1=round(float(f1_score(y_test, best_model.predict(X_test))), 4),
+                p99_us=round(chosen["single_p99_us"], 1),
+            )
+        except Exception as e:  # One bad host must not stop the batch
+            row["status"] = f"failed: {type(e).__name__}: {e}"
+            traceback.print_exc()
+
+    row["total_sec"] = round(time.perf_counter() - start, 2)
+    row["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+    return row
+
+
+def _run_host(conn, args: Tuple, kwargs: Dict[str, Any]) -> None:
+    """
+    Worker process entry point: train one host and send its summary row back.
+    """
+    conn.send(train_host(*args, **kwargs))
+    conn.close()
+
+
+def _failed_row(host: str, status: str, total_sec: float, peak_rss_mb: Optional[float] = None) -> Dict[str, Any]:
+    row = {column: None for column in SUMMARY_COLUMNS}
+    row.update(host=host, status=f"failed: {status}", total_sec=round(total_sec, 2), peak_rss_mb=peak_rss_mb)
+    return row
+
+
+# =========================
+# FLEET
+# =========================
+def train_fleet(data_dir: str = FLEET_DATA_DIR,
+                out_dir: str = FLEET_MODEL_DIR,
+                max_workers: Optional[int] = None,
+                memory_mb: Optional[float] = None,
+                hosts: Optional[List[str]] = None,
+                **train_options) -> List[Dict[str, Any]]:
+    """
+    Train one model per host in parallel worker processes.
+
+    Behavior:
+        - Hosts are discovered with `discover_hosts` (optionally filtered
+          to `hosts`) and scheduled largest dataset first, which keeps the
+          last workers from idling behind one big host.
+        - The number of concurrent workers follows the CPU budget and,
+          with `memory_mb`, the estimated per-host memory; a worker whose
+          RSS then exceeds its share is killed and its host reported as
+          failed.
+        - Every host runs in its own worker process, so one host's memory
+          use or crash does not carry over to the next, and a worker that
+          dies only fails its own host.
+        - Each host's pipeline, parameters and lean export are written to
+          `<out_dir>/<host>/`, its training output to `train.log`, and a
+          summary table of timings and scores to `<out_dir>/summary.csv`.
+
+    Args:
+        data_dir (str): Directory of per-host datasets.
+        out_dir (str): Root of the per-host model directories.
+        max_workers (int, optional): CPU budget (default: all cores).
+        memory_mb (float, optional): Memory budget for all workers.
+        hosts (List[str], optional): Only train these hosts.
+        **train_options: Passed to `train_host` (search, selection, ...).
+
+    Returns:
+        List[Dict[str, Any]]: Summary rows, sorted by host.
+    """
+    import pandas as pd
+
+    found = discover_hosts(data_dir)
+    if hosts:
+        missing = sorted(set(hosts) - set(found))
+        if missing:
+            raise ValueError(f"No dataset for host(s): {', '.join(missing)}")
+        found = {h: p for h, p in found.items() if h in hosts}
+    if not found:
+        raise FileNotFoundError(f"No host datasets found in: {data_dir}")
+
+    workers, limit_mb = plan_workers(found, max_workers, memory_mb)
+    order = sorted(found, key=lambda h: dataset_bytes(found[h]), reverse=True)
+    print(f"[fleet] Training {len(found)} hosts with {workers} worker(s)"
+          + (f", {limit_mb:.0f} MB each" if limit_mb else ""))
+
+    start = time.perf_counter()
+    rows = []
+    # A fresh process per host: memory is returned between hosts, the peak
+    # RSS in the summary belongs to that host alone, and a crash (or a kill
+    # for exceeding the RSS limit) takes no other host with it
+    ctx = mp.get_context()
+    pending = list(order)
+    running: Dict[str, Tuple[Any, Any, float, float]] = {}  # host -> (process, connection, start, peak RSS)
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                host = pending.pop(0)
+                receiver, sender = ctx.Pipe(duplex=False)
+                process = ctx.Process(target=_run_host, args=(sender, (host, found[host], out_dir), train_options))
+                process.start()
+                sender.close()
+                running[host] = (process, receiver, time.perf_counter(), 0.0)
+
+            wait([conn for _, conn, _, _ in running.values()], timeout=RSS_POLL_SEC)
+            for host, (process, conn, started, peak) in list(running.items()):
+                elapsed = time.perf_counter() - started
+                if conn.poll():
+                    try:
+                        row = conn.recv()
+                    except EOFError:  # Died without a result (crash, killed by the OS)
+                        process.join()
+                        row = _failed_row(host, f"worker exited with code {process.exitcode}",
+                                          elapsed, round(peak, 1))
+                else:
+                    rss = _rss_mb(process.pid)
+                    if not limit_mb or rss <= limit_mb:
+                        running[host] = (process, conn, started, max(peak, rss))
+                        continue
+                    process.kill()
+                    row = _failed_row(host, f"RSS {rss:.0f} MB over the {limit_mb:.0f} MB limit",
+                                      elapsed, round(rss, 1))
+
+                process.join()
+                conn.close()
+                del running[host]
+                rows.append(row)
+                print(f"[fleet] {len(rows)}/{len(found)} {host}: {row['status']} "
+                      f"({row['total_sec'] if row['total_sec'] is not None else '-'} s)")
+    finally:
+        for process, conn, _, _ in running.values():  # Interrupted: don't leave workers behind
+            process.kill()
+            process.join()
+
+    rows.sort(key=lambda r: r["host"])
+    os.makedirs(out_dir, exist_ok=True)
+    summary = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+    summary.to_csv(os.path.join(out_dir, SUMMARY_FILE), index=False)
+
+    table = summary.assign(status=summary["status"].str.slice(0, STATUS_WIDTH))
+    print("\n" + table.to_string(index=False) + "\n")
+    failed = sum(not str(r["status"]).startswith("ok") for r in rows)
+    print(f"[fleet] {len(rows) - failed} trained, {failed} failed in {time.perf_counter() - start:.1f} s; "
+          f"models and summary in {out_dir}")
+    return rows
@@ -0,0 +1,377 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from from_root import from_root
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import SGDClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.utils.class_weight import compute_sample_weight
+from imblearn.pipeline import Pipeline
+
+from monitoring.temporal_features import continue_temporal_features
+from training import data_ingestion
+from training.data_preprocessing import FEATURES, feature_columns
+from training.model_training_and_evaluation import MODEL_PATH, PARAMS_PATH, atomic_dump, save_model_and_params
+from training.quantile_sketch import KLLSketch
+from storage import retention
+from storage.time_index import RangeReader, complete_end
+
+# =========================
+# CONFIGURATION
+# =========================
+STATE_PATH = os.path.join(from_root(), 'models', 'supervised_incremental_state_simple.joblib')
+
+MODEL_KINDS = ("forest", "sgd")   # Append trees to RF/GB, or partial_fit a linear SGD model
+NEW_TREES = 10                    # Trees (or boosting stages) added per update
+TIMESTAMP_COLUMNS = ("timestamp_ms", "timestamp")
+OFFSET_CHECK_BYTES = 4096         # Bytes read back from a stored CSV offset to find the watermark row
+
+
+# =========================
+# HELPERS
+# =========================
+def timestamp_column(df: pd.DataFrame) -> str:
+    """
+    Return the epoch-milliseconds column of a metrics frame.
+    """
+    for name in TIMESTAMP_COLUMNS:
+        if name in df.columns:
+            return name
+    raise KeyError(f"No timestamp column found; expected one of {TIMESTAMP_COLUMNS}.")
+
+
+def _resume_offset(path: str, columns: List[str], data_start: int, watermark_ms: int,
+                   offset: Optional[int], size: int) -> int:
+    """
+    Byte offset to resume reading a CSV from, or `data_start` to rescan it.
+
+    `offset` is trusted only if the row just before it is still the last
+    row trained on (its timestamp equals the watermark); a rotated or
+    rewritten log fails the check and is read from the start.
+    """
+    names = [name for name in TIMESTAMP_COLUMNS if name in columns]
+    if offset is None or not names or not data_start < offset <= size:
+        return data_start
+    column = columns.index(names[0])
+    start = max(data_start, offset - OFFSET_CHECK_BYTES)
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(offset - start)
+    if not data.endswith(b"\n"):
+        return data_start
+    lines = data[:-1].rsplit(b"\n", 1)
+    if len(lines) == 1 and start > data_start:  # Row longer than the check window
+        return data_start
+    try:
+        return offset if int(float(lines[-1].split(b",")[column])) == watermark_ms else data_start
+    except (IndexError, ValueError):
+        return data_start
+
+
+def read_new_rows(path: str, watermark_ms: int, offset: Optional[int] = None) -> Tuple[pd.DataFrame, Optional[int]]:
+    """
+    Read the rows logged after `watermark_ms`.
+
+    Binary stores skip old daily chunks and binary-search the first
+    relevant one, so the cost is O(new rows). CSV files have no index:
+    reading resumes at the byte offset returned by the previous call once
+    the row before it is confirmed to be the watermark row, otherwise the
+    whole file is streamed in chunks. A row still being written at the
+    end of the CSV is left for the next call.
+
+    Args:
+        path (str): Metrics CSV or binary store.
+        watermark_ms (int): Timestamp of the last row already trained on.
+        offset (int, optional): CSV byte offset returned by the previous call.
+
+    Returns:
+        Tuple[pd.DataFrame, Optional[int]]: New raw metrics, and the CSV
+        offset to resume from next time (None for binary stores and rollups).
+    """
+    if not path.endswith(".csv"):
+        from storage import metric_store
+        return metric_store.read_frame_after(path, watermark_ms), None
+
+    if retention.is_rollup(path):  # Aggregated on read, so there is no raw offset to keep
+        parts = []
+        for chunk in data_ingestion.iter_metrics(path):
+            ts = chunk[timestamp_column(chunk)]
+            parts.append(chunk[ts > watermark_ms])
+        return pd.concat(parts, ignore_index=True), None
+
+    columns, has_header = retention.csv_header(path)
+    with open(path, "rb") as f:
+        data_start = len(f.readline()) if has_header else 0
+    end = complete_end(path, os.path.getsize(path))
+    start = _resume_offset(path, columns, data_start, watermark_ms, offset, end)
+    if start == data_start and offset not in (None, data_start):
+        print("Stored CSV offset no longer matches the watermark row; rescanning the log.")
+
+    parts = []
+    if end > start:
+        reader = RangeReader(path, start, end)
+        try:
+            for chunk in pd.read_csv(reader, header=None, names=columns, chunksize=data_ingestion.CHUNK_SIZE):
+                ts = chunk[timestamp_column(chunk)]
+                parts.append(chunk[ts > watermark_ms])
+        finally:
+            reader.close()
+    new = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+    return new, end
+
+
+def model_features(pipeline: Pipeline) -> List[str]:
+    """
+    Feature columns the saved pipeline was fitted on, in its input order.
+    """
+    return list(pipeline.named_steps["preprocess"].feature_names_in_)
+
+
+def _thresholds(sketches: Dict[str, KLLSketch]) -> Dict[str, float]:
+    return {
+        name: sketches[name].quantile(q) + margin
+        for name, (_, q, margin) in data_ingestion.THRESHOLD_SPEC.items()
+    }
+
+
+def _rebase_linear(clf: SGDClassifier, old_mean, old_scale, new_mean, new_scale) -> None:
+    """
+    Rewrite a linear model's weights for updated scaler statistics so its
+    decision function on raw inputs is unchanged.
+    """
+    coef = clf.coef_[0]
+    clf.intercept_ = clf.intercept_ + np.sum(coef * (new_mean - old_mean) / old_scale)
+    clf.coef_ = (coef * new_scale / old_scale).reshape(1, -1)
+
+
+def build_sgd_pipeline(features: Sequence[str] = FEATURES) -> Pipeline:
+    """
+    Scaler + logistic SGD classifier, the online counterpart of the search pipeline.
+    """
+    return Pipeline(steps=[
+        ("preprocess", ColumnTransformer(transformers=[("num", StandardScaler(), list(features))])),
+        ("clf", SGDClassifier(loss="log_loss", random_state=42)),
+    ])
+
+
+# =========================
+# STATE
+# =========================
+def bootstrap_state(
+    path: str,
+    kind: str,
+    model_path: str = MODEL_PATH
+) -> Tuple[Pipeline, Dict[str, Any]]:
+    """
+    Create the incremental state from the full history (run once).
+
+    Streams the history to build the threshold sketches, running scaler
+    statistics and the watermark. For "forest" the existing saved RF/GB
+    pipeline is reused as-is, with its own feature list (optional metric
+    groups and temporal features included); for "sgd" a linear model is
+    trained on the logged metric columns by streaming `partial_fit` over
+    the labelled chunks.
+
+    Args:
+        path (str): Metrics CSV or binary store.
+        kind (str): "forest" or "sgd".
+        model_path (str): Saved pipeline to start from ("forest").
+
+    Returns:
+        Tuple[Pipeline, Dict[str, Any]]: Pipeline and new state.
+    """
+    pipeline, features = None, None
+    if kind == "forest":
+        pipeline = joblib.load(model_path)
+        clf = pipeline.named_steps["clf"]
+        if not isinstance(clf, (RandomForestClassifier, GradientBoostingClassifier)):
+            raise ValueError(
+                f"Incremental 'forest' mode needs a RandomForest or GradientBoosting model, "
+                f"found {type(clf).__name__}. Use kind='sgd' instead."
+            )
+        features = model_features(pipeline)
+
+    sketches = {name: KLLSketch() for name in data_ingestion.THRESHOLD_SPEC}
+    running_scaler = StandardScaler()
+    watermark_ms = -1
+    context = None
+    offset = None
+    if path.endswith(".csv") and not retention.is_rollup(path):
+        # Resume point for `read_new_rows`; rows appended during the scan make
+        # it fail the watermark check, and the first update rescans instead
+        offset = complete_end(path, os.path.getsize(path))
+
+    for chunk in data_ingestion.iter_metrics(path):
+        for name, (column, _, _) in data_ingestion.THRESHOLD_SPEC.items():
+            sketches[name].update(chunk[column].to_numpy())
+        if features is None:
+            features = feature_columns(chunk)
+        chunk, context = continue_temporal_features(chunk, features, context)
+        running_scaler.partial_fit(chunk[features])
+        watermark_ms = max(watermark_ms, int(chunk[timestamp_column(chunk)].max()))
+
+    thresholds = _thresholds(sketches)
+
+    if pipeline is None:
+        pipeline = build_sgd_pipeline(features)
+        preprocessor = pipeline.named_steps["preprocess"]
+        clf = pipeline.named_steps["clf"]
+
+        first = True
+        for chunk in data_ingestion.iter_metrics(path):
+            data_ingestion.apply_labels(chunk, thresholds)
+            if first:
+                preprocessor.fit(chunk[features])
+                scaler = preprocessor.named_transformers_["num"]
+                scaler.mean_, scaler.var_, scaler.scale_ = (
+                    running_scaler.mean_.copy(), running_scaler.var_.copy(), running_scaler.scale_.copy()
+                )
+                scaler.n_samples_seen_ = running_scaler.n_samples_seen_
+                first = False
+            y = chunk["pred_label"].to_numpy()
+            clf.partial_fit(
+                preprocessor.transform(chunk[features]), y,
+                classes=np.array([0, 1]),
+                sample_weight=compute_sample_weight("balanced", y)
+            )
+
+    state = {
+        "kind": kind,
+        "watermark_ms": watermark_ms,
+        "offset": offset,
+        "context": context,
+        "sketches": sketches,
+        "running_scaler": running_scaler,
+        "thresholds": thresholds,
+        "updates": 0,
+    }
+    return pipeline, state
+
+
+def load_state(state_path: str = STATE_PATH) -> Optional[Dict[str, Any]]:
+    """
+    Load the incremental state saved next to the model, if any.
+    """
+    if not os.path.exists(state_path):
+        return None
+    return joblib.load(state_path)
+
+
+def save_state(state: Dict[str, Any], state_path: str = STATE_PATH) -> None:
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    atomic_dump(state, state_path)
+    print(f"Incremental state saved to: {state_path} (watermark_ms={state['watermark_ms']})")
+
+
+# =========================
+# UPDATE
+# =========================
+def incremental_update(
+    path: str = data_ingestion.PATH,
+    kind: str = "forest",
+    model_path: str = MODEL_PATH,
+    params_path: str = PARAMS_PATH,
+    state_path: str = STATE_PATH,
+    new_trees: int = NEW_TREES
+) -> Optional[Pipeline]:
+    """
+    Update the saved model with only the rows added since the last checkpoint.
+
+    Steps:
+        - Reads rows with a timestamp after the stored watermark (CSV logs
+          resume at the stored byte offset) and builds
+          the saved pipeline's features for them (temporal features
+          continue from the rows kept at the previous update).
+        - Merges them into the KLL threshold sketches and labels them with
+          the updated thresholds.
+        - Updates running scaler statistics.
+        - "sgd": rebases the linear weights onto the updated scaler and calls
+          `partial_fit`. "forest": keeps the pipeline scaler fixed (existing
+          trees depend on it) and appends `new_trees` warm-started trees or
+          boosting stages fitted on the new rows.
+        - Saves the model, params and the advanced watermark.
+
+    The first call (no state yet) bootstraps from the full history; every
+    later call costs O(new rows).
+
+    Args:
+        path (str): Metrics CSV or binary store.
+        kind (str): "forest" or "sgd" (used when bootstrapping).
+        model_path (str): Saved pipeline path.
+        params_path (str): Saved parameters path.
+        state_path (str): Incremental state path.
+        new_trees (int): Trees/stages appended per update ("forest").
+
+    Returns:
+        Optional[Pipeline]: Updated pipeline, or None if there was no new data.
+    """
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Invalid kind '{kind}'. Choose from {list(MODEL_KINDS)}.")
+
+    params = joblib.load(params_path) if os.path.exists(params_path) else {}
+    state = load_state(state_path)
+
+    if state is None:
+        print("No incremental state found; bootstrapping from the full history...")
+        pipeline, state = bootstrap_state(path, kind, model_path)
+    else:
+        new, state["offset"] = read_new_rows(path, state["watermark_ms"], state.get("offset"))
+        if new.empty:
+            print(f"No new rows after watermark {state['watermark_ms']}; model unchanged.")
+            return None
+
+        print(f"Updating with {len(new)} new rows...")
+        pipeline = joblib.load(model_path)
+        preprocessor = pipeline.named_steps["preprocess"]
+        clf = pipeline.named_steps["clf"]
+        features = model_features(pipeline)
+        new, state["context"] = continue_temporal_features(new, features, state.get("context"))
+
+        # Thresholds and labels
+        for name, (column, _, _) in data_ingestion.THRESHOLD_SPEC.items():
+            state["sketches"][name].update(new[column].to_numpy())
+        state["thresholds"] = _thresholds(state["sketches"])
+        data_ingestion.apply_labels(new, state["thresholds"])
+
+        X_new = new[features]
+        y_new = new["pred_label"].to_numpy()
+        state["running_scaler"].partial_fit(X_new)
+
+        if isinstance(clf, SGDClassifier):
+            scaler = preprocessor.named_transformers_["num"]
+            old_mean, old_scale = scaler.mean_.copy(), scaler.scale_.copy()
+            scaler.partial_fit(X_new)
+            _rebase_linear(clf, old_mean, old_scale, scaler.mean_, scaler.scale_)
+            clf.partial_fit(
+                preprocessor.transform(X_new), y_new,
+                sample_weight=compute_sample_weight("balanced", y_new)
+            )
+        elif len(np.unique(y_new)) < 2:
+            print("New rows contain a single class; skipping tree append this round.")
+        else:
+            X_fit, y_fit = preprocessor.transform(X_new), y_new
+            if "smote" in pipeline.named_steps:
+                minority = int(np.bincount(y_fit).min())
+                if minority >= 2:
+                    smote = clone(pipeline.named_steps["smote"])
+                    smote.set_params(k_neighbors=max(1, min(2, minority - 1)))
+                    X_fit, y_fit = smote.fit_resample(X_fit, y_fit)
+            clf.set_params(warm_start=True, n_estimators=clf.n_estimators + new_trees)
+            clf.fit(X_fit, y_fit)
+
+        state["watermark_ms"] = int(new[timestamp_column(new)].max())
+        state["updates"] += 1
+
+    params["incremental"] = {
+        "kind": state["kind"],
+        "watermark_ms": state["watermark_ms"],
+        "updates": state["updates"],
+        "thresholds": state["thresholds"],
+    }
+    save_model_and_params(pipeline, params, model_path, params_path)
+    save_state(state, state_path)
+    return pipeline
@@ -0,0 +1,305 @@
+import io
+import os
+import time
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import cross_val_score
+
+from monitoring.scorer import compile_pipeline, export_lean, LEAN_SCORERS
+
+# =========================
+# CONFIGURATION
+# =========================
+SELECTION_STRATEGIES = ("f1", "budget", "pareto")
+SELECTION = "pareto"          # Default strategy, see `select_candidate`
+F1_TOLERANCE = 0.005          # "pareto": accept this much CV F1 below the best for a cheaper model
+MAX_P99_US = None             # Budget: single-sample p99 latency (None = no limit)
+MAX_SIZE_BYTES = None         # Budget: serialized pipeline size (None = no limit)
+
+SHORTLIST_PER_FAMILY = 3      # Best CV candidates per classifier type that are refit and measured
+SINGLE_CALLS = 2000           # Timed predict_one calls per candidate
+BATCH_ROWS = 1024             # Rows per timed batch predict
+REPEATS = 3                   # Batch/load timings keep the best of this many runs
+
+
+# =========================
+# MEASUREMENT
+# =========================
+def candidate_name(params: Dict[str, Any]) -> str:
+    """
+    Short label for a grid point, e.g. "RandomForestClassifier(n_estimators=100, max_depth=10)".
+    """
+    clf = params.get("clf")
+    args = ", ".join(f"{k[len('clf__'):]}={v}" for k, v in params.items() if k.startswith("clf__"))
+    return f"{type(clf).__name__}({args})"
+
+
+def measure_cost(model, X: np.ndarray,
+                 single_calls: int = SINGLE_CALLS,
+                 batch_rows: int = BATCH_ROWS) -> Dict[str, Optional[float]]:
+    """
+    Measure what a trained pipeline costs to run in the monitor.
+
+    Latencies are taken on the compiled scorer, which is what `main.py`
+    runs every tick: `predict_one` per sample (p50/p99) and `predict` on a
+    batch (per row). Size and load time are for the joblib pipeline that
+    is shipped; the lean `.npz` size is reported when the model has one.
+
+    Args:
+        model (Pipeline): Fitted preprocessing + classifier pipeline.
+        X (np.ndarray): Feature rows in the pipeline's feature order.
+        single_calls (int): Timed single-sample predictions.
+        batch_rows (int): Rows in the timed batch.
+
+    Returns:
+        Dict[str, Optional[float]]: single_p50_us, single_p99_us,
+        batch_us_per_row, size_bytes, load_ms and lean_bytes.
+    """
+    scorer = compile_pipeline(model)
+    X = np.asarray(X, dtype=np.float64)
+    rows = X[np.arange(single_calls) % len(X)]
+    batch = X[np.arange(batch_rows) % len(X)]
+
+    clock = time.perf_counter_ns
+    for row in rows[:100]:  # Warm-up
+        scorer.predict_one(row)
+    single = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = clock()
+        scorer.predict_one(row)
+        single[i] = clock() - start
+
+    batch_ns = []
+    for _ in range(REPEATS):
+        start = clock()
+        scorer.predict(batch)
+        batch_ns.append(clock() - start)
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    blob = buffer.getvalue()
+    load_ns = []
+    for _ in range(REPEATS):
+        start = clock()
+        joblib.load(io.BytesIO(blob))
+        load_ns.append(clock() - start)
+
+    lean_bytes = None
+    if scorer.family in LEAN_SCORERS:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = export_lean(scorer, os.path.join(tmp, "model.npz"))
+            lean_bytes = os.path.getsize(path)
+
+    return {
+        "single_p50_us": float(np.percentile(single, 50) / 1000),
+        "single_p99_us": float(np.percentile(single, 99) / 1000),
+        "batch_us_per_row": min(batch_ns) / len(batch) / 1000,
+        "size_bytes": len(blob),
+        "load_ms": min(load_ns) / 1e6,
+        "lean_bytes": lean_bytes,
+    }
+
+
+# =========================
+# CANDIDATES
+# =========================
+def search_results(search) -> List[Tuple[Dict[str, Any], float]]:
+    """
+    (params, mean CV F1) for every candidate of a finished search.
+
+    Works with `GridSearchCV` and `training.search.SuccessiveHalvingSearch`;
+    for the latter, each candidate's score from the last round it reached
+    is used (see `full_cv_scored` for which of those are comparable).
+    """
+    results = search.cv_results_
+    if isinstance(results, dict):
+        return list(zip(results["params"], map(float, results["mean_test_score"])))
+
+    latest = {}
+    for entry in results:  # Rounds are in order, so later entries win
+        latest[id(entry["params"])] = (entry["params"], float(entry["mean_test_score"]))
+    return list(latest.values())
+
+
+def full_cv_scored(search, params: Dict[str, Any]) -> bool:
+    """
+    True if the search scored `params` with CV on the full training folds.
+
+    Always true for `GridSearchCV`. With successive halving only the final
+    round is; candidates eliminated earlier carry an F1 from small
+    subsamples that is not comparable with full-data scores.
+    """
+    results = search.cv_results_
+    if isinstance(results, dict):
+        return True
+    final = max(entry["round"] for entry in results)
+    return any(entry["params"] is params and entry["round"] == final for entry in results)
+
+
+def _build(pipeline, params: Dict[str, Any]):
+    # Grid points share one estimator object per family; never mutate it
+    return clone(pipeline).set_params(**{**params, "clf": clone(params["clf"])})
+
+
+def shortlist(results: Sequence[Tuple[Dict[str, Any], float]],
+              per_family: int = SHORTLIST_PER_FAMILY) -> List[Tuple[Dict[str, Any], float]]:
+    """
+    Keep the `per_family` best candidates of each classifier type.
+
+    Cheap families (e.g. logistic regression) stay in the running even
+    when the F1 ranking is dominated by ensemble variants.
+    """
+    by_family: Dict[str, List[Tuple[Dict[str, Any], float]]] = {}
+    for params, score in sorted(results, key=lambda r: r[1], reverse=True):
+        family = by_family.setdefault(type(params["clf"]).__name__, [])
+        if len(family) < per_family and not np.isnan(score):
+            family.append((params, score))
+    return [c for family in by_family.values() for c in family]
+
+
+def evaluate_candidates(search, pipeline, X_train, y_train, X_measure: np.ndarray,
+                        per_family: int = SHORTLIST_PER_FAMILY) -> List[Dict[str, Any]]:
+    """
+    Refit the shortlisted candidates on the full training set and measure them.
+
+    The search's own refit is reused for its best candidate. Candidates
+    whose search score comes from a successive-halving subsample are
+    re-scored with full CV (same folds as the search), so every F1 used for
+    selection is measured on the same amount of data.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per candidate: "name", "params",
+        "f1" (mean CV F1), "model" (fitted pipeline) and "cost"
+        (`measure_cost` output).
+    """
+    candidates = []
+    for params, score in shortlist(search_results(search), per_family):
+        if not full_cv_scored(search, params):
+            score = float(np.mean(cross_val_score(_build(pipeline, params), X_train, y_train,
+                                                  cv=search.cv, scoring="f1")))
+            print(f"Re-scored {candidate_name(params)} with full CV: F1={score:.4f}")
+        if params is search.best_params_:
+            model = search.best_estimator_
+        else:
+            model = _build(pipeline, params).fit(X_train, y_train)
+        candidates.append({
+            "name": candidate_name(params),
+            "params": params,
+            "f1": score,
+            "model": model,
+            "cost": measure_cost(model, X_measure),
+        })
+    return candidates
+
+
+# =========================
+# SELECTION
+# =========================
+def within_budget(cost: Dict[str, Optional[float]],
+                  max_p99_us: Optional[float] = MAX_P99_US,
+                  max_size_bytes: Optional[float] = MAX_SIZE_BYTES) -> bool:
+    """
+    True if a candidate's measured cost meets the configured budget.
+    """
+    if max_p99_us is not None and cost["single_p99_us"] > max_p99_us:
+        return False
+    if max_size_bytes is not None and cost["size_bytes"] > max_size_bytes:
+        return False
+    return True
+
+
+def pareto_front(candidates: Sequence[Dict[str, Any]]) -> List[int]:
+    """
+    Indices of the candidates not dominated on (F1 up, p99 latency down, size down).
+    """
+    def key(c):
+        return (-c["f1"], c["cost"]["single_p99_us"], c["cost"]["size_bytes"])
+
+    points = [key(c) for c in candidates]
+    front = []
+    for i, p in enumerate(points):
+        dominated = any(
+            all(q[k] <= p[k] for k in range(3)) and q != p
+            for j, q in enumerate(points) if j != i
+        )
+        if not dominated:
+            front.append(i)
+    return front
+
+
+def select_candidate(candidates: Sequence[Dict[str, Any]],
+                     strategy: str = SELECTION,
+                     max_p99_us: Optional[float] = MAX_P99_US,
+                     max_size_bytes: Optional[float] = MAX_SIZE_BYTES,
+                     f1_tolerance: float = F1_TOLERANCE) -> Tuple[int, str]:
+    """
+    Choose the model to ship.
+
+    Behavior:
+        - "f1": the best CV F1, ignoring cost (the previous behavior).
+        - "budget": the best CV F1 among candidates within the budget.
+        - "pareto": among budget-compliant candidates on the Pareto front,
+          the one with the lowest p99 latency whose F1 is within
+          `f1_tolerance` of the best; so a much slower model is not
+          chosen for a negligible F1 gain.
+        - If no candidate meets the budget, the best F1 is returned and
+          the reason says so.
+
+    Returns:
+        Tuple[int, str]: Index into `candidates` and a one-line reason.
+    """
+    if strategy not in SELECTION_STRATEGIES:
+        raise ValueError(f"Invalid selection '{strategy}'. Choose from {list(SELECTION_STRATEGIES)}.")
+
+    best_f1 = max(range(len(candidates)), key=lambda i: candidates[i]["f1"])
+    if strategy == "f1":
+        return best_f1, "best CV F1"
+
+    allowed = [i for i, c in enumerate(candidates) if within_budget(c["cost"], max_p99_us, max_size_bytes)]
+    if not allowed:
+        return best_f1, "no candidate meets the budget; fell back to the best CV F1"
+    best_allowed = max(allowed, key=lambda i: candidates[i]["f1"])
+    if strategy == "budget":
+        return best_allowed, "best CV F1 within budget"
+
+    front = [allowed[i] for i in pareto_front([candidates[i] for i in allowed])]
+    floor = candidates[best_allowed]["f1"] - f1_tolerance
+    eligible = [i for i in front if candidates[i]["f1"] >= floor]
+    chosen = min(eligible, key=lambda i: (candidates[i]["cost"]["single_p99_us"], -candidates[i]["f1"]))
+    return chosen, f"fastest Pareto candidate within {f1_tolerance:g} F1 of the best"
+
+
+def report(candidates: Sequence[Dict[str, Any]], chosen: int) -> None:
+    """
+    Print the measured candidates, best F1 first, marking the chosen one.
+    """
+    print(f"\n{'':2}{'F1':>7} {'p50 us':>8} {'p99 us':>8} {'batch us/row':>13} {'size KB':>9} {'load ms':>8}  candidate")
+    for i in sorted(range(len(candidates)), key=lambda i: -candidates[i]["f1"]):
+        c, cost = candidates[i], candidates[i]["cost"]
+        print(
+            f"{'*' if i == chosen else ' ':2}{c['f1']:7.4f} {cost['single_p50_us']:8.1f} {cost['single_p99_us']:8.1f} "
+            f"{cost['batch_us_per_row']:13.3f} {cost['size_bytes'] / 1024:9.1f} {cost['load_ms']:8.2f}  {c['name']}"
+        )
+
+
+def selection_record(candidates: Sequence[Dict[str, Any]], chosen: int, strategy: str, reason: str,
+                     max_p99_us: Optional[float], max_size_bytes: Optional[float],
+                     f1_tolerance: float) -> Dict[str, Any]:
+    """
+    Plain-data summary of the selection, stored with `best_params`.
+    """
+    return {
+        "strategy": strategy,
+        "reason": reason,
+        "budget": {"max_p99_us": max_p99_us, "max_size_bytes": max_size_bytes},
+        "f1_tolerance": f1_tolerance,
+        "chosen": candidates[chosen]["name"],
+        "candidates": [
+            {"name": c["name"], "f1": c["f1"], **c["cost"]}
+            for c in candidates
+        ],
+    }
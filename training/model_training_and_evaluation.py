@@ -1,3 +1,4 @@
+from sklearn.base import clone
 from sklearn.model_selection import GridSearchCV
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
@@ -5,15 +6,46 @@ from sklearn.metrics import classification_report, confusion_matrix
 from from_root import from_root
 import joblib
 import os
+import tempfile
 import pandas as pd
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 from imblearn.pipeline import Pipeline
 
+from training import model_cost
+
 # =========================
 # PATHS
 # =========================
 MODEL_PATH = os.path.join(from_root(), 'models', 'supervised_pipeline_simple.joblib')
 PARAMS_PATH = os.path.join(from_root(), 'models', 'supervised_best_params_simple.joblib')
+LEAN_PATH = os.path.join(from_root(), 'models', 'supervised_pipeline_simple.npz')  # main.py --lean
+
+# =========================
+# SEARCH CONFIGURATION
+# =========================
+SEARCH_STRATEGIES = ("grid", "halving")
+
+PARAM_GRID = [
+    # ---- Logistic Regression ----
+    {
+        "clf": [LogisticRegression(max_iter=1000, solver="liblinear")],
+        "clf__C": [0.1, 1.0, 10.0],
+    },
+    # ---- Random Forest ----
+    {
+        "clf": [RandomForestClassifier(random_state=42, n_jobs=-1)],
+        "clf__n_estimators": [100, 200],
+        "clf__max_depth": [None, 10, 20],
+        "clf__min_samples_split": [2, 5],
+    },
+    # ---- Gradient Boosting ----
+    {
+        "clf": [GradientBoostingClassifier(random_state=42)],
+        "clf__n_estimators": [100, 200],
+        "clf__learning_rate": [0.05, 0.1],
+        "clf__max_depth": [3, 5],
+    }
+]
 
 
 # =========================
@@ -24,14 +56,30 @@ def model_training_and_eval(
     X_train: pd.DataFrame,
     y_train: pd.Series,
     X_test: pd.DataFrame,
-    y_test: pd.Series
+    y_test: pd.Series,
+    search: str = "grid",
+    n_jobs: int = -1,
+    selection: str = model_cost.SELECTION,
+    max_p99_us: Optional[float] = model_cost.MAX_P99_US,
+    max_size_bytes: Optional[float] = model_cost.MAX_SIZE_BYTES,
+    f1_tolerance: float = model_cost.F1_TOLERANCE
 ) -> Tuple[Pipeline, Dict[str, Any]]:
     """
-    Perform multi-model grid search, train the best model, and evaluate it on the test set.
+    Perform multi-model hyperparameter search, train the best model, and evaluate it on the test set.
 
     Steps:
-        - Defines parameter grids for Logistic Regression, Random Forest, and Gradient Boosting.
-        - Performs 5-fold GridSearchCV using F1-score.
+        - Uses the parameter grids in PARAM_GRID for Logistic Regression, Random Forest, and Gradient Boosting.
+        - Performs 5-fold cross-validated search using F1-score:
+            - "grid": exhaustive GridSearchCV.
+            - "halving": successive halving with per-fold preprocessing/SMOTE
+              cached once (see `training.search.SuccessiveHalvingSearch`).
+        - Refits the best candidates of each model family, measures their
+          single-sample/batched predict latency, serialized size and load
+          time (see `training.model_cost`) and picks the model to ship
+          under `selection`: best F1, best F1 within a latency/size
+          budget, or the fastest Pareto candidate within `f1_tolerance`
+          of the best F1. The measurements are stored in
+          `best_params["selection"]`.
         - Prints best model and parameters.
         - Evaluates on the test set with confusion matrix and classification report.
 
@@ -41,48 +89,42 @@ def model_training_and_eval(
         y_train (pd.Series): Training labels.
         X_test (pd.DataFrame): Test features.
         y_test (pd.Series): Test labels.
+        search (str): Search strategy, "grid" or "halving".
+        n_jobs (int): Parallel workers (-1 = all cores).
+        selection (str): "f1", "budget" or "pareto".
+        max_p99_us (float, optional): Single-sample p99 latency budget in µs.
+        max_size_bytes (float, optional): Serialized pipeline size budget.
+        f1_tolerance (float): F1 a cheaper model may give up under "pareto".
 
     Returns:
         Tuple[Pipeline, Dict[str, Any]]:
             - best_model: Trained pipeline with best hyperparameters.
-            - best_params: Dictionary of best parameters from grid search.
+            - best_params: Dictionary of best parameters from the search.
     """
-    # =========================
-    # PARAMETER GRID (MULTI-MODEL)
-    # =========================
-    param_grid = [
-        # ---- Logistic Regression ----
-        {
-            "clf": [LogisticRegression(max_iter=1000, solver="liblinear")],
-            "clf__C": [0.1, 1.0, 10.0],
-        },
-        # ---- Random Forest ----
-        {
-            "clf": [RandomForestClassifier(random_state=42, n_jobs=-1)],
-            "clf__n_estimators": [100, 200],
-            "clf__max_depth": [None, 10, 20],
-            "clf__min_samples_split": [2, 5],
-        },
-        # ---- Gradient Boosting ----
-        {
-            "clf": [GradientBoostingClassifier(random_state=42)],
-            "clf__n_estimators": [100, 200],
-            "clf__learning_rate": [0.05, 0.1],
-            "clf__max_depth": [3, 5],
-        }
-    ]
+    if search not in SEARCH_STRATEGIES:
+        raise ValueError(f"Invalid search '{search}'. Choose from {list(SEARCH_STRATEGIES)}.")
 
     # =========================
-    # GRID SEARCH CV
+    # HYPERPARAMETER SEARCH
     # =========================
-    grid = GridSearchCV(
-        estimator=pipeline,
-        param_grid=param_grid,
-        scoring="f1",
-        cv=5,
-        n_jobs=-1,
-        verbose=2
-    )
+    if search == "halving":
+        from training.search import SuccessiveHalvingSearch
+
+        grid = SuccessiveHalvingSearch(
+            pipeline=pipeline,
+            param_grid=PARAM_GRID,
+            cv=5,
+            n_jobs=os.cpu_count() if n_jobs == -1 else n_jobs
+        )
+    else:
+        grid = GridSearchCV(
+            estimator=pipeline,
+            param_grid=PARAM_GRID,
+            scoring="f1",
+            cv=5,
+            n_jobs=n_jobs,
+            verbose=2
+        )
 
     # =========================
     # TRAIN (CV RUNS HERE)
@@ -92,13 +134,25 @@ def model_training_and_eval(
     # =========================
     # BEST MODEL
     # =========================
-    best_model = grid.best_estimator_
-    best_params = grid.best_params_
+    candidates = model_cost.evaluate_candidates(
+        grid, pipeline, X_train, y_train, X_test.to_numpy(dtype="float64")
+    )
+    chosen, reason = model_cost.select_candidate(
+        candidates, selection, max_p99_us, max_size_bytes, f1_tolerance
+    )
+    model_cost.report(candidates, chosen)
+    print(f"Selected ({selection}): {candidates[chosen]['name']} - {reason}")
+
+    best_model = candidates[chosen]["model"]
+    best_params = dict(candidates[chosen]["params"], clf=clone(best_model.named_steps["clf"]))
+    best_params["selection"] = model_cost.selection_record(
+        candidates, chosen, selection, reason, max_p99_us, max_size_bytes, f1_tolerance
+    )
 
     print("\nBest model:")
     print(best_model.named_steps["clf"])
     print("\nBest parameters:")
-    print(best_params)
+    print({k: v for k, v in best_params.items() if k != "selection"})
 
     # =========================
     # FINAL EVALUATION
@@ -114,19 +168,91 @@ def model_training_and_eval(
     return best_model, best_params
 
 
-def save_model_and_params(best_model: Pipeline, best_params: Dict[str, Any]):
+def atomic_dump(obj: Any, path: str) -> None:
+    """
+    Write a joblib file atomically.
+
+    The object is dumped to a temporary file in the destination directory,
+    fsynced, then renamed over `path` with `os.replace`, so readers (such as
+    the monitor's model watcher) only ever see the old or the new file,
+    never a half-written one.
+
+    Args:
+        obj (Any): Object to serialize.
+        path (str): Destination path.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".joblib", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            joblib.dump(obj, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def export_lean_model(best_model: Pipeline, lean_path: str = LEAN_PATH) -> bool:
+    """
+    Export the trained pipeline as a lean NumPy-only `.npz` scorer.
+
+    The artifact holds the scaler parameters and the model arrays, so
+    `main.py --lean` can score without pandas, joblib or scikit-learn.
+
+    Args:
+        best_model (Pipeline): Trained ML pipeline.
+        lean_path (str): Destination `.npz`. Defaults to LEAN_PATH.
+
+    Returns:
+        bool: False if the pipeline cannot be compiled to plain arrays.
+        Nothing is written then, and an older export at `lean_path` is
+        removed so `--lean` cannot keep serving the previous model.
+    """
+    from monitoring.scorer import compile_pipeline, export_lean, LEAN_SCORERS
+
+    scorer = compile_pipeline(best_model)
+    if scorer.family not in LEAN_SCORERS:
+        print(f"Lean export skipped: a {type(best_model.named_steps['clf']).__name__} pipeline needs scikit-learn.")
+        if os.path.exists(lean_path):
+            os.remove(lean_path)
+            print(f"Removed stale lean model: {lean_path}")
+        return False
+    export_lean(scorer, lean_path)
+    print(f"Lean model saved to: {lean_path}")
+    return True
+
+
+def save_model_and_params(
+    best_model: Pipeline,
+    best_params: Dict[str, Any],
+    model_path: str = MODEL_PATH,
+    params_path: str = PARAMS_PATH,
+    lean: bool = True
+):
     """
     Save the trained pipeline and best hyperparameters to disk.
 
+    All files are written atomically (see `atomic_dump`), so a running
+    monitor can hot-reload the model while it is being replaced.
+
     Args:
         best_model (Pipeline): Trained ML pipeline.
         best_params (dict): Best parameters from grid search.
+        model_path (str): Destination of the pipeline. Defaults to MODEL_PATH.
+        params_path (str): Destination of the parameters. Defaults to PARAMS_PATH.
+        lean (bool): Also export the lean `.npz` scorer next to the
+            pipeline (see `export_lean_model`). Defaults to True.
     """
-    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    joblib.dump(best_model, MODEL_PATH)
-    joblib.dump(best_params, PARAMS_PATH)
-    print(f"Model saved to: {MODEL_PATH}")
-    print(f"Best parameters saved to: {PARAMS_PATH}")
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    atomic_dump(best_params, params_path)
+    atomic_dump(best_model, model_path)
+    print(f"Model saved to: {model_path}")
+    print(f"Best parameters saved to: {params_path}")
+    if lean:
+        export_lean_model(best_model, os.path.splitext(model_path)[0] + ".npz")
 
 
 # =========================
@@ -0,0 +1,140 @@
+import math
+import numpy as np
+from typing import List, Optional
+
+# =========================
+# CONFIGURATION
+# =========================
+DEFAULT_K = 256          # Accuracy parameter: rank error is roughly 1.7 / k
+CAPACITY_DECAY = 2 / 3   # Lower levels get geometrically larger buffers
+MIN_CAPACITY = 8
+
+
+# =========================
+# KLL SKETCH
+# =========================
+class KLLSketch:
+    """
+    Mergeable approximate-quantile sketch (Karnin-Lang-Liberty).
+
+    Values are kept in levels of compactors; an item at level h stands for
+    2**h original values. When a level overflows it is sorted and every
+    other item (random offset) is promoted to the next level. Memory is
+    O(k) no matter how many values are added, and with high probability
+    the rank error of any quantile is about 1.7 / k (e.g. ~0.7% for the
+    default k=256).
+
+    Sketches built on different chunks or hosts can be combined with
+    `merge`, which gives the same guarantees as a single sketch over all
+    the data.
+
+    Args:
+        k (int): Accuracy parameter (top-level compactor size).
+        seed (int, optional): Seed for the compaction coin flips.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = 42):
+        self.k = int(k)
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    # ---- internals ----
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(MIN_CAPACITY, int(math.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def _size(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self) -> None:
+        while self._size() > self._max_size():
+            for h, items in enumerate(self.levels):
+                if len(items) < self._capacity(h):
+                    continue
+
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+
+                items = np.sort(items)
+                # An odd item out stays behind at this level
+                keep = items[:1] if len(items) % 2 else items[:0]
+                items = items[len(keep):]
+                offset = int(self._rng.integers(2))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], items[offset::2]])
+                self.levels[h] = keep
+                break
+
+    # ---- public API ----
+    def update(self, values) -> None:
+        """
+        Add a batch of values (NaNs are ignored).
+
+        Args:
+            values (array-like): Values to add.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """
+        Merge another sketch into this one in place.
+
+        Returns:
+            KLLSketch: self, for chaining.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _sorted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level), 2 ** h, dtype=np.int64) for h, level in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q: float) -> float:
+        """
+        Approximate quantile with pandas' default linear interpolation.
+
+        On a sketch that has not compacted yet this equals
+        `pd.Series(values).quantile(q)` exactly.
+
+        Args:
+            q (float): Quantile in [0, 1].
+
+        Returns:
+            float: Estimated value at quantile `q` (NaN if empty).
+        """
+        if self.n == 0:
+            return float("nan")
+
+        items, cum = self._sorted_items()
+        rank = q * (self.n - 1)
+        lo, hi = math.floor(rank), math.ceil(rank)
+        v_lo = items[min(np.searchsorted(cum, lo, side="right"), len(items) - 1)]
+        v_hi = items[min(np.searchsorted(cum, hi, side="right"), len(items) - 1)]
+        return float(v_lo + (v_hi - v_lo) * (rank - lo))
+
+    def rank_error(self) -> float:
+        """
+        Normalized rank-error bound (~99% confidence) for this sketch's `k`.
+        """
+        return 1.7 / self.k if len(self.levels) > 1 else 0.0
+
+    def __len__(self) -> int:
+        return self._size()
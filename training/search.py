@@ -0,0 +1,207 @@
+import os
+import math
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from sklearn.base import clone
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from imblearn.pipeline import Pipeline
+
+# =========================
+# CONFIGURATION
+# =========================
+CV_FOLDS = 5
+ETA = 3                 # Keep the best 1/ETA candidates each round
+MIN_RESOURCES = 200     # Smallest per-fold training subset in the first round
+N_JOBS = os.cpu_count() or 1
+
+# Filled in each worker process by `_init_worker`
+_FOLDS: List[Dict[str, np.ndarray]] = []
+
+
+# =========================
+# FOLD CACHE
+# =========================
+def build_fold_cache(
+    pipeline: Pipeline,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    cv: int = CV_FOLDS,
+    random_state: int = 42
+) -> List[Dict[str, np.ndarray]]:
+    """
+    Fit the preprocessing and SMOTE steps once per CV fold.
+
+    Every candidate evaluated on a fold reuses the same scaled and
+    oversampled arrays instead of re-fitting StandardScaler and SMOTE.
+    Folds match `GridSearchCV(cv=cv)` for classifiers (unshuffled
+    StratifiedKFold), and the resampled rows are shuffled once so that
+    any prefix is a representative subsample for successive halving.
+
+    Args:
+        pipeline (Pipeline): Pipeline with `preprocess`, optional `smote`
+            and `clf` steps.
+        X_train (pd.DataFrame): Training features.
+        y_train (pd.Series): Training labels.
+        cv (int): Number of folds.
+        random_state (int): Seed for the subsample order.
+
+    Returns:
+        List[Dict[str, np.ndarray]]: Per fold: X_fit, y_fit, X_val, y_val.
+    """
+    rng = np.random.default_rng(random_state)
+    folds = []
+    for train_idx, val_idx in StratifiedKFold(n_splits=cv).split(X_train, y_train):
+        X_tr, y_tr = X_train.iloc[train_idx], y_train.iloc[train_idx]
+        X_val, y_val = X_train.iloc[val_idx], y_train.iloc[val_idx]
+
+        preprocessor = clone(pipeline.named_steps["preprocess"])
+        X_fit = preprocessor.fit_transform(X_tr, y_tr)
+        y_fit = y_tr.to_numpy()
+
+        if "smote" in pipeline.named_steps:
+            smote = clone(pipeline.named_steps["smote"])
+            X_fit, y_fit = smote.fit_resample(X_fit, y_fit)
+
+        order = rng.permutation(len(y_fit))
+        folds.append({
+            "X_fit": np.asarray(X_fit)[order],
+            "y_fit": np.asarray(y_fit)[order],
+            "X_val": np.asarray(preprocessor.transform(X_val)),
+            "y_val": y_val.to_numpy(),
+        })
+    return folds
+
+
+# =========================
+# WORKER FUNCTIONS
+# =========================
+def _init_worker(folds: List[Dict[str, np.ndarray]]) -> None:
+    global _FOLDS
+    _FOLDS = folds
+
+
+def _make_classifier(params: Dict[str, Any]):
+    """
+    Build a fresh single-threaded classifier from a grid point.
+    """
+    clf = clone(params["clf"])
+    clf.set_params(**{k[len("clf__"):]: v for k, v in params.items() if k.startswith("clf__")})
+    if "n_jobs" in clf.get_params():
+        clf.set_params(n_jobs=1)  # parallelism comes from the process pool
+    return clf
+
+
+def _evaluate(params: Dict[str, Any], fold_idx: int, n_resources: int) -> float:
+    """
+    Fit one candidate on the first `n_resources` cached rows of a fold and
+    return its validation F1.
+    """
+    fold = _FOLDS[fold_idx]
+    X_fit, y_fit = fold["X_fit"][:n_resources], fold["y_fit"][:n_resources]
+    if len(np.unique(y_fit)) < 2:
+        return 0.0
+    clf = _make_classifier(params).fit(X_fit, y_fit)
+    return float(f1_score(fold["y_val"], clf.predict(fold["X_val"]), zero_division=0))
+
+
+# =========================
+# SEARCH
+# =========================
+class SuccessiveHalvingSearch:
+    """
+    Successive-halving hyperparameter search over a multi-model grid.
+
+    All candidates start on a small per-fold subsample; after each round
+    only the best 1/`eta` (by mean CV F1) continue, and the subsample grows
+    by a factor `eta` until the survivors are scored on the full folds.
+    Preprocessing and SMOTE outputs are computed once per fold and shared
+    with a process pool of `n_jobs` workers.
+
+    Exposes `best_params_`, `best_score_`, `best_estimator_` and
+    `cv_results_` like `GridSearchCV`.
+
+    Args:
+        pipeline (Pipeline): Preprocess + SMOTE + classifier pipeline.
+        param_grid (list): GridSearchCV-style grid (with a `clf` key).
+        cv (int): Number of folds.
+        eta (int): Halving factor.
+        min_resources (int): Rows per fold in the first round.
+        n_jobs (int): Worker processes (process-pool budget).
+        verbose (int): Print per-round progress if > 0.
+    """
+
+    def __init__(self,
+                 pipeline: Pipeline,
+                 param_grid: List[Dict[str, list]],
+                 cv: int = CV_FOLDS,
+                 eta: int = ETA,
+                 min_resources: int = MIN_RESOURCES,
+                 n_jobs: Optional[int] = N_JOBS,
+                 verbose: int = 1):
+        self.pipeline = pipeline
+        self.param_grid = param_grid
+        self.cv = cv
+        self.eta = eta
+        self.min_resources = min_resources
+        self.n_jobs = max(1, n_jobs or 1)
+        self.verbose = verbose
+
+    def _schedule(self, n_candidates: int, n_max: int) -> List[int]:
+        """
+        Per-round rows per fold, ending with the full fold size.
+        """
+        n_rounds = max(1, math.ceil(math.log(n_candidates, self.eta))) if n_candidates > 1 else 1
+        resources = [n_max // self.eta ** (n_rounds - 1 - i) for i in range(n_rounds)]
+        return [min(n_max, max(self.min_resources, r)) for r in resources]
+
+    def fit(self, X_train: pd.DataFrame, y_train: pd.Series) -> "SuccessiveHalvingSearch":
+        start = time.perf_counter()
+        candidates = list(ParameterGrid(self.param_grid))
+
+        folds = build_fold_cache(self.pipeline, X_train, y_train, cv=self.cv)
+        n_max = min(len(f["y_fit"]) for f in folds)
+        schedule = self._schedule(len(candidates), n_max)
+
+        self.cv_results_ = []
+        alive = list(range(len(candidates)))
+        scores: Dict[int, float] = {}
+
+        with ProcessPoolExecutor(max_workers=self.n_jobs,
+                                 initializer=_init_worker,
+                                 initargs=(folds,)) as pool:
+            for round_idx, n_resources in enumerate(schedule):
+                futures = {
+                    (i, f): pool.submit(_evaluate, candidates[i], f, n_resources)
+                    for i in alive for f in range(len(folds))
+                }
+                scores = {
+                    i: float(np.mean([futures[(i, f)].result() for f in range(len(folds))]))
+                    for i in alive
+                }
+                for i in alive:
+                    self.cv_results_.append({
+                        "round": round_idx,
+                        "n_resources": n_resources,
+                        "params": candidates[i],
+                        "mean_test_score": scores[i],
+                    })
+
+                if self.verbose:
+                    print(f"Round {round_idx}: {len(alive)} candidates x {len(folds)} folds "
+                          f"on {n_resources} rows/fold, best F1={max(scores.values()):.4f}")
+
+                if round_idx < len(schedule) - 1:
+                    keep = max(1, math.ceil(len(alive) / self.eta))
+                    alive = sorted(alive, key=lambda i: scores[i], reverse=True)[:keep]
+
+        best = max(alive, key=lambda i: scores[i])
+        self.best_params_ = candidates[best]
+        self.best_score_ = scores[best]
+        self.best_estimator_ = clone(self.pipeline).set_params(**self.best_params_).fit(X_train, y_train)
+        self.elapsed_sec_ = time.perf_counter() - start
+        return self